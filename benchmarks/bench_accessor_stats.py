@@ -0,0 +1,31 @@
+'''
+benchmark for accessor_stats.compute
+
+a WEIGHTS_0 accessor of random normalized rows. min, max, sums and bad rows.
+
+python benchmarks/bench_accessor_stats.py [row_count]
+'''
+import sys
+import timeit
+import numpy as np
+from gltfio.types import GltfAccessorSlice
+from gltfloupe.accessor_stats import compute
+
+
+def main(count: int):
+    rng = np.random.default_rng(0)
+    weights = rng.random((count, 4), dtype=np.float32)
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights[count // 2] = 0
+    view = GltfAccessorSlice(memoryview(weights.tobytes()).cast('f'), 4)
+
+    plain = min(timeit.repeat(lambda: compute(view), number=1, repeat=3))
+    with_weights = min(timeit.repeat(
+        lambda: compute(view, is_weights=True), number=1, repeat=3))
+    print(f'{count} rows')
+    print(f'  min max     : {plain*1e3:8.2f} ms')
+    print(f'  weights     : {with_weights*1e3:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
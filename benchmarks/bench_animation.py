@@ -0,0 +1,102 @@
+'''
+benchmark for Animation.set_time
+
+compare the per curve evaluation with the packed ChannelPack
+and the baked pose table on a synthetic rig.
+
+python benchmarks/bench_animation.py [joint_count] [key_count] [LINEAR|STEP|CUBICSPLINE]
+'''
+import sys
+import timeit
+import numpy as np
+from glglue import ctypesmath
+from glglue.scene.node import Node
+from gltfio.types import (GltfAccessorSlice, GltfAnimation, GltfAnimationChannel, GltfAnimationSampler,
+                          GltfAnimationTarget, GltfAnimationTargetPath, GltfAnimationInterpolation, GltfNode)
+from gltfloupe.animation import Animation, TranslationCurve, RotationCurve, ScaleCurve
+from gltfloupe.bake import BakedAnimation
+from gltfloupe import pose
+
+
+def create_rig(joint_count: int, key_count: int, mode: GltfAnimationInterpolation):
+    trs = pose.new_pose(joint_count)
+    nodes = [Node(f'joint{i}', pose.bind_trs(trs, i, ctypesmath.TRS(
+        ctypesmath.Float3(0, 0, 0),
+        ctypesmath.Quaternion(0, 0, 0, 1),
+        ctypesmath.Float3(1, 1, 1)))) for i in range(joint_count)]
+    rng = np.random.default_rng(0)
+    animation = Animation('bench')
+    times = np.arange(key_count, dtype=np.float32) / 30
+    for i, node in enumerate(nodes):
+        for klass, n in ((TranslationCurve, 3), (RotationCurve, 4), (ScaleCurve, 3)):
+            values = rng.random((key_count, n), dtype=np.float32)
+            if n == 4:
+                values /= np.linalg.norm(values, axis=1, keepdims=True)
+            tangents = rng.random((2, key_count, n), dtype=np.float32)
+            animation.add_curve(
+                klass(i, node, times, values, mode, tangents[0], tangents[1]))
+    return trs, animation
+
+
+def create_gltf_animation(joint_count: int, key_count: int, mode: GltfAnimationInterpolation) -> GltfAnimation:
+    rng = np.random.default_rng(0)
+    times = (np.arange(key_count, dtype=np.float32) / 30).tobytes()
+    channels = []
+    samplers = []
+    for i in range(joint_count):
+        node = GltfNode(i, f'joint{i}', [])
+        for path, n in ((GltfAnimationTargetPath.Translation, 3), (GltfAnimationTargetPath.Rotation, 4), (GltfAnimationTargetPath.Scale, 3)):
+            values = rng.random(
+                (key_count * (3 if mode == GltfAnimationInterpolation.Cubicspline else 1), n), dtype=np.float32).tobytes()
+            channels.append(GltfAnimationChannel(
+                len(samplers), GltfAnimationTarget(path, node)))
+            samplers.append(GltfAnimationSampler(
+                GltfAccessorSlice(memoryview(times).cast('f'), 1),
+                GltfAccessorSlice(memoryview(values).cast('f'), n),
+                mode))
+    return GltfAnimation(0, 'bench', channels, samplers)
+
+
+def main(joint_count: int, key_count: int, mode: GltfAnimationInterpolation):
+    src = create_gltf_animation(joint_count, key_count, mode)
+    nodes = [Node(f'joint{i}', ctypesmath.Mat4.new_identity())
+             for i in range(joint_count)]
+    load = min(timeit.repeat(lambda: Animation.from_gltf(
+        src, nodes), number=1, repeat=3))
+
+    trs, animation = create_rig(joint_count, key_count, mode)
+    frames = [animation.last_time * i / 100 for i in range(100)]
+
+    def per_curve():
+        for t in frames:
+            for curve in animation.curves:
+                curve.set_time(t)
+
+    def packed():
+        for t in frames:
+            animation.set_time(t, trs)
+
+    bake = min(timeit.repeat(lambda: BakedAnimation(
+        animation, 30), number=1, repeat=3))
+    table = BakedAnimation(animation, 30)
+
+    def baked():
+        for t in frames:
+            table.set_time(t, trs)
+
+    packed()
+    a = min(timeit.repeat(per_curve, number=1, repeat=3)) / len(frames)
+    b = min(timeit.repeat(packed, number=1, repeat=3)) / len(frames)
+    c = min(timeit.repeat(baked, number=1, repeat=3)) / len(frames)
+    print(f'{joint_count} joints x 3 channels, {key_count} keys, {mode.value}')
+    print(f'  from_gltf : {load*1e3:8.3f} ms')
+    print(f'  per curve : {a*1e3:8.3f} ms/frame')
+    print(f'  packed    : {b*1e3:8.3f} ms/frame')
+    print(f'  bake 30Hz : {bake*1e3:8.3f} ms, {table.nbytes} bytes')
+    print(f'  baked     : {c*1e3:8.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+         GltfAnimationInterpolation(sys.argv[3]) if len(sys.argv) > 3 else GltfAnimationInterpolation.Linear)
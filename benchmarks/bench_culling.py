@@ -0,0 +1,50 @@
+'''
+benchmark for bvh.BVH.cull
+
+random boxes in a city sized area. the camera sees a small part of it.
+compare the BVH with the brute force test of all boxes.
+
+python benchmarks/bench_culling.py [box_count]
+'''
+import sys
+import math
+import timeit
+import numpy as np
+from gltfloupe import bvh
+
+
+def main(count: int):
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-5000, 5000, (count, 3)).astype(np.float32)
+    centers[:, 1] = 0
+    extents = rng.uniform(1, 20, (count, 3)).astype(np.float32)
+    mins = centers - extents
+    maxs = centers + extents
+
+    f = 1 / math.tan(math.pi / 6)
+    near, far = 0.1, 2000
+    projection = np.array([
+        [f, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), -1],
+        [0, 0, 2 * far * near / (near - far), 0],
+    ], np.float32)
+    planes = bvh.frustum_planes(projection)
+
+    build = min(timeit.repeat(lambda: bvh.BVH(mins, maxs), number=1, repeat=3))
+    tree = bvh.BVH(mins, maxs)
+    refit = min(timeit.repeat(
+        lambda: tree.refit(mins, maxs), number=10, repeat=3)) / 10
+    cull = min(timeit.repeat(lambda: tree.cull(planes),
+               number=10, repeat=3)) / 10
+    brute = min(timeit.repeat(lambda: bvh.intersects_frustum(
+        mins, maxs, planes), number=10, repeat=3)) / 10
+    print(f'{count} boxes, {len(tree.cull(planes))} visible')
+    print(f'  build       : {build*1e3:8.2f} ms')
+    print(f'  refit       : {refit*1e3:8.2f} ms')
+    print(f'  cull        : {cull*1e3:8.2f} ms')
+    print(f'  brute force : {brute*1e3:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
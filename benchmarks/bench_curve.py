@@ -0,0 +1,66 @@
+'''
+micro benchmark for animation.Curve.set_time
+
+compare the former linear scan with the binary search + cursor lookup
+on synthetic curves.
+
+python benchmarks/bench_curve.py [key_count]
+'''
+import sys
+import timeit
+import numpy as np
+from glglue import ctypesmath
+from glglue.scene.node import Node
+from gltfloupe.animation import TranslationCurve
+from gltfloupe import interpolation
+
+
+def create_curve(count: int) -> TranslationCurve:
+    node = Node('bench', ctypesmath.TRS(ctypesmath.Float3(0, 0, 0),
+                                        ctypesmath.Quaternion(0, 0, 0, 1),
+                                        ctypesmath.Float3(1, 1, 1)))
+    times = np.arange(count, dtype=np.float32) / 30
+    values = np.zeros((count, 3), dtype=np.float32)
+    values[:, 0] = np.arange(count)
+    return TranslationCurve(0, node, times, values)
+
+
+def linear_scan(curve: TranslationCurve, time: float):
+    '''
+    the former implementation. visit all segments.
+    '''
+    times = curve.times.tolist()
+    for i, (l, r) in enumerate(zip(times[:-1], times[1:])):
+        if l <= time < r:
+            ratio = np.array([(time-l)/(r-l)], dtype=np.float32)
+            duration = np.array([r-l], dtype=np.float32)
+            value = interpolation.interpolate(curve.interpolation, curve.is_rotation,
+                                              curve.values[i:i+1], curve.values[i+1:i+2], ratio, duration)
+            curve.apply(value[0])
+            break
+
+
+def main(count: int):
+    curve = create_curve(count)
+    end = float(curve.times[-1])
+    frames = [end * i / 1000 for i in range(1000)]
+    shuffled = frames[::7] + frames[1::7] + frames[2::7] + \
+        frames[3::7] + frames[4::7] + frames[5::7] + frames[6::7]
+
+    def run(f, times):
+        def _():
+            for t in times:
+                f(t)
+        return min(timeit.repeat(_, number=1, repeat=3)) / len(times)
+
+    scan = run(lambda t: linear_scan(curve, t), frames)
+    playback = run(curve.set_time, frames)
+    scrub = run(curve.set_time, shuffled)
+    print(f'{count} keys')
+    print(f'  linear scan      : {scan*1e6:10.2f} us/frame')
+    print(f'  cursor(playback) : {playback*1e6:10.2f} us/frame')
+    print(f'  bisect(scrub)    : {scrub*1e6:10.2f} us/frame')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,69 @@
+'''
+benchmark for the image decoding of GltfLoader.load
+
+a synthetic glTF that has many PNG textures.
+compare the serial decode with the thread pool decode.
+
+python benchmarks/bench_images.py [image_count] [size]
+'''
+import sys
+import io
+import json
+import timeit
+import numpy as np
+from PIL import Image
+from gltfio.parser import parse_gltf
+from glglue.scene.texture import Image32
+from gltfloupe.gltf_loader import GltfLoader
+
+
+def create_gltf(image_count: int, size: int):
+    rng = np.random.default_rng(0)
+    bin = bytearray()
+    views = []
+    for _ in range(image_count):
+        # noise and gradient. not too compressible
+        pixels = rng.integers(0, 32, (size, size, 4), dtype=np.uint8)
+        pixels += np.arange(size, dtype=np.uint8)[:, None, None]
+        f = io.BytesIO()
+        Image.fromarray(pixels, 'RGBA').save(f, 'PNG')
+        data = f.getvalue()
+        views.append({'buffer': 0, 'byteOffset': len(bin),
+                      'byteLength': len(data)})
+        bin.extend(data)
+        while len(bin) % 4:
+            bin.append(0)
+    gltf = {
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': []}],
+        'images': [{'bufferView': i, 'mimeType': 'image/png'} for i in range(image_count)],
+        'textures': [{'source': i} for i in range(image_count)],
+        'materials': [{'pbrMetallicRoughness': {'baseColorTexture': {'index': i}}} for i in range(image_count)],
+        'buffers': [{'byteLength': len(bin)}],
+        'bufferViews': views,
+    }
+    return parse_gltf(json.dumps(gltf).encode(), bin=bytes(bin))
+
+
+def main(image_count: int, size: int):
+    data = create_gltf(image_count, size)
+
+    def serial():
+        for image in data.images:
+            Image32.load(image.data)
+
+    decode = min(timeit.repeat(serial, number=1, repeat=3))
+    single = min(timeit.repeat(lambda: GltfLoader(
+        data).load(image_workers=1), number=1, repeat=3))
+    pooled = min(timeit.repeat(lambda: GltfLoader(
+        data).load(), number=1, repeat=3))
+    print(f'{image_count} images {size}x{size}')
+    print(f'  serial decode  : {decode*1e3:8.1f} ms')
+    print(f'  load 1 worker  : {single*1e3:8.1f} ms')
+    print(f'  load pool      : {pooled*1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1024)
@@ -0,0 +1,49 @@
+'''
+benchmark for keypath.classify
+
+key paths of a synthetic glTF with many nodes, meshes and accessors.
+compare the memoized classify with the plain trie walk.
+
+python benchmarks/bench_keypath.py [path_count]
+'''
+import sys
+import timeit
+from gltfloupe import keypath
+
+
+def create_paths(count: int):
+    templates = [
+        lambda i: ('nodes', i),
+        lambda i: ('nodes', i, 'children', 0),
+        lambda i: ('nodes', i, 'mesh'),
+        lambda i: ('nodes', i, 'translation'),
+        lambda i: ('meshes', i, 'primitives', 0, 'attributes', 'POSITION'),
+        lambda i: ('meshes', i, 'primitives', 0, 'indices'),
+        lambda i: ('accessors', i),
+        lambda i: ('accessors', i, 'max', 0),
+        lambda i: ('skins', i, 'joints', 3),
+        lambda i: ('extensions', 'KHR_lights_punctual', 'lights', i),
+    ]
+    return [templates[i % len(templates)](i) for i in range(count)]
+
+
+def main(count: int):
+    paths = create_paths(count)
+
+    def memoized():
+        for keys in paths:
+            keypath.classify(keys)
+
+    def trie():
+        for keys in paths:
+            keypath.ROOT.find(keypath.to_pattern(keys))
+
+    cached = min(timeit.repeat(memoized, number=1, repeat=3))
+    walk = min(timeit.repeat(trie, number=1, repeat=3))
+    print(f'{count} paths')
+    print(f'  classify  : {cached*1e3:8.1f} ms {count/cached/1e6:6.2f} M/s')
+    print(f'  trie walk : {walk*1e3:8.1f} ms {count/walk/1e6:6.2f} M/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
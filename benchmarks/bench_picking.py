@@ -0,0 +1,50 @@
+'''
+benchmark for picking.TriangleBVH
+
+a bumpy grid mesh. random rays from above.
+compare the BVH with the brute force test of all triangles.
+
+python benchmarks/bench_picking.py [quads_per_side]
+'''
+import sys
+import timeit
+import numpy as np
+from gltfloupe import picking
+
+
+def main(count: int):
+    rng = np.random.default_rng(0)
+    xs, ys = np.meshgrid(np.arange(count + 1), np.arange(count + 1))
+    positions = np.stack([xs.ravel(), ys.ravel(), rng.uniform(-0.5, 0.5, xs.size)],
+                         axis=1).astype(np.float32)
+    i = np.arange(count * count)
+    v = i // count * (count + 1) + i % count
+    triangles = np.concatenate([
+        np.stack([v, v + 1, v + count + 1], axis=1),
+        np.stack([v + 1, v + count + 2, v + count + 1], axis=1)])
+
+    build = min(timeit.repeat(lambda: picking.TriangleBVH(
+        positions, triangles), number=1, repeat=1))
+    tree = picking.TriangleBVH(positions, triangles)
+    rays = [(np.array([*rng.uniform(0, count, 2), 10]), np.array([*rng.uniform(-0.1, 0.1, 2), -1]))
+            for _ in range(20)]
+
+    def pick():
+        for origin, direction in rays:
+            tree.raycast(origin, direction)
+
+    def brute():
+        for origin, direction in rays[:2]:
+            picking.intersect_triangles(
+                origin, direction, tree.v0, tree.e1, tree.e2).min()
+
+    raycast = min(timeit.repeat(pick, number=1, repeat=3)) / len(rays)
+    brute_force = min(timeit.repeat(brute, number=1, repeat=1)) / 2
+    print(f'{len(triangles)} triangles')
+    print(f'  build       : {build*1e3:8.2f} ms')
+    print(f'  raycast     : {raycast*1e3:8.2f} ms')
+    print(f'  brute force : {brute_force*1e3:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -1,4 +1,13 @@
 from . app import run
 
 if __name__ == '__main__':
-    run()
+    import sys
+    match sys.argv[1:]:
+        case ['bench', *args]:
+            from .bench import main
+            main(args)
+        case ['validate', *args]:
+            from .validate import main
+            sys.exit(main(args))
+        case _:
+            run()
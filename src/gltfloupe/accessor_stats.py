@@ -0,0 +1,94 @@
+'''
+statistics of an accessor. computed once with numpy and cached.
+'''
+from typing import Dict, NamedTuple, Optional, Tuple
+import numpy as np
+from gltfio.types import GltfAccessorSlice
+from .skinning import as_weight_array
+
+# weight sum tolerance
+THRESHOLD = 1e-5
+
+# gltfio reads BYTE as 'c' and UNSIGNED_BYTE as 'b'
+DTYPES = {
+    'c': np.int8,
+    'b': np.uint8,
+    'B': np.uint8,
+    'h': np.int16,
+    'H': np.uint16,
+    'I': np.uint32,
+    'L': np.uint32,
+    'f': np.float32,
+}
+
+
+class AccessorStats(NamedTuple):
+    count: int
+    # per component
+    min: np.ndarray
+    max: np.ndarray
+    # NaN and Inf
+    non_finite: int
+    # WEIGHTS_n only
+    sums: Optional[np.ndarray] = None
+    # rows that sum deviates beyond THRESHOLD
+    bad_rows: Optional[np.ndarray] = None
+
+
+def compute(view: GltfAccessorSlice, is_weights: bool = False) -> AccessorStats:
+    element_count = view.element_count
+    if is_weights:
+        values = as_weight_array(view)
+    else:
+        scalar_view = view.scalar_view
+        values = np.frombuffer(scalar_view.cast('B'), dtype=DTYPES[scalar_view.format]).reshape(
+            -1, element_count)
+    count = len(values)
+    if count == 0:
+        empty = np.zeros(element_count)
+        return AccessorStats(0, empty, empty, 0)
+
+    non_finite = 0
+    if values.dtype.kind == 'f':
+        finite = np.isfinite(values)
+        non_finite = int(np.count_nonzero(~finite))
+        if non_finite:
+            # min max of finite values
+            values = np.where(finite, values, np.nan)
+            minimum = np.nanmin(values, axis=0)
+            maximum = np.nanmax(values, axis=0)
+        else:
+            minimum = values.min(axis=0)
+            maximum = values.max(axis=0)
+    else:
+        minimum = values.min(axis=0)
+        maximum = values.max(axis=0)
+
+    sums = None
+    bad_rows = None
+    if is_weights:
+        sums = values.sum(axis=1, dtype=np.float64)
+        bad_rows = np.flatnonzero(~(np.abs(sums - 1) <= THRESHOLD))
+
+    return AccessorStats(count, minimum, maximum, non_finite, sums, bad_rows)
+
+
+class StatsCache:
+    '''
+    stats by accessor index and is_weights.
+    the weights view of an accessor has the sums
+    '''
+
+    def __init__(self) -> None:
+        self.stats: Dict[Tuple[int, bool], AccessorStats] = {}
+
+    def clear(self):
+        self.stats.clear()
+
+    def get(self, accessor_index: int, view: GltfAccessorSlice, is_weights: bool = False) -> AccessorStats:
+        key = (accessor_index, is_weights)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = compute(view, is_weights)
+            self.stats[key] = stats
+        return stats
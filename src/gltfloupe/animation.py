@@ -1,19 +1,70 @@
-from typing import List
-import ctypes
+from typing import List, Optional, Dict, Set
+import numpy as np
 from glglue.scene.node import Node
+from .pose import STRIDE, TRANSLATION, ROTATION, SCALE
+from . import interpolation
+from gltfio.types import GltfAccessorSlice
 from gltfio.parser import GltfAnimation, GltfAnimationTargetPath, GltfAnimationInterpolation
 
-
-def lerp(low: float, hight: float, ratio: float) -> float:
-    return low + (hight-low) * ratio
+# normalized integer component. rotation and weights
+# gltfio reads BYTE as 'c' and UNSIGNED_BYTE as 'b'
+NORMALIZED = {
+    'c': (np.int8, 127.0),
+    'b': (np.uint8, 255.0),
+    'B': (np.uint8, 255.0),
+    'h': (np.int16, 32767.0),
+    'H': (np.uint16, 65535.0),
+}
+
+
+def as_float_array(src: GltfAccessorSlice) -> np.ndarray:
+    '''
+    (count, element_count) float32 array of the accessor.
+
+    float accessor is a view of the buffer bytes, not a copy.
+    normalized integer accessor is converted to float.
+    '''
+    view = src.scalar_view
+    if view.format == 'f':
+        values = np.frombuffer(view, dtype=np.float32)
+    else:
+        dtype, scale = NORMALIZED[view.format]
+        values = np.frombuffer(view.cast('B'), dtype=dtype).astype(
+            np.float32) / scale
+        # signed min is -1
+        np.maximum(values, -1, out=values)
+    return values.reshape(-1, src.element_count)
 
 
 class Curve:
-    def __init__(self, node: Node, element_count: int, count: int) -> None:
+    '''
+    times: (count,) float32
+    values: (count, element_count) float32
+    in_tangents, out_tangents: (count, element_count) float32. CUBICSPLINE only
+
+    usually views of the accessor buffers (see as_float_array).
+
+    Animation evaluates the curves with ChannelPack.
+    find_segment and set_time are the per curve reference path
+    for the tests and the benchmarks.
+    '''
+
+    def __init__(self, node_index: int, node: Node, times: np.ndarray, values: np.ndarray,
+                 interpolation=GltfAnimationInterpolation.Linear,
+                 in_tangents: Optional[np.ndarray] = None, out_tangents: Optional[np.ndarray] = None) -> None:
+        assert len(times) == len(values)
+        self.node_index = node_index
         self.node = node
-        self.element_count = element_count
-        self.times = (ctypes.c_float * count)()
-        self.values = (ctypes.c_float * (element_count * count))()
+        self.element_count = values.shape[1]
+        self.times = times
+        self.values = values
+        self.interpolation = interpolation
+        if interpolation == GltfAnimationInterpolation.Cubicspline:
+            assert in_tangents is not None and out_tangents is not None
+        self.in_tangents = in_tangents
+        self.out_tangents = out_tangents
+        # last found segment for find_segment
+        self.cursor = 0
 
     def __str__(self) -> str:
         return f'{self.node.name}.{self.target}: {self.times[-1]} sec'
@@ -22,49 +73,66 @@ class Curve:
     def target(self) -> str:
         raise NotImplementedError()
 
-    def set_key(self, pos: int, time: float, value: tuple):
-        self.times[pos] = time
-        i = pos * self.element_count
-        for v in value:
-            self.values[i]
-            i += 1
-
-    def get_value(self, index: int) -> List[float]:
-        begin = self.element_count * index
-        return self.values[begin:begin+self.element_count]
+    @property
+    def is_rotation(self) -> bool:
+        return False
+
+    def get_value(self, index: int) -> np.ndarray:
+        return self.values[index]
+
+    def find_segment(self, time: float) -> int:
+        '''
+        return i that times[i] <= time < times[i+1].
+
+        the last found segment is kept as cursor.
+        monotonic playback hits the cursor or the next segment in O(1),
+        otherwise fallback to binary search in O(log n).
+        '''
+        times = self.times
+        i = self.cursor
+        if times[i] <= time:
+            if time < times[i+1]:
+                return i
+            if i+2 < len(times) and time < times[i+2]:
+                self.cursor = i+1
+                return self.cursor
+        self.cursor = int(np.searchsorted(
+            times[:-1], time, side='right')) - 1
+        return self.cursor
 
     def set_time(self, time: float):
-        first = self.times[0]
-        end = self.times[-1]
+        '''
+        reference path. apply the value at time to the node
+        '''
         if time <= self.times[0]:
             self.apply(self.get_value(0))
         elif time >= self.times[-1]:
-            self.apply(self.get_value(-1))
+            self.apply(self.get_value(len(self.times)-1))
         else:
-            for i, (l, r) in enumerate(zip(self.times[:-1], self.times[1:])):
-                ll = self.get_value(i)
-                rr = self.get_value(i+1)
-                if l == time:
-                    self.apply(ll)
-                elif r == time:
-                    self.apply(rr)
+            i = self.find_segment(time)
+            l = self.times[i]
+            r = self.times[i+1]
+            if l == time:
+                self.apply(self.get_value(i))
+            else:
+                ratio = np.array([(time-l)/(r-l)], dtype=np.float32)
+                duration = np.array([r-l], dtype=np.float32)
+                if self.interpolation == GltfAnimationInterpolation.Cubicspline:
+                    assert self.in_tangents is not None and self.out_tangents is not None
+                    value = interpolation.interpolate(self.interpolation, self.is_rotation,
+                                                      self.values[i:i+1], self.values[i+1:i+2], ratio, duration,
+                                                      self.out_tangents[i:i+1], self.in_tangents[i+1:i+2])
                 else:
-                    # LINEAR
-                    ratio = (time-l)/(r-l)
-                    self.apply_lerp(ll, rr, ratio)
+                    value = interpolation.interpolate(self.interpolation, self.is_rotation,
+                                                      self.values[i:i+1], self.values[i+1:i+2], ratio, duration)
+                self.apply(value[0])
 
     def apply(self, value: List[float]):
         # implement inherited class
         raise NotImplementedError()
 
-    def apply_lerp(self, low, high, ratio):
-        raise NotImplementedError()
-
 
 class TranslationCurve(Curve):
-    def __init__(self, node: Node, count: int) -> None:
-        super().__init__(node, 3, count)
-
     @property
     def target(self) -> str:
         return 'target'
@@ -75,22 +143,16 @@ class TranslationCurve(Curve):
         self.node.local_transform.trnslation.y = value[1]
         self.node.local_transform.trnslation.z = value[2]
 
-    def apply_lerp(self, low, high, ratio):
-        assert len(low) == 3
-        assert len(high) == 3
-        self.node.local_transform.trnslation.x = lerp(low[0], high[0], ratio)
-        self.node.local_transform.trnslation.y = lerp(low[1], high[1], ratio)
-        self.node.local_transform.trnslation.z = lerp(low[2], high[2], ratio)
-
 
 class RotationCurve(Curve):
-    def __init__(self, node: Node, count: int) -> None:
-        super().__init__(node, 4, count)
-
     @property
     def target(self) -> str:
         return 'rotation'
 
+    @property
+    def is_rotation(self) -> bool:
+        return True
+
     def apply(self, value: List[float]):
         assert len(value) == 4
         self.node.local_transform.rotation.x = value[0]
@@ -98,20 +160,8 @@ class RotationCurve(Curve):
         self.node.local_transform.rotation.z = value[2]
         self.node.local_transform.rotation.w = value[3]
 
-    def apply_lerp(self, low, high, ratio):
-        # TODO: slerp
-        assert len(low) == 4
-        assert len(high) == 4
-        self.node.local_transform.rotation.x = lerp(low[0], high[0], ratio)
-        self.node.local_transform.rotation.y = lerp(low[1], high[1], ratio)
-        self.node.local_transform.rotation.z = lerp(low[2], high[2], ratio)
-        self.node.local_transform.rotation.z = lerp(low[3], high[3], ratio)
-
 
 class ScaleCurve(Curve):
-    def __init__(self, node: Node, count: int) -> None:
-        super().__init__(node, 3, count)
-
     @property
     def target(self) -> str:
         return 'scale'
@@ -122,30 +172,157 @@ class ScaleCurve(Curve):
         self.node.local_transform.scale.y = value[1]
         self.node.local_transform.scale.z = value[2]
 
-    def apply_lerp(self, low, high, ratio):
-        assert len(low) == 3
-        assert len(high) == 3
-        self.node.local_transform.scale.x = lerp(low[0], high[0], ratio)
-        self.node.local_transform.scale.y = lerp(low[1], high[1], ratio)
-        self.node.local_transform.scale.z = lerp(low[2], high[2], ratio)
-
 
 class WeightCurve(Curve):
-    def __init__(self, node: Node, count: int) -> None:
-        super().__init__(node, 1, count)
-
     @property
     def target(self) -> str:
         return 'weight'
 
     def apply(self, value: List[float]):
-        assert len(value) == 1
+        assert len(value) == self.element_count
         # TODO:
 
-    def apply_lerp(self, low, high, ratio):
-        assert len(low) == 1
-        assert len(high) == 1
-        # TODO:
+
+class ChannelPack:
+    '''
+    TRS curves of an animation packed into contiguous arrays.
+
+    evaluates all channels at once and writes the results to the pose array
+    (see pose.py) with a single scatter.
+
+    curves that share the same key times (samplers that use the same input
+    accessor) share one time track, so the segment search runs per track.
+    '''
+
+    def __init__(self, curves: List[Curve]) -> None:
+        curves = [curve for curve in curves if curve.target != 'weight']
+
+        # unique time tracks
+        tracks: Dict[bytes, int] = {}
+        track_times: List[np.ndarray] = []
+        track = []
+        for curve in curves:
+            times = curve.times
+            key = times.tobytes()
+            index = tracks.get(key)
+            if index is None:
+                index = len(track_times)
+                tracks[key] = index
+                track_times.append(times)
+            track.append(index)
+        # curve -> track
+        self.track = np.array(track, dtype=np.int64)
+        self.track_counts = np.array([len(times)
+                                     for times in track_times], dtype=np.int64)
+        self.track_offsets = np.zeros(len(track_times), dtype=np.int64)
+        self.track_offsets[1:] = np.cumsum(self.track_counts)[:-1]
+        self.track_last = self.track_offsets + \
+            np.maximum(self.track_counts - 1, 0)
+        self.times = np.concatenate(track_times).astype(
+            np.float32) if track_times else np.zeros(0, dtype=np.float32)
+
+        # vec3 and vec4 values padded to 4
+        counts = np.array([len(curve.times)
+                          for curve in curves], dtype=np.int64)
+        self.value_offsets = np.zeros(len(curves), dtype=np.int64)
+        self.value_offsets[1:] = np.cumsum(counts)[:-1]
+        self.values = np.zeros((int(counts.sum()), 4), dtype=np.float32)
+        for curve, offset, count in zip(curves, self.value_offsets, counts):
+            self.values[offset:offset+count, :curve.element_count] = curve.values
+
+        # interpolation of each curve, grouped once
+        self.kernel = interpolation.Kernel(
+            [curve.interpolation for curve in curves],
+            [curve.is_rotation for curve in curves])
+        self.in_tangents: Optional[np.ndarray] = None
+        self.out_tangents: Optional[np.ndarray] = None
+        if self.kernel.has_cubic:
+            self.in_tangents = np.zeros_like(self.values)
+            self.out_tangents = np.zeros_like(self.values)
+            for curve, offset, count in zip(curves, self.value_offsets, counts):
+                if curve.interpolation == GltfAnimationInterpolation.Cubicspline:
+                    self.in_tangents[offset:offset+count,
+                                     :curve.element_count] = curve.in_tangents
+                    self.out_tangents[offset:offset+count,
+                                      :curve.element_count] = curve.out_tangents
+
+        # scatter from values (C, 4) to pose (N, 10)
+        src = []
+        dst = []
+        for i, curve in enumerate(curves):
+            column = {
+                'target': TRANSLATION,
+                'rotation': ROTATION,
+                'scale': SCALE,
+            }[curve.target]
+            for j in range(curve.element_count):
+                src.append(i * 4 + j)
+                dst.append(curve.node_index * STRIDE + column + j)
+        self.src = np.array(src, dtype=np.int64)
+        self.dst = np.array(dst, dtype=np.int64)
+
+        # binary search steps for the longest track
+        self.steps = int(self.track_counts.max(initial=1)).bit_length()
+        # last found segment of each track
+        self.cursor = self.track_offsets.copy()
+        # evaluate buffers
+        self._low = np.zeros((len(curves), 4), dtype=np.float32)
+        self._high = np.zeros((len(curves), 4), dtype=np.float32)
+        self._out = np.zeros((len(curves), 4), dtype=np.float32)
+
+    def find_segments(self, time: float) -> np.ndarray:
+        '''
+        return index array that times[i] <= time < times[i+1] for each track.
+        out of range is clamped to the first or the last segment.
+        '''
+        # cursor hit
+        lo = self.cursor
+        hi = np.minimum(lo + 1, self.track_last)
+        if np.all(((self.times[lo] <= time) | (lo == self.track_offsets))
+                  & ((time < self.times[hi]) | (hi == self.track_last))):
+            return lo
+
+        # vectorized binary search.
+        # keep times[lo] <= time < times[hi] for all tracks
+        lo = self.track_offsets.copy()
+        hi = self.track_last.copy()
+        for _ in range(self.steps):
+            mid = (lo + hi) >> 1
+            go = self.times[mid] <= time
+            lo = np.where(go, mid, lo)
+            hi = np.where(go, hi, mid)
+        self.cursor = lo
+        return lo
+
+    def evaluate(self, time: float) -> np.ndarray:
+        '''
+        return (curve count, 4) values at time.
+        the result is a buffer reused by the next evaluate.
+        '''
+        lo = self.find_segments(time)
+        hi = np.minimum(lo + 1, self.track_last)
+        l = self.times[lo]
+        d = self.times[hi] - l
+        ratio = np.divide(time - l, d, out=np.zeros_like(d), where=d > 0)
+        np.clip(ratio, 0, 1, out=ratio)
+
+        # track to curve
+        lo = self.value_offsets + (lo - self.track_offsets)[self.track]
+        hi = self.value_offsets + (hi - self.track_offsets)[self.track]
+        low = np.take(self.values, lo, axis=0, out=self._low)
+        high = np.take(self.values, hi, axis=0, out=self._high)
+        if self.kernel.has_cubic:
+            assert self.in_tangents is not None and self.out_tangents is not None
+            return self.kernel(self._out, low, high, ratio[self.track], d[self.track],
+                               self.out_tangents[lo], self.in_tangents[hi])
+        else:
+            return self.kernel(self._out, low, high, ratio[self.track], d[self.track])
+
+    def apply(self, pose: np.ndarray, time: float):
+        if len(self.src) == 0:
+            return
+        values = self.evaluate(time)
+        np.put(pose, self.dst, np.take(values, self.src))
 
 
 class Animation:
@@ -153,51 +330,72 @@ class Animation:
         self.name = name
         self.curves: List[Curve] = []
         self.last_time = 0
+        # build on first set_time
+        self.pack: Optional[ChannelPack] = None
 
     def add_curve(self, curve: Curve):
         self.curves.append(curve)
+        self.pack = None
 
         curve_time = curve.times[-1]
         if curve_time > self.last_time:
             self.last_time = curve_time
 
-    def set_time(self, time: float):
-        for curve in self.curves:
-            curve.set_time(time)
+    @property
+    def node_indices(self) -> Set[int]:
+        '''
+        nodes that local TRS is animated
+        '''
+        return {curve.node_index for curve in self.curves if curve.target != 'weight'}
+
+    def set_time(self, time: float, pose: np.ndarray):
+        if not self.pack:
+            self.pack = ChannelPack(self.curves)
+        self.pack.apply(pose, time)
 
     @staticmethod
     def from_gltf(src: GltfAnimation, nodes: List[Node]) -> 'Animation':
         animation = Animation(src.name)
         for ch in src.channels:
             node = ch.target.node_index
-            curve = None
             sampler = src.samplers[ch.sampler]
+
+            # views of the buffer. no copy
+            times = as_float_array(sampler.input).reshape(-1)
+            values = as_float_array(sampler.output).reshape(
+                len(times), -1)
+            in_tangents = None
+            out_tangents = None
+            match sampler.interpolation:
+                case GltfAnimationInterpolation.Cubicspline:
+                    # in-tangent, value, out-tangent
+                    keys = values.reshape(len(times), 3, -1)
+                    in_tangents = keys[:, 0]
+                    values = keys[:, 1]
+                    out_tangents = keys[:, 2]
+                case GltfAnimationInterpolation.Linear | GltfAnimationInterpolation.Step:
+                    pass
+                case _:
+                    raise NotImplementedError()
+
             match ch.target.path:
                 case GltfAnimationTargetPath.Translation:
                     curve = TranslationCurve(
-                        nodes[node.index], sampler.input.get_count())
-                    animation.add_curve(curve)
+                        node.index, nodes[node.index], times, values,
+                        sampler.interpolation, in_tangents, out_tangents)
                 case GltfAnimationTargetPath.Rotation:
                     curve = RotationCurve(
-                        nodes[node.index], sampler.input.get_count())
-                    animation.add_curve(curve)
+                        node.index, nodes[node.index], times, values,
+                        sampler.interpolation, in_tangents, out_tangents)
                 case GltfAnimationTargetPath.Scale:
                     curve = ScaleCurve(
-                        nodes[node.index], sampler.input.get_count())
-                    animation.add_curve(curve)
+                        node.index, nodes[node.index], times, values,
+                        sampler.interpolation, in_tangents, out_tangents)
                 case GltfAnimationTargetPath.Weights:
+                    # morph target weights. count x target count
                     curve = WeightCurve(
-                        nodes[node.index], sampler.input.get_count())
-                    animation.add_curve(curve)
-                case _:
-                    raise NotImplementedError()
-
-            match sampler.interpolation:
-                case GltfAnimationInterpolation.Linear:
-                    for i, (time, value) in enumerate(zip(sampler.input, sampler.output)):
-                        # time: (ctypes.c_float * 1)
-                        # value: (ctypes.c_float * N)
-                        curve.set_key(i, time[0], value)  # type: ignore
+                        node.index, nodes[node.index], times, values,
+                        sampler.interpolation, in_tangents, out_tangents)
                 case _:
                     raise NotImplementedError()
             animation.add_curve(curve)
@@ -1,5 +1,10 @@
 in vec3 aPosition;
 
+#ifdef INSTANCED
+// row vector world matrix of the instance
+layout(location = 4) in mat4 aInstance;
+#endif
+
 #ifdef HAS_UV
 in vec2 aUV;
 out vec2 vUV;
@@ -9,7 +14,11 @@ uniform mediump mat4 m;
 uniform mediump mat4 vp;
 
 void main() {
+#ifdef INSTANCED
+  gl_Position = (aInstance * vec4(aPosition, 1)) * vp;
+#else
   gl_Position = vec4(aPosition, 1) * m * vp;
+#endif
 #ifdef HAS_UV
   vUV = aUV;
 #endif
@@ -0,0 +1,189 @@
+'''
+animations resampled to fixed-rate pose tables.
+
+a baked animation is one (frame count, channel count) float32 array.
+each column is one animated float of the pose (see pose.py).
+sampling is an index and a lerp of two rows, no keyframe search.
+
+BakeCache bakes in a background thread and keeps baked tables
+under a memory budget. least recently used tables are dropped first.
+'''
+from typing import Dict, Optional, Set
+import math
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+import numpy as np
+from gltfio.types import GltfAnimationInterpolation
+from .animation import Animation, ChannelPack
+from .pose import STRIDE, ROTATION
+from . import interpolation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FPS = 30
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+class BakedAnimation:
+    def __init__(self, animation: Animation, fps: int) -> None:
+        assert fps > 0
+        self.name = animation.name
+        self.fps = fps
+        self.last_time = float(animation.last_time)
+        # own pack. not shared with the render thread
+        pack = ChannelPack(animation.curves)
+        self.dst = pack.dst
+
+        # quaternion columns. (Q, 4)
+        column = pack.dst % STRIDE
+        rotation = np.flatnonzero(
+            (column >= ROTATION) & (column < ROTATION + 4))
+        self.rotations = rotation.reshape(-1, 4)
+
+        # STEP columns are not lerped
+        self.lerp = np.ones(len(pack.src), dtype=np.float32)
+        for group in pack.kernel.groups:
+            if group.mode == GltfAnimationInterpolation.Step:
+                self.lerp[np.isin(pack.src // 4, group.indices)] = 0
+
+        frames = int(math.ceil(self.last_time * fps)) + 1
+        # time of each row. the last row is at last_time, may be off the frame grid
+        self.times = np.minimum(np.arange(frames) / fps, self.last_time)
+        self.table = np.empty((frames, len(pack.src)), dtype=np.float32)
+        self._out = np.zeros(len(pack.src), dtype=np.float32)
+        if len(pack.src) == 0:
+            return
+        for i in range(frames):
+            values = pack.evaluate(float(self.times[i]))
+            np.take(values, pack.src, out=self.table[i])
+        # keep neighbor quaternions in the same hemisphere for lerp
+        if len(self.rotations):
+            q = self.table[:, self.rotations]
+            d = np.einsum('fij,fij->fi', q[1:], q[:-1])
+            sign = np.cumprod(np.where(d < 0, -1, 1), axis=0)
+            q[1:] *= sign[:, :, None]
+            self.table[:, self.rotations] = q
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.table)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def sample(self, time: float) -> np.ndarray:
+        '''
+        return the pose values at time. a buffer reused by the next sample.
+        '''
+        time = min(max(time, 0), self.last_time)
+        lo = min(int(time * self.fps), self.frame_count - 1)
+        hi = min(lo + 1, self.frame_count - 1)
+        t_lo = self.times[lo]
+        t_hi = self.times[hi]
+        ratio = self.lerp * \
+            ((time - t_lo) / (t_hi - t_lo) if t_hi > t_lo else 0)
+        low = self.table[lo]
+        out = self._out
+        np.subtract(self.table[hi], low, out=out)
+        out *= ratio
+        out += low
+        if len(self.rotations):
+            out[self.rotations] = interpolation.normalize(
+                out[self.rotations])
+        return out
+
+    def set_time(self, time: float, pose: np.ndarray):
+        if len(self.dst) == 0:
+            return
+        np.put(pose, self.dst, self.sample(time))
+
+
+class BakeCache:
+    '''
+    bake animations in a background thread.
+    get returns None until the animation is baked.
+
+    get does not bake an evicted animation again. set_time gets every
+    animation each frame, so tables over the budget would be baked and
+    evicted in a loop. request bakes it again explicitly.
+    '''
+
+    def __init__(self, fps: int = DEFAULT_FPS, budget: int = DEFAULT_BUDGET) -> None:
+        self.fps = fps
+        self.budget = budget
+        self.lock = threading.Lock()
+        # least recently used first
+        self.baked: OrderedDict[Animation, BakedAnimation] = OrderedDict()
+        self.pending: Dict[Animation, Future] = {}
+        # failed or over budget. not retried
+        self.skipped: Set[Animation] = set()
+        # dropped for the budget. baked again only by request
+        self.evicted: Set[Animation] = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='bake')
+
+    @property
+    def nbytes(self) -> int:
+        with self.lock:
+            return sum(baked.nbytes for baked in self.baked.values())
+
+    def request(self, animation: Animation) -> Optional[Future]:
+        '''
+        start baking if not baked yet
+        '''
+        with self.lock:
+            if animation in self.baked or animation in self.skipped:
+                return None
+            self.evicted.discard(animation)
+            future = self.pending.get(animation)
+            if not future:
+                future = self.executor.submit(self._bake, animation)
+                self.pending[animation] = future
+            return future
+
+    def get(self, animation: Animation) -> Optional[BakedAnimation]:
+        with self.lock:
+            baked = self.baked.get(animation)
+            if baked:
+                self.baked.move_to_end(animation)
+                return baked
+            if animation in self.evicted:
+                return None
+        # not requested yet
+        self.request(animation)
+        return None
+
+    def _bake(self, animation: Animation) -> Optional[BakedAnimation]:
+        try:
+            baked = BakedAnimation(animation, self.fps)
+        except Exception as e:
+            logger.exception(e)
+            with self.lock:
+                self.pending.pop(animation, None)
+                self.skipped.add(animation)
+            return None
+
+        with self.lock:
+            self.pending.pop(animation, None)
+            if baked.nbytes > self.budget:
+                logger.warning(
+                    f'{animation.name}: {baked.nbytes} bytes over bake budget')
+                self.skipped.add(animation)
+                return None
+            self.baked[animation] = baked
+            total = sum(item.nbytes for item in self.baked.values())
+            while total > self.budget:
+                evicted_animation, evicted = self.baked.popitem(last=False)
+                self.evicted.add(evicted_animation)
+                total -= evicted.nbytes
+        return baked
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            self.baked.clear()
+            self.pending.clear()
+            self.skipped.clear()
@@ -0,0 +1,102 @@
+'''
+merge static primitives into fewer draw calls. numpy only, no GL.
+
+* interleave: the attributes of a primitive into one (V, stride) float32 array
+* merge: primitives of the same layout into one vertex and index buffer.
+  indices are rebased by the vertex offset of each primitive.
+
+positions are transformed to the world space before merging,
+so a merged primitive is drawn with the identity matrix.
+'''
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# uint16 indices if the vertex count fits
+UINT16_LIMIT = 65536
+
+
+class BatchItem(NamedTuple):
+    # primitives of the same key are merged. (material, layout)
+    key: Any
+    # (V, stride) float32. interleaved
+    vertices: np.ndarray
+    # (I,) or None for the non indexed primitive
+    indices: Optional[np.ndarray]
+
+
+class Batch(NamedTuple):
+    key: Any
+    vertices: np.ndarray
+    indices: np.ndarray
+    # index of the merged items
+    items: List[int]
+    # first index of each item in indices
+    index_offsets: np.ndarray
+
+
+def interleave(attributes: Sequence[np.ndarray]) -> Tuple[np.ndarray, List[int]]:
+    '''
+    attributes: (V, n) each
+
+    return (V, stride) float32 and the byte offset of each attribute
+    '''
+    count = len(attributes[0])
+    widths = [attribute.shape[1] for attribute in attributes]
+    vertices = np.empty((count, sum(widths)), dtype=np.float32)
+    offsets = []
+    column = 0
+    for attribute, width in zip(attributes, widths):
+        assert len(attribute) == count
+        vertices[:, column:column+width] = attribute
+        offsets.append(column * 4)
+        column += width
+    return vertices, offsets
+
+
+def transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    '''
+    (V, 3) points x (4, 4) row vector matrix
+    '''
+    return points @ matrix[:3, :3] + matrix[3, :3]
+
+
+def index_dtype(vertex_count: int) -> type:
+    return np.uint16 if vertex_count <= UINT16_LIMIT else np.uint32
+
+
+def merge(items: Sequence[BatchItem]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    return vertices, rebased indices and the first index of each item
+    '''
+    vertex_counts = np.array([len(item.vertices) for item in items], dtype=np.int64)
+    vertex_offsets = np.concatenate(([0], np.cumsum(vertex_counts)[:-1]))
+    vertices = np.concatenate([item.vertices for item in items])
+
+    dtype = index_dtype(len(vertices))
+    index_list = []
+    for item, offset, count in zip(items, vertex_offsets, vertex_counts):
+        if item.indices is None:
+            indices = np.arange(count, dtype=np.int64)
+        else:
+            indices = item.indices.astype(np.int64)
+        index_list.append((indices + offset).astype(dtype))
+    index_counts = [len(indices) for indices in index_list]
+    index_offsets = np.concatenate(([0], np.cumsum(index_counts)[:-1]))
+    return vertices, np.concatenate(index_list), index_offsets
+
+
+def group(items: Sequence[BatchItem], min_count: int = 2) -> List[Batch]:
+    '''
+    merge items by the key. the groups smaller than min_count are not merged
+    '''
+    groups: Dict[Any, List[int]] = {}
+    for i, item in enumerate(items):
+        groups.setdefault(item.key, []).append(i)
+
+    batches = []
+    for key, indices in groups.items():
+        if len(indices) < min_count:
+            continue
+        vertices, merged, index_offsets = merge([items[i] for i in indices])
+        batches.append(Batch(key, vertices, merged, indices, index_offsets))
+    return batches
@@ -0,0 +1,62 @@
+'''
+load benchmark without a window.
+
+python -m gltfloupe bench [--format json|csv] [--frames N] [--output path] files...
+
+times gltfio.parse_path, each phase of GltfLoader.load and
+GltfLoader.set_time over N frames of the first animation.
+GL objects are created on the first draw, so no GL context is required.
+'''
+from typing import List
+import sys
+import argparse
+import pathlib
+import logging
+from .profiling import PhaseTimer, Timing, write_json, write_csv
+
+logger = logging.getLogger(__name__)
+
+
+def bench_file(path: pathlib.Path, frames: int) -> List[Timing]:
+    import gltfio
+    from .gltf_loader import GltfLoader
+
+    timer = PhaseTimer(str(path))
+    timer('parse')
+    data = gltfio.parse_path(path)
+    loader = GltfLoader(data)
+    loader.load(progress=timer)
+    timer.stop()
+
+    if loader.animations and frames > 0:
+        last_time = loader.animations[0].last_time
+        times = [last_time * i / frames for i in range(frames)]
+        with timer.measure('set_time', frames):
+            for time in times:
+                loader.set_time(time)
+
+    return timer.records
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog='gltfloupe bench')
+    parser.add_argument('files', nargs='+', type=pathlib.Path)
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--frames', type=int, default=100,
+                        help='set_time count')
+    parser.add_argument('--output', type=pathlib.Path)
+    args = parser.parse_args(argv)
+
+    records: List[Timing] = []
+    for path in args.files:
+        try:
+            records += bench_file(path, args.frames)
+        except Exception as e:
+            logger.exception(e)
+
+    write = write_json if args.format == 'json' else write_csv
+    if args.output:
+        with args.output.open('w', newline='') as w:
+            write(records, w)
+    else:
+        write(records, sys.stdout)
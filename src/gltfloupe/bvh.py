@@ -0,0 +1,211 @@
+'''
+bounding volume hierarchy over AABBs, frustum culling and ray queries. numpy only.
+
+the tree is built once with median splits and refit when the item boxes move.
+nodes are flat arrays. children of a node are after the node,
+so the refit goes from the last node to the first by depth.
+
+matrices are the row vector layout same as scene_graph.py.
+'''
+from typing import List, Tuple
+import numpy as np
+
+LEAF_SIZE = 4
+
+
+def transform_aabbs(mins: np.ndarray, maxs: np.ndarray, matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    (N, 3) local boxes x (N, 4, 4) matrices => (N, 3) world boxes
+    '''
+    center = (mins + maxs) * 0.5
+    extent = (maxs - mins) * 0.5
+    rotation = matrices[:, :3, :3]
+    world_center = np.einsum('ni,nij->nj', center, rotation) + matrices[:, 3, :3]
+    world_extent = np.einsum('ni,nij->nj', extent, np.abs(rotation))
+    return world_center - world_extent, world_center + world_extent
+
+
+def frustum_planes(view_projection: np.ndarray) -> np.ndarray:
+    '''
+    (6, 4) planes (nx, ny, nz, d) of the OpenGL clip space. normals are inside
+
+    clip = (x, y, z, 1) x view_projection
+    '''
+    m = view_projection
+    w = m[:, 3]
+    return np.stack([w + m[:, 0], w - m[:, 0],
+                     w + m[:, 1], w - m[:, 1],
+                     w + m[:, 2], w - m[:, 2]])
+
+
+def intersects_frustum(mins: np.ndarray, maxs: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    '''
+    (N,) bool. False if the box is outside of a plane.
+    conservative. a box near a corner of the frustum may be True
+    '''
+    normals = planes[:, :3]
+    # the corner farthest along each normal. (N, 6, 3)
+    corners = np.where(normals[None] > 0, maxs[:, None], mins[:, None])
+    distances = np.einsum('npi,pi->np', corners, normals) + planes[:, 3]
+    return (distances >= 0).all(axis=1)
+
+
+def intersect_ray(origin: np.ndarray, direction: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    '''
+    (N,) entry distance of the ray. inf if not hit. 0 if the origin is inside
+
+    slab test. the distance is in the unit of direction
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1 / direction
+        t0 = (mins - origin) * inverse
+        t1 = (maxs - origin) * inverse
+    # fmin and fmax ignore nan. 0 * inf on a slab boundary
+    near = np.maximum(np.fmin(t0, t1).max(axis=1), 0)
+    far = np.fmax(t0, t1).min(axis=1)
+    return np.where(near <= far, near, np.inf)
+
+
+class BVH:
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray, leaf_size: int = LEAF_SIZE) -> None:
+        count = len(mins)
+        # item indices. a leaf has items[start:start+count]
+        self.items = np.arange(count, dtype=np.int64)
+        starts: List[int] = []
+        counts: List[int] = []
+        lefts: List[int] = []
+        rights: List[int] = []
+        depths: List[int] = []
+
+        centers = (mins + maxs) * 0.5
+
+        def new_node(start: int, n: int, depth: int) -> int:
+            starts.append(start)
+            counts.append(n)
+            lefts.append(-1)
+            rights.append(-1)
+            depths.append(depth)
+            return len(starts) - 1
+
+        # without recursion
+        stack = [new_node(0, count, 0)] if count else []
+        while stack:
+            node = stack.pop()
+            start = starts[node]
+            n = counts[node]
+            if n <= leaf_size:
+                continue
+            items = self.items[start:start+n]
+            c = centers[items]
+            axis = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+            half = n // 2
+            order = np.argpartition(c[:, axis], half)
+            self.items[start:start+n] = items[order]
+            left = new_node(start, half, depths[node] + 1)
+            right = new_node(start + half, n - half, depths[node] + 1)
+            lefts[node] = left
+            rights[node] = right
+            # internal node has no items
+            counts[node] = 0
+            stack.append(left)
+            stack.append(right)
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.lefts = np.array(lefts, dtype=np.int64)
+        self.rights = np.array(rights, dtype=np.int64)
+        depth_array = np.array(depths, dtype=np.int64)
+        # by start for reduceat. the leaves cover all items
+        leaves = np.flatnonzero(self.lefts < 0)
+        self.leaves = leaves[np.argsort(self.starts[leaves])]
+        # internal nodes by depth
+        internal = self.lefts >= 0
+        self.levels = [np.flatnonzero(internal & (depth_array == depth))
+                       for depth in range(depth_array.max() + 1)] if len(depths) else []
+        self.node_mins = np.zeros((len(starts), 3), dtype=np.float32)
+        self.node_maxs = np.zeros((len(starts), 3), dtype=np.float32)
+        self.item_mins = np.zeros((count, 3), dtype=np.float32)
+        self.item_maxs = np.zeros((count, 3), dtype=np.float32)
+        self.refit(mins, maxs)
+
+    def __len__(self) -> int:
+        return len(self.item_mins)
+
+    def refit(self, mins: np.ndarray, maxs: np.ndarray):
+        '''
+        update the boxes. the tree topology is kept
+        '''
+        self.item_mins[:] = mins
+        self.item_maxs[:] = maxs
+        if not len(self.leaves):
+            return
+        leaf_starts = self.starts[self.leaves]
+        sorted_mins = self.item_mins[self.items]
+        sorted_maxs = self.item_maxs[self.items]
+        self.node_mins[self.leaves] = np.minimum.reduceat(
+            sorted_mins, leaf_starts)
+        self.node_maxs[self.leaves] = np.maximum.reduceat(
+            sorted_maxs, leaf_starts)
+        for nodes in reversed(self.levels):
+            left = self.lefts[nodes]
+            right = self.rights[nodes]
+            self.node_mins[nodes] = np.minimum(
+                self.node_mins[left], self.node_mins[right])
+            self.node_maxs[nodes] = np.maximum(
+                self.node_maxs[left], self.node_maxs[right])
+
+    def cull(self, planes: np.ndarray) -> np.ndarray:
+        '''
+        sorted item indices that intersect the frustum
+        '''
+        if not len(self.leaves):
+            return np.zeros(0, dtype=np.int64)
+        visible_leaves = []
+        frontier = np.zeros(1, dtype=np.int64)
+        while len(frontier):
+            frontier = frontier[intersects_frustum(
+                self.node_mins[frontier], self.node_maxs[frontier], planes)]
+            is_leaf = self.lefts[frontier] < 0
+            visible_leaves.append(frontier[is_leaf])
+            internal = frontier[~is_leaf]
+            frontier = np.concatenate(
+                [self.lefts[internal], self.rights[internal]])
+
+        items = self.leaf_items(np.concatenate(visible_leaves))
+        items = items[intersects_frustum(
+            self.item_mins[items], self.item_maxs[items], planes)]
+        items.sort()
+        return items
+
+    def leaf_items(self, leaves: np.ndarray) -> np.ndarray:
+        '''
+        item indices of the leaves
+        '''
+        counts = self.counts[leaves]
+        # the position in items of each output
+        first = self.starts[leaves] - (np.cumsum(counts) - counts)
+        return self.items[np.repeat(first, counts) + np.arange(counts.sum())]
+
+    def intersect_ray(self, origin: np.ndarray, direction: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        item indices that the ray hits and the entry distances. nearest first
+        '''
+        if not len(self.leaves):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        hit_leaves = []
+        frontier = np.zeros(1, dtype=np.int64)
+        while len(frontier):
+            frontier = frontier[np.isfinite(intersect_ray(
+                origin, direction, self.node_mins[frontier], self.node_maxs[frontier]))]
+            is_leaf = self.lefts[frontier] < 0
+            hit_leaves.append(frontier[is_leaf])
+            internal = frontier[~is_leaf]
+            frontier = np.concatenate(
+                [self.lefts[internal], self.rights[internal]])
+
+        items = self.leaf_items(np.concatenate(hit_leaves))
+        distances = intersect_ray(
+            origin, direction, self.item_mins[items], self.item_maxs[items])
+        order = np.argsort(distances, kind='stable')
+        order = order[np.isfinite(distances[order])]
+        return items[order], distances[order]
@@ -0,0 +1,100 @@
+'''
+flat scene and frustum culling of the mesh nodes.
+
+FlatScene and CulledScene are the root Node given to the Renderer.
+their children are flat proxies of the mesh nodes.
+a proxy has the world matrix of the node as the local transform,
+so the Renderer draws it without the hierarchy.
+CulledScene draws only the visible proxies.
+'''
+from typing import List, Sequence
+import numpy as np
+from glglue import ctypesmath
+from glglue.scene.node import Node
+from . import bvh
+
+
+def proxy(node: Node) -> Node:
+    '''
+    the local transform is a view of the cached world matrix
+    '''
+    p = Node(node.name, node.world_matrix)
+    p.meshes = node.meshes
+    return p
+
+
+def get_local_aabbs(nodes: Sequence[Node]):
+    '''
+    (N, 3) union of the mesh AABBs of each node
+    '''
+    mins = np.zeros((len(nodes), 3), dtype=np.float32)
+    maxs = np.zeros((len(nodes), 3), dtype=np.float32)
+    for i, node in enumerate(nodes):
+        aabb = ctypesmath.AABB.new_empty()
+        for mesh in node.meshes:
+            aabb = aabb.expand(mesh.aabb)
+        mins[i] = tuple(aabb.min)
+        maxs[i] = tuple(aabb.max)
+    return mins, maxs
+
+
+class FlatScene(Node):
+    def __init__(self, name: str, nodes: List[Node], meshes: list) -> None:
+        '''
+        nodes: mesh nodes
+        meshes: drawn in world space. instanced and batched
+        '''
+        super().__init__(name, ctypesmath.Mat4.new_identity())
+        self.meshes = meshes
+        self.children = [proxy(node) for node in nodes]
+
+
+class CulledScene(Node):
+    def __init__(self, name: str, nodes: List[Node], indices: np.ndarray, world: np.ndarray,
+                 always: List[Node], meshes: list) -> None:
+        '''
+        indices: node index of each culled node
+        world: (N, 4, 4) world matrices of all nodes
+        always: mesh nodes without culling. skinned
+        meshes: drawn in world space. instanced and batched
+        '''
+        super().__init__(name, ctypesmath.Mat4.new_identity())
+        self.meshes = meshes
+        self.indices = indices
+        self.world = world
+        self.proxies = [proxy(nodes[i]) for i in indices]
+        self.always = [proxy(node) for node in always]
+        self.local_mins, self.local_maxs = get_local_aabbs(
+            [nodes[i] for i in indices])
+        self.bvh = bvh.BVH(*bvh.transform_aabbs(
+            self.local_mins, self.local_maxs, world[indices]))
+        self.visible = np.arange(len(indices))
+
+    @property
+    def children(self) -> List[Node]:  # type: ignore
+        return self.always + [self.proxies[i] for i in self.visible]
+
+    @children.setter
+    def children(self, value):
+        # Node.__init__
+        pass
+
+    def refit(self, dynamic: np.ndarray):
+        '''
+        dynamic: bool of each culled node. the world matrix is changed
+        '''
+        items = np.flatnonzero(dynamic)
+        if not len(items):
+            return
+        mins = self.bvh.item_mins.copy()
+        maxs = self.bvh.item_maxs.copy()
+        mins[items], maxs[items] = bvh.transform_aabbs(
+            self.local_mins[items], self.local_maxs[items], self.world[self.indices[items]])
+        self.bvh.refit(mins, maxs)
+
+    def cull(self, view_projection: np.ndarray) -> int:
+        '''
+        view_projection: (4, 4) row vector. return the visible count
+        '''
+        self.visible = self.bvh.cull(bvh.frustum_planes(view_projection))
+        return len(self.visible)
@@ -1,6 +1,8 @@
-from typing import List, Union
+from typing import List, Union, Dict, NamedTuple, Callable, Tuple, Set
 import logging
 import pkgutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 from OpenGL import GL
 from gltfio.types import *
 from gltfio.parser import GltfData
@@ -8,10 +10,22 @@ import glglue.gl3.vbo
 from glglue import ctypesmath
 from glglue.scene.texture import Image32, Texture
 from glglue.scene.material import Material
-from glglue.scene.mesh import Mesh
+from glglue.scene.mesh import Mesh, Submesh
 from glglue.scene.node import Node
-from glglue.scene.vertices import VectorView, Planar
-from .animation import Animation
+from glglue.scene.vertices import VectorView, Planar, Interleaved
+from glglue.gl3.renderer import Renderer
+from .animation import Animation, as_float_array
+from .skinning import SkinJoints, SkinnedPrimitive, as_joint_array, as_weight_array, UNSIGNED
+from . import pose
+from .scene_graph import SceneGraph, get_parents
+from . import bake
+from . import image_cache
+from . import batching
+from . import instancing
+from .instancing import InstanceGroup, InstancedDrawable
+from .culling import CulledScene, FlatScene
+from .picking import Picker
+from .image_cache import ImageCache, LazyTexture
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +40,9 @@ def get_shader(name: str) -> str:
 VS = get_shader('gltf.vs')
 FS = get_shader('gltf.fs')
 
+# white 1x1 until the image is decoded
+PLACEHOLDER = Image32(b'\xff\xff\xff\xff', 1, 1)
+
 
 MAP = {
     'B': ctypes.c_uint8,
@@ -36,6 +53,12 @@ MAP = {
 }
 
 
+INDEX_TYPES = {
+    'H': ctypes.c_uint16,
+    'I': ctypes.c_uint32,
+}
+
+
 def get_vectorview(src: GltfAccessorSlice) -> VectorView:
     return VectorView(src.scalar_view, MAP[src.scalar_view.format], src.element_count)
 
@@ -59,28 +82,87 @@ def get_transform(gltf_node: GltfNode) -> Union[ctypesmath.Mat4, ctypesmath.TRS]
     return ctypesmath.TRS(t, r, s)
 
 
+class SkinnedMesh(NamedTuple):
+    node: int
+    skin: int
+    mesh: Mesh
+    primitive: SkinnedPrimitive
+
+
+class InstancedMesh(NamedTuple):
+    group: InstanceGroup
+    # a mesh of each primitive with the INSTANCED macro. drawn by the root
+    meshes: List[Mesh]
+    # an instance is in an animated subtree
+    dynamic: bool
+
+
 class GltfLoader:
     def __init__(self, gltf: GltfData) -> None:
         self.gltf = gltf
         # Corresponds to the index of GltfData
         self.images: List[Image32] = []
+        # lazy images. decoded on the first draw
+        self.image_cache: Optional[ImageCache] = None
         self.textures: List[Texture] = []
+        # texture indices of each image index
+        self.image_textures: Dict[int, List[int]] = {}
         self.materials: List[Material] = []
         self.meshes: List[List[Mesh]] = []
+        # source primitive of each mesh
+        self.primitives: Dict[Mesh, GltfPrimitive] = {}
+        # merged static meshes. drawn by the root
+        self.batches: List[Mesh] = []
+        # meshes referenced by many nodes
+        self.instances: List[InstancedMesh] = []
+        # frustum culling root
+        self.culled: Optional[CulledScene] = None
+        # culled node is in an animated subtree
+        self.culled_dynamic = np.zeros(0, dtype=bool)
+        # CPU ray picking
+        self.picker: Optional[Picker] = None
+        self.picker_dynamic = np.zeros(0, dtype=bool)
+        self.skins: List[SkinJoints] = []
+        # CPU skinning
+        self.skinned_primitives: Dict[Mesh, SkinnedPrimitive] = {}
+        self.skinned: List[SkinnedMesh] = []
+        self.skinning_updated = False
         self.nodes: List[Node] = []
+        # local TRS of nodes. Node.local_transform is a view of the row
+        self.pose = pose.new_pose(len(gltf.nodes))
+        # world matrices of nodes. Node.world_matrix is a view of the row
+        self.graph = SceneGraph(get_parents(
+            [[child.index for child in node.children] for node in gltf.nodes]))
         self.root: Optional[Node] = None
+        # nodes reachable from the scene roots. by level
+        self.scene_nodes: Optional[np.ndarray] = None
         # animation
         self.animations: List[Animation] = []
-        self.time = 0.0
+        # None is not evaluated yet
+        self.time: Optional[float] = None
+        # animated nodes and descendants by level. updated in set_time
+        self.dirty_levels: Optional[List[np.ndarray]] = None
+        # fixed-rate pose tables. None is off
+        self.bake: Optional[bake.BakeCache] = None
 
-    def _load_image(self, src: GltfImage):
-        image = Image32.load(src.data)
-        self.images.append(image)
+    def _load_image(self, index: int, image: Image32):
+        self.images[index] = image
+        # textures are already bound to materials
+        for texture_index in self.image_textures.get(index, []):
+            self.textures[texture_index].image = image
 
     def _load_texture(self, src: GltfTexture):
-        texture = Texture(src.name, self.images[src.image.index])
+        if self.image_cache:
+            texture = LazyTexture(src.name, self.image_cache, src.image.index)
+        else:
+            texture = Texture(src.name, self.images[src.image.index])
         self.textures.append(texture)
 
+    def get_image(self, index: int) -> Image32:
+        if self.image_cache:
+            return self.image_cache.get(index)
+        return self.images[index]
+
     def _load_material(self, src: GltfMaterial):
         material = Material(src.name, VS, FS)
         if src.base_color_texture:
@@ -89,8 +171,15 @@ class GltfLoader:
 
     def _load_mesh(self, name: str, src: GltfPrimitive):
         macro = ['#version 330']
-        attributes: List[glglue.gl3.vbo.VectorView] = [
-            get_vectorview(src.position)]
+        skinned = None
+        if src.joints and src.weights:
+            # the vertex buffer is the skinned positions
+            skinned = SkinnedPrimitive(as_float_array(src.position), as_joint_array(
+                src.joints), as_weight_array(src.weights))
+            attributes: List[glglue.gl3.vbo.VectorView] = [
+                VectorView(memoryview(skinned.positions), ctypes.c_float, 3)]
+        else:
+            attributes = [get_vectorview(src.position)]
         # if prim.normal:
         #     attributes.append(glglue.gl3.vbo.TypedBytes(*prim.normal))
         #     macro += f'#define HAS_NORMAL 1\n'
@@ -107,58 +196,407 @@ class GltfLoader:
         mesh.add_submesh(
             self.materials[src.material.index], macro, GL.GL_TRIANGLES)
         self.meshes[-1].append(mesh)
+        self.primitives[mesh] = src
+        if skinned:
+            self.skinned_primitives[mesh] = skinned
+
+    def _load_skin(self, src: GltfSkin):
+        inverse_bind_matrices = None
+        if src.inverse_bind_matrices:
+            inverse_bind_matrices = as_float_array(src.inverse_bind_matrices)
+        self.skins.append(SkinJoints(
+            [joint.index for joint in src.joints], inverse_bind_matrices))
 
     def _load_node(self, src: GltfNode):
         t = get_transform(src)
+        if isinstance(t, ctypesmath.TRS):
+            t = pose.bind_trs(self.pose, src.index, t)
+            self.graph.set_trs(src.index)
+        else:
+            self.graph.set_matrix(src.index, src.matrix)
         node = Node(src.name, t)
+        node.world_matrix = ctypesmath.Mat4.from_buffer(
+            self.graph.world, self.graph.world.strides[0] * src.index)
         self.nodes.append(node)
         if src.mesh:
             for i, _ in enumerate(src.mesh.primitives):
                 mesh = self.meshes[src.mesh.index][i]
                 node.meshes.append(mesh)
+                skinned = self.skinned_primitives.get(mesh)
+                if src.skin and skinned:
+                    if any(x.mesh == mesh for x in self.skinned):
+                        logger.warning(
+                            f'{mesh.name}: skinned by multiple nodes')
+                        continue
+                    self.skinned.append(SkinnedMesh(
+                        src.index, src.skin.index, mesh, skinned))
 
     def _build_node_hierarchy(self, src: List[GltfNode], dst: Node):
-        for gltf_node in src:
-            node = self.nodes[gltf_node.index]
-            dst.children.append(node)
-            self._build_node_hierarchy(gltf_node.children, node)
+        # no recursion for deep hierarchies
+        for gltf_node, node in zip(self.gltf.nodes, self.nodes):
+            node.children = [self.nodes[child.index]
+                             for child in gltf_node.children]
+        dst.children = [self.nodes[gltf_node.index] for gltf_node in src]
 
     def _load_animation(self, src: GltfAnimation):
         animation = Animation.from_gltf(src, self.nodes)
         self.animations.append(animation)
+        self.dirty_levels = None
+
+    def load(self, image_workers: Optional[int] = None, lazy_images: bool = False,
+             image_budget: int = image_cache.DEFAULT_BUDGET,
+             progress: Optional[Callable[[str], None]] = None) -> Node:
+        '''
+        images are decoded in a thread pool while loading the others.
+        PIL releases the GIL while decoding.
+
+        lazy_images: decode when drawn. keep decoded images under image_budget
+        progress: called with the name of each phase before it starts.
+        raise in it to abort the load
+        '''
+        if not progress:
+            def progress(phase: str):
+                pass
 
-    def load(self) -> Node:
-        for image in self.gltf.images:
-            self._load_image(image)
         for texture in self.gltf.textures:
-            self._load_texture(texture)
-        for material in self.gltf.materials:
-            self._load_material(material)
-        for mesh in self.gltf.meshes:
-            self.meshes.append([])
-            for i, prim in enumerate(mesh.primitives):
-                self._load_mesh(f'{mesh.name}:{i}', prim)
-        for node in self.gltf.nodes:
-            self._load_node(node)
-        for animation in self.gltf.animations:
-            self._load_animation(animation)
-
-        # root
+            self.image_textures.setdefault(
+                texture.image.index, []).append(texture.index)
+
+        with ThreadPoolExecutor(image_workers, thread_name_prefix='image') as executor:
+            futures = {}
+            if lazy_images:
+                self.image_cache = ImageCache(
+                    [image.data for image in self.gltf.images], image_budget)
+            else:
+                futures = {executor.submit(Image32.load, image.data): i
+                           for i, image in enumerate(self.gltf.images)}
+                self.images = [PLACEHOLDER] * len(self.gltf.images)
+
+            try:
+                progress('textures')
+                for texture in self.gltf.textures:
+                    self._load_texture(texture)
+                progress('materials')
+                for material in self.gltf.materials:
+                    self._load_material(material)
+                progress('meshes')
+                for mesh in self.gltf.meshes:
+                    self.meshes.append([])
+                    for i, prim in enumerate(mesh.primitives):
+                        self._load_mesh(f'{mesh.name}:{i}', prim)
+                progress('skins')
+                for skin in self.gltf.skins:
+                    self._load_skin(skin)
+                progress('nodes')
+                for node in self.gltf.nodes:
+                    self._load_node(node)
+                progress('animations')
+                for animation in self.gltf.animations:
+                    self._load_animation(animation)
+
+                progress('images')
+                for future in as_completed(futures):
+                    self._load_image(futures[future], future.result())
+            except Exception:
+                # not wait the rest of images
+                for future in futures:
+                    future.cancel()
+                raise
+
+        progress('hierarchy')
         self.root = Node('__scene__', ctypesmath.Mat4.new_identity())
         self._build_node_hierarchy(self.gltf.scene, self.root)
+        self.graph.update_local(self.pose)
+        self.graph.calc_world()
         return self.root
 
+    def _get_dirty_levels(self) -> List[np.ndarray]:
+        if self.dirty_levels is None:
+            self.dirty_levels = self.graph.get_subtree_levels(set().union(
+                *(animation.node_indices for animation in self.animations)))
+        return self.dirty_levels
+
+    def _get_dynamic_nodes(self) -> Set[int]:
+        levels = self._get_dirty_levels()
+        if not levels:
+            return set()
+        return set(np.concatenate(levels).tolist())
+
+    def _get_scene_nodes(self) -> np.ndarray:
+        if self.scene_nodes is None:
+            levels = self.graph.get_subtree_levels(
+                node.index for node in self.gltf.scene)
+            self.scene_nodes = np.concatenate(
+                levels) if levels else np.zeros(0, dtype=np.int64)
+        return self.scene_nodes
+
+    def get_aabb(self) -> ctypesmath.AABB:
+        '''
+        AABB of the meshes in the scene in world space
+        '''
+        aabb = ctypesmath.AABB.new_empty()
+        for index in self._get_scene_nodes().tolist():
+            node = self.nodes[index]
+            for mesh in node.meshes:
+                aabb = aabb.expand(mesh.aabb.transform(node.world_matrix))
+        for instanced in self.instances:
+            for index in instanced.group.nodes:
+                for mesh in instanced.meshes:
+                    aabb = aabb.expand(mesh.aabb.transform(
+                        self.nodes[index].world_matrix))
+        # in world space
+        for mesh in self.batches:
+            aabb = aabb.expand(mesh.aabb)
+        return aabb
+
+    def instance(self, min_count: int = instancing.INSTANCE_MIN) -> List[InstancedMesh]:
+        '''
+        draw the meshes referenced by min_count or more nodes instanced.
+        the meshes are moved from the nodes to the root.
+        skinned nodes and the nodes out of the scene are excluded. call after load
+        '''
+        assert self.root
+        node_meshes: List[Optional[int]] = [None] * len(self.gltf.nodes)
+        for index in self._get_scene_nodes().tolist():
+            node = self.gltf.nodes[index]
+            if node.mesh and not node.skin:
+                node_meshes[index] = node.mesh.index
+        dynamic = self._get_dynamic_nodes()
+        for mesh_index, nodes in instancing.group_instances(node_meshes, min_count).items():
+            group = InstanceGroup(mesh_index, nodes)
+            group.update(self.graph.world)
+            meshes = []
+            for src in self.meshes[mesh_index]:
+                mesh = Mesh(f'{src.name}:instanced', src.vertices, src.indices)
+                mesh.aabb = src.aabb
+                for submesh in src.submeshes:
+                    mesh.submeshes.append(Submesh(submesh.material, submesh.macro + [instancing.MACRO],
+                                                  submesh.topology, submesh.offset, submesh.draw_count))
+                meshes.append(mesh)
+            for index in nodes:
+                node = self.nodes[index]
+                node.meshes = [
+                    mesh for mesh in node.meshes if mesh not in self.meshes[mesh_index]]
+            self.root.meshes.extend(meshes)
+            self.instances.append(InstancedMesh(
+                group, meshes, not dynamic.isdisjoint(nodes.tolist())))
+        return self.instances
+
+    def batch(self) -> List[Mesh]:
+        '''
+        merge the meshes of static nodes that share a material into one mesh.
+        the merged meshes are moved from the nodes to the root.
+        skinned meshes, the animated subtrees and the nodes out of the scene
+        are not merged.
+        call after load
+        '''
+        assert self.root
+        dynamic = self._get_dynamic_nodes()
+        items: List[batching.BatchItem] = []
+        sources: List[Tuple[Node, Mesh]] = []
+        for index in self._get_scene_nodes().tolist():
+            if index in dynamic:
+                continue
+            node = self.nodes[index]
+            for mesh in node.meshes:
+                src = self.primitives.get(mesh)
+                if not src or mesh in self.skinned_primitives:
+                    continue
+                attributes = [batching.transform_points(
+                    as_float_array(src.position), self.graph.world[index])]
+                if src.uv0:
+                    attributes.append(as_float_array(src.uv0))
+                vertices, _ = batching.interleave(attributes)
+                indices = None
+                if src.indices:
+                    view = src.indices.scalar_view
+                    indices = np.frombuffer(
+                        view.cast('B'), dtype=UNSIGNED[view.format])
+                items.append(batching.BatchItem(
+                    (src.material.index, bool(src.uv0)), vertices, indices))
+                sources.append((node, mesh))
+
+        for batch in batching.group(items):
+            material_index, has_uv = batch.key
+            material = self.materials[material_index]
+            offsets = [0, 12] if has_uv else [0]
+            mesh = Mesh(f'batch:{material.name}', Interleaved(VectorView(
+                memoryview(batch.vertices), ctypes.c_float, batch.vertices.shape[1]), offsets),
+                VectorView(memoryview(batch.indices), INDEX_TYPES[batch.indices.dtype.char]))
+            positions = batch.vertices[:, :3]
+            mesh.aabb = ctypesmath.AABB(ctypesmath.Float3(
+                *positions.min(axis=0).tolist()), ctypesmath.Float3(*positions.max(axis=0).tolist()))
+            macro = ['#version 330']
+            if has_uv:
+                macro.append('#define HAS_UV 1')
+            mesh.add_submesh(material, macro, GL.GL_TRIANGLES)
+            for i in batch.items:
+                node, src_mesh = sources[i]
+                node.meshes.remove(src_mesh)
+            self.root.meshes.append(mesh)
+            self.batches.append(mesh)
+        return self.batches
+
+    def set_bake(self, fps: int, budget: int = bake.DEFAULT_BUDGET):
+        '''
+        bake animations to fps pose tables in background. 0 is off
+        '''
+        if self.bake:
+            if self.bake.fps == fps and self.bake.budget == budget:
+                return
+        elif fps <= 0:
+            return
+
+        if self.bake:
+            self.bake.shutdown()
+            self.bake = None
+        # evaluate again
+        self.time = None
+        if fps > 0:
+            self.bake = bake.BakeCache(fps, budget)
+            for animation in self.animations:
+                self.bake.request(animation)
+
     def set_time(self, time: float):
         if self.time == time:
             return
+        self.time = time
 
         for animation in self.animations:
-            animation.set_time(time)
+            baked = self.bake.get(animation) if self.bake else None
+            if baked:
+                baked.set_time(time, self.pose)
+            else:
+                animation.set_time(time, self.pose)
 
         if self.root:
-            self.root.calc_world()
+            # static nodes keep the cached world
+            levels = self._get_dirty_levels()
+            if levels:
+                self.graph.update_local(self.pose, np.concatenate(levels))
+                self.graph.calc_world(levels)
+                for instanced in self.instances:
+                    if instanced.dynamic:
+                        instanced.group.update(self.graph.world)
+                if self.culled:
+                    self.culled.refit(self.culled_dynamic)
+                if self.picker:
+                    self.picker.refit(self.picker_dynamic)
 
         # update CPU skinning
-        for node in self.nodes:
+        for skinned in self.skinned:
+            matrices = self.skins[skinned.skin].update(
+                self.graph.world, self.graph.world[skinned.node])
+            skinned.primitive.update(matrices)
+        if self.skinned:
+            self.skinning_updated = True
+
+    def upload_skinning(self, renderer: Renderer):
+        '''
+        copy skinned positions to the vertex buffers. call in the GL context
+        '''
+        if not self.skinning_updated:
+            return
+        self.skinning_updated = False
+        for skinned in self.skinned:
+            # None if not drawn yet
+            drawable = renderer.meshes.get(skinned.mesh)
+            if drawable:
+                drawable.vbo_list[0].update(
+                    memoryview(skinned.primitive.positions))
+
+    def flatten(self) -> FlatScene:
+        '''
+        the root that draws the mesh nodes in the scene with the world matrices
+        of the graph. the hierarchy is not traversed in draw.
+        call after load, instance and batch
+        '''
+        assert self.root
+        nodes = [self.nodes[index]
+                 for index in self._get_scene_nodes().tolist() if self.nodes[index].meshes]
+        return FlatScene('__flat__', nodes, self.root.meshes)
+
+    def enable_culling(self) -> CulledScene:
+        '''
+        the root that draws only the mesh nodes in the view frustum.
+        call after load, instance and batch
+        '''
+        assert self.root
+        indices = {id(node): i for i, node in enumerate(self.nodes)}
+        skinned = {skinned.node for skinned in self.skinned}
+        culled: List[int] = []
+        always: List[Node] = []
+        # the nodes in the scene
+        stack = list(reversed(self.root.children))
+        while stack:
+            node = stack.pop()
             if node.meshes:
-                pass
+                index = indices[id(node)]
+                if index in skinned:
+                    # the skinned vertices are out of the mesh AABB
+                    always.append(node)
+                else:
+                    culled.append(index)
+            stack.extend(reversed(node.children))
+        self.culled = CulledScene('__culled__', self.nodes, np.array(culled, dtype=np.int64),
+                                  self.graph.world, always, self.root.meshes)
+        dynamic = self._get_dynamic_nodes()
+        self.culled_dynamic = np.array(
+            [index in dynamic for index in culled], dtype=bool)
+        return self.culled
+
+    def cull(self, view_projection: np.ndarray) -> Optional[int]:
+        '''
+        view_projection: (4, 4) row vector. return the visible node count
+        '''
+        if not self.culled:
+            return None
+        return self.culled.cull(view_projection)
+
+    def enable_picking(self) -> Picker:
+        '''
+        the node boxes for pick. the triangle BVHs are built on the first pick.
+        call after load
+        '''
+        assert self.root
+        indices = {id(node): i for i, node in enumerate(self.nodes)}
+        picked: List[int] = []
+        # the nodes in the scene. batched nodes have no Mesh
+        stack = list(reversed(self.root.children))
+        while stack:
+            node = stack.pop()
+            index = indices.get(id(node))
+            if index is not None and self.gltf.nodes[index].mesh:
+                picked.append(index)
+            stack.extend(reversed(node.children))
+        nodes = np.array(picked, dtype=np.int64)
+        self.picker = Picker(self.gltf, self.graph.world, nodes)
+        dynamic = self._get_dynamic_nodes()
+        self.picker_dynamic = np.array(
+            [index in dynamic for index in picked], dtype=bool)
+        return self.picker
+
+    def pick(self, origin, direction) -> Optional[int]:
+        '''
+        the node index of the nearest triangle on the world space ray.
+        None if not hit or the triangles are not ready. see Picker.is_pending
+        '''
+        if not self.picker:
+            return None
+        hit = self.picker.pick(origin, direction)
+        return hit.node if hit else None
+
+    def upload_instances(self, renderer: Renderer):
+        '''
+        create or update the instance matrix buffers. call in the GL context
+        '''
+        for instanced in self.instances:
+            group = instanced.group
+            for mesh in instanced.meshes:
+                drawable = renderer.meshes.get(mesh)
+                if not drawable:
+                    renderer.meshes[mesh] = InstancedDrawable(  # type: ignore
+                        glglue.gl3.vbo.create(mesh.vertices, mesh.indices), group.matrices)
+                elif group.updated and isinstance(drawable, InstancedDrawable):
+                    drawable.update(group.matrices)
+            group.updated = False
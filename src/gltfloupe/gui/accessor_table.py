@@ -1,10 +1,15 @@
 from typing import Optional
+import ctypes
 from gltfio import GltfData
 from gltfio.types import GltfAccessorSlice
 import pydear.imgui as ImGui
 from ..jsonutil import get_value
+from .. import keypath
+from ..accessor_stats import AccessorStats, THRESHOLD
+from .clipper import table_rows
 
-THRESHOLD = 1e-5
+# table height
+VISIBLE_ROWS = 20
 
 
 def color_32(r, g, b, a):
@@ -12,68 +17,101 @@ def color_32(r, g, b, a):
 
 
 def get_accessor(data: GltfData, keys: tuple) -> Optional[int]:
-    match keys:
-        case ('meshes', mesh_index, 'primitives', prim_index, 'indices'):
+    match keypath.classify(keys).accessor:
+        case 'value':
             return get_value(data.gltf, keys)
-
-        case ('meshes', mesh_index, 'primitives', prim_index, 'attributes', attribute):
-            return get_value(data.gltf, keys)
-
-        case ('skins', skin_index, 'inverseBindMatrices'):
-            return get_value(data.gltf, keys)
-
-        case ('accessors', accessor_index):
-            return accessor_index
+        case 'key':
+            return keys[1]
+    return None
 
 
 class AccessorTable:
-    def __init__(self, keys: tuple, view: GltfAccessorSlice) -> None:
+    def __init__(self, keys: tuple, view: GltfAccessorSlice, stats: Optional[AccessorStats] = None) -> None:
         self.key = keys
         self.view = view
+        self.stats = stats
+        # filter
+        self.only_bad_rows = (ctypes.c_bool * 1)()
+        # current index of stats.bad_rows
+        self.bad_cursor = -1
+        # table row to scroll
+        self.scroll_to: Optional[int] = None
+
+    def _draw_stats(self, stats: AccessorStats):
+        ImGui.TextUnformatted(
+            f'min: {", ".join(f"{x:.3f}" for x in stats.min)}')
+        ImGui.TextUnformatted(
+            f'max: {", ".join(f"{x:.3f}" for x in stats.max)}')
+        if stats.non_finite:
+            ImGui.TextUnformatted(f'NaN/Inf: {stats.non_finite}')
+        if stats.bad_rows is not None:
+            bad_count = len(stats.bad_rows)
+            ImGui.TextUnformatted(f'bad rows: {bad_count}')
+            if bad_count:
+                ImGui.SameLine()
+                if ImGui.Button('next bad row'):
+                    self.bad_cursor = (self.bad_cursor + 1) % bad_count
+                    self.scroll_to = self.bad_cursor if self.only_bad_rows[0] else int(
+                        stats.bad_rows[self.bad_cursor])
+                ImGui.SameLine()
+                ImGui.Checkbox('only bad rows', self.only_bad_rows)
 
     def draw(self):
-        ImGui.TextUnformatted(f'count: {self.view.get_count()}')
+        count = self.view.get_count()
+        ImGui.TextUnformatted(f'count: {count}')
+        rows = None
+        if self.stats:
+            self._draw_stats(self.stats)
+            if self.only_bad_rows[0] and self.stats.bad_rows is not None:
+                rows = self.stats.bad_rows
+        row_count = len(rows) if rows is not None else count
+
         flags = (
             ImGui.ImGuiTableFlags_.BordersV
             | ImGui.ImGuiTableFlags_.BordersOuterH
             | ImGui.ImGuiTableFlags_.Resizable
             | ImGui.ImGuiTableFlags_.RowBg
             | ImGui.ImGuiTableFlags_.NoBordersInBody
+            | ImGui.ImGuiTableFlags_.ScrollY
         )
-        cols = self.view.element_count+1
-        if self.key[-1] == 'WEIGHTS_0':
+        element_count = self.view.element_count
+        sums = self.stats.sums if self.stats else None
+        cols = element_count+1
+        if sums is not None:
             cols += 1
-        if ImGui.BeginTable("jsontree_table", cols, flags):
+        # scroll in the table
+        row_height = ImGui.GetTextLineHeightWithSpacing()
+        height = row_height * (min(row_count, VISIBLE_ROWS) + 2)
+        if ImGui.BeginTable("jsontree_table", cols, flags, (0, height)):
             # header
-            # ImGui.TableSetupScrollFreeze(0, 1); // Make top row always visible
+            ImGui.TableSetupScrollFreeze(0, 1)  # Make top row always visible
             ImGui.TableSetupColumn('index')
-            for i in range(self.view.element_count):
+            for i in range(element_count):
                 ImGui.TableSetupColumn(f'{i}')
-            if self.key[-1] == 'WEIGHTS_0':
+            if sums is not None:
                 ImGui.TableSetupColumn(f'sum')
             ImGui.TableHeadersRow()
 
-            # body
-            # ImGui._ImGuiListClipper clipper;
+            if self.scroll_to is not None:
+                ImGui.SetScrollY(self.scroll_to * row_height)
+                self.scroll_to = None
 
-            it = iter(self.view.scalar_view)
-            i = 0
-            count = self.view.get_count()
-            while i < count:
-                ImGui.TableNextRow()
+            # body. only visible rows
+            values = self.view.scalar_view
+            for row in table_rows(row_count):
+                i = int(rows[row]) if rows is not None else row
                 # index
                 ImGui.TableNextColumn()
                 ImGui.TextUnformatted(f'{i:05}')
                 #
-                total = 0
-                for j in range(self.view.element_count):
+                offset = i * element_count
+                for j in range(element_count):
                     ImGui.TableNextColumn()
-                    value = next(it)
-                    total += value
-                    ImGui.TextUnformatted(f'{value:.3f}')
-                if self.key[-1] == 'WEIGHTS_0':
+                    ImGui.TextUnformatted(f'{values[offset + j]:.3f}')
+                if sums is not None:
                     ImGui.TableNextColumn()
 
+                    total = sums[i]
                     d = total-1
                     if d > THRESHOLD:
                         ImGui.PushStyleColor(
@@ -86,6 +124,5 @@ class AccessorTable:
                             ImGui.ImGuiCol_.Text, color_32(128, 128, 128, 255))
                     ImGui.TextUnformatted(f'{total:.3f}')
                     ImGui.PopStyleColor()
-                i += 1
 
             ImGui.EndTable()
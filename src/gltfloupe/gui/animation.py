@@ -7,9 +7,19 @@ class Playback:
     def __init__(self) -> None:
         self.time = 0.0
         self.pos = (ctypes.c_float * 1)()
+        # scrub with fixed-rate pose tables
+        self.bake = (ctypes.c_bool * 1)()
+        self.fps = (ctypes.c_int * 1)(30)
+
+    @property
+    def bake_fps(self) -> int:
+        return self.fps[0] if self.bake[0] else 0
 
     def draw(self, p_open: ctypes.Array):
         if ImGui.Begin('playback', p_open):
             # ImGui.TextUnformatted(f'{self.pos[0]} / {self.time}')
             ImGui.SliderFloat('pos', self.pos, 0.0, self.time)
+            ImGui.Checkbox('bake', self.bake)
+            ImGui.SameLine()
+            ImGui.SliderInt('fps', self.fps, 1, 120)
         ImGui.End()
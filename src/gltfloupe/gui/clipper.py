@@ -0,0 +1,25 @@
+from typing import Iterator
+import pydear.imgui as ImGui
+from ..listclipper import clip
+
+
+def table_rows(count: int) -> Iterator[int]:
+    '''
+    rows of the current table (with ScrollY) that are in the view.
+    rows out of the view are replaced by spacer rows of the same height.
+    '''
+    row_height = ImGui.GetTextLineHeightWithSpacing()
+    begin, end = clip(count, row_height,
+                      ImGui.GetScrollY(), ImGui.GetWindowHeight())
+    if begin > 0:
+        # keep the RowBg stripe of the first visible row
+        if begin % 2 == 0:
+            ImGui.TableNextRow(0, row_height)
+            ImGui.TableNextRow(0, (begin - 1) * row_height)
+        else:
+            ImGui.TableNextRow(0, begin * row_height)
+    for i in range(begin, end):
+        ImGui.TableNextRow(0, row_height)
+        yield i
+    if end < count:
+        ImGui.TableNextRow(0, (count - end) * row_height)
@@ -1,7 +1,8 @@
-from typing import Optional, Callable
+from typing import Optional, Callable, Tuple
 import pathlib
 import ctypes
 import logging
+import numpy as np
 #
 from glglue.gl3.pydearcontroller import PydearController
 #
@@ -11,10 +12,13 @@ from pydear.utils import filedialog
 #
 from gltfio.parser import GltfData
 from .. import gltf_loader
+from ..load_task import LoadTask, LoadResult
 
 logger = logging.getLogger(__name__)
 
 FILEDIALOG = 'OpenFile'
+# pixels. a longer drag is the camera
+CLICK_DISTANCE = 4
 
 
 class GUI(PydearController):
@@ -32,6 +36,21 @@ class GUI(PydearController):
         # gltf
         self.data: Optional[GltfData] = None
         self.loader: Optional[gltf_loader.GltfLoader] = None
+        # decode images when drawn
+        self.lazy_images = True
+        # draw meshes referenced by many nodes instanced
+        self.instancing = True
+        # merge static meshes by material
+        self.batch = False
+        # draw only the nodes in the view frustum
+        self.culling = True
+        self.visible: Optional[int] = None
+        # select the node by a click in the view
+        self.click: Optional[Tuple[float, float]] = None
+        # retried while the triangle BVHs are built
+        self.pick_ray: Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float]]] = None
+        # loading in background
+        self.task: Optional[LoadTask] = None
 
         self.close_callback: Optional[Callable[[], None]] = None
 
@@ -90,23 +109,58 @@ class GUI(PydearController):
         if ImGui.Button(ICONS_FA.ARROW_RIGHT):
             self.tree.forward()
 
+        if self.task:
+            ImGui.SameLine()
+            ImGui.TextUnformatted(str(self.task))
+        elif self.loader and self.loader.culled and self.visible is not None:
+            ImGui.SameLine()
+            ImGui.TextUnformatted(
+                f'visible: {self.visible}/{len(self.loader.culled.proxies)}')
+
     def menu(self):
         if ImGui.BeginMenu(b"File", True):
             if ImGui.MenuItem("Open"):
                 filedialog.open(FILEDIALOG)
 
+            if ImGui.MenuItem("Lazy images", None, self.lazy_images, True):
+                self.lazy_images = not self.lazy_images
+
+            if ImGui.MenuItem("Instancing", None, self.instancing, True):
+                self.instancing = not self.instancing
+
+            if ImGui.MenuItem("Batch static meshes", None, self.batch, True):
+                self.batch = not self.batch
+
+            if ImGui.MenuItem("Frustum culling", None, self.culling, True):
+                self.culling = not self.culling
+
             if ImGui.MenuItem(b"Quit", None, False, True):
                 if self.close_callback:
                     self.close_callback()
             ImGui.EndMenu()
 
     def imgui_draw(self):
+        if self.task and self.task.done():
+            result = self.task.result()
+            self.task = None
+            if result:
+                self._set_result(result)
+
         # update scene
         if self.loader:
+            self.loader.set_bake(self.playback.bake_fps)
             pos = self.playback.pos[0]
             self.loader.set_time(pos)
+            self.loader.upload_skinning(self.view.scene.renderer)
+            self.loader.upload_instances(self.view.scene.renderer)
+            # the camera of the last frame
+            camera = self.view.camera
+            view_projection = camera.view.matrix * camera.projection.matrix
+            self.visible = self.loader.cull(np.frombuffer(
+                memoryview(view_projection).cast('B'), dtype=np.float32).reshape(4, 4))
 
         show_docks(self.imgui_docks, toolbar=self.toolbar, menu=self.menu)
+        self._pick()
 
         if self.prop.selected:
             self.tree.push(self.prop.selected)
@@ -117,34 +171,58 @@ class GUI(PydearController):
         if openfile:
             self.open(openfile)
 
+    def _pick(self):
+        '''
+        a click without drag in the view selects the node under the mouse
+        '''
+        io = ImGui.GetIO()
+        if self.view.hovered and ImGui.IsMouseClicked(0):
+            self.click = (io.MousePos.x, io.MousePos.y)
+        elif self.click and ImGui.IsMouseReleased(0):
+            x, y = self.click
+            self.click = None
+            if (io.MousePos.x - x) ** 2 + (io.MousePos.y - y) ** 2 < CLICK_DISTANCE ** 2:
+                # the camera keeps the position of the button down
+                ray = self.view.camera.get_mouse_ray()
+                self.pick_ray = (tuple(ray.origin), tuple(ray.dir))
+
+        if self.pick_ray and self.loader:
+            node = self.loader.pick(*self.pick_ray)
+            if not (self.loader.picker and self.loader.picker.is_pending()):
+                self.pick_ray = None
+                if node is not None:
+                    self.tree.push(('nodes', node))
+
     def open(self, file: pathlib.Path):
+        '''
+        start loading in background. the scene is replaced when finished
+        '''
         logger.info(f'load: {file.name}')
-        self.file = None
-        self.data = None
-        self.tree.root = None
-
-        try:
-            import gltfio
-            self.data = gltfio.parse_path(file)
-            self.file = file
-            self.tree.root = self.data.gltf
-            self.tree.push(())
-
-            # load opengl scene
-            self.loader = gltf_loader.GltfLoader(self.data)
-            scene = self.loader.load()
-            scene.calc_world()
-            self.view.scene.drawables = [scene]  # type: ignore
-
-            # fit camera
-            from glglue.ctypesmath import AABB
-            aabb = AABB.new_empty()
-            aabb = scene.expand_aabb(aabb)
-            self.view.camera.fit(*aabb)
-
-            # animation
-            if self.loader.animations:
-                self.playback.time = self.loader.animations[0].last_time
-
-        except Exception as e:
-            logger.exception(e)
+        if self.task:
+            # stale
+            self.task.cancel()
+        self.task = LoadTask(
+            file, lazy_images=self.lazy_images, instancing=self.instancing, batch=self.batch, culling=self.culling)
+
+    def _set_result(self, result: LoadResult):
+        if self.loader:
+            self.loader.set_bake(0)
+            if self.loader.picker:
+                self.loader.picker.shutdown()
+        self.pick_ray = None
+
+        self.file = result.path
+        self.data = result.data
+        self.tree.root = self.data.gltf
+        self.tree.push(())
+
+        # opengl scene. GL resources are created on the first draw
+        self.loader = result.loader
+        self.view.scene.drawables = [result.scene]  # type: ignore
+
+        # fit camera
+        self.view.camera.fit(*result.aabb)
+
+        # animation
+        if self.loader.animations:
+            self.playback.time = self.loader.animations[0].last_time
@@ -1,183 +1,57 @@
 import logging
 import ctypes
-from typing import Union, Optional, Any, Tuple, List
+from typing import Optional, List
 import pydear.imgui as ImGui
 import fontawesome47.icons_str as ICONS_FA
+from ..json_rows import JsonRows, JsonRow
+from .. import keypath
+from ..listclipper import clip
+from .clipper import table_rows
 logger = logging.getLogger(__name__)
 
 
-def can_jump(keys: tuple, value):
-    match keys:
-        case ('nodes', node_index, 'children', child_index):
-            return ('nodes', value)
-        case ('scenes', scene_index, 'nodes', node_index):
-            return ('nodes', value)
-        case ('skins', skin_index, 'skeleton'):
-            return ('nodes', value)
-        case ('skins', skin_index, 'joints', joint_index):
-            return ('nodes', value)
-
-    return False
-
-
-def is_scene(keys: tuple):
-    match keys:
-        case ('scene',):
-            return True
-        case ('scenes',):
-            return True
-        case ('scenes', scene_index):
-            return True
-
-
-def is_node(keys: tuple):
-    '''
-    array of node, the node, node index
-    '''
-    match keys:
-        case  ('nodes',):
-            return True
-        case ('nodes', node_index):
-            return True
-        case ('nodes', node_index, 'children'):
-            return True
-        case ('nodes', node_index, 'children', child_index):
-            return True
-        case ('scenes', scene_index, 'nodes'):
-            return True
-        case ('scenes', scene_index, 'nodes', node_index):
-            return True
-        case ('skins', skin_index, 'skeleton'):
-            return True
-        case ('skins', skin_index, 'joints'):
-            return True
-        case ('skins', skin_index, 'joints', joint_index):
-            return True
-
-
-def is_mesh(keys: tuple):
-    match keys:
-        case ('meshes',):
-            return True
-        case ('meshes', mesh_index):
-            return True
-        case ('meshes', mesh_index, 'primitives'):
-            return True
-        case ('meshes', mesh_index, 'primitives', prim_index):
-            return True
-        case ('nodes', node_index, 'mesh'):
-            return True
-
-
-def is_skin(keys: tuple):
-    match keys:
-        case ('skins',):
-            return True
-        case ('skins', skin_index):
-            return True
-        case ('nodes', node_index, 'skin'):
-            return True
-
-
-def is_material(keys: tuple):
-    match keys:
-        case ('materials', ):
-            return True
-        case ('materials', material_index):
-            return True
-        case ('textures',):
-            return True
-        case ('textures', texture_index):
-            return True
-        case ('images',):
-            return True
-        case ('images', image_index):
-            return True
-        case ('samplers', ):
-            return True
-        case ('samplers', sampler_index):
-            return True
-        case ('meshes', meshes_index, 'primitives', prim_index, 'material'):
-            return True
-
-
-def is_animation(keys: tuple):
-    match keys:
-        case ('animations',):
-            return True
-        case ('animations', animation_index):
-            return True
-
-
-def is_buffer(keys: tuple):
-    match keys:
-        case ('buffers', ):
-            return True
-        case ('buffers', buffer_index):
-            return True
-        case ('bufferViews', ):
-            return True
-        case ('bufferViews', bufferView_index):
-            return True
-        case ('bufferViews', bufferView_index, 'buffer'):
-            return True
-        case ('accessors', ):
-            return True
-        case ('accessors', accessor_index):
-            return True
-        case ('accessors', accessor_index, 'bufferView'):
-            return True
-        case ('meshes', meshes_index, 'primitives', prim_index, 'indices'):
-            return True
-        case ('meshes', meshes_index, 'primitives', prim_index, 'attributes', attribute):
-            return True
-        case ('skins', skin_index, 'inverseBindMatrices'):
-            return True
+CATEGORY_ICONS = {
+    'scene': ICONS_FA.FOLDER,
+    'node': ICONS_FA.SITEMAP,
+    'mesh': ICONS_FA.CUBE,
+    'skin': ICONS_FA.CHILD,
+    'material': ICONS_FA.DIAMOND,
+    'buffer': ICONS_FA.DATABASE,
+    'animation': ICONS_FA.PLAY,
+}
 
 
 def get_icon(keys: tuple) -> str:
-    if is_scene(keys):
-        return ICONS_FA.FOLDER
-
-    if is_node(keys):
-        return ICONS_FA.SITEMAP
-
-    if is_mesh(keys):
-        return ICONS_FA.CUBE
-
-    if is_skin(keys):
-        return ICONS_FA.CHILD
-
-    if is_material(keys):
-        return ICONS_FA.DIAMOND
-
-    if is_buffer(keys):
-        return ICONS_FA.DATABASE
-
-    if is_animation(keys):
-        return ICONS_FA.PLAY
-
-    if can_jump(keys, None):
+    info = keypath.classify(keys)
+    if info.category:
+        return CATEGORY_ICONS[info.category]
+    if info.jump:
         return ICONS_FA.SHARE
-
     return ''
 
 
-def tuple_status_with(current, target) -> bool:
-    if len(current) > len(target):
-        return False
-
-    for l, r in zip(current, target):
-        if l != r:
-            return False
-    return True
-
-
 class JsonTree:
     def __init__(self) -> None:
-        self.root = None
+        self.rows: Optional[JsonRows] = None
         self._history: List[tuple] = []
         self._history_pos = -1
+        # scroll when the selection is changed
+        self._scrolled: Optional[tuple] = None
+        # the selection is changed by a double click jump in the tree
+        self._jumped: Optional[tuple] = None
+        # rows in the view in the last frame. [begin, end)
+        self._visible = (0, 0)
+
+    @property
+    def root(self) -> Optional[dict]:
+        return self.rows.root if self.rows else None
+
+    @root.setter
+    def root(self, root: Optional[dict]):
+        self.rows = JsonRows(root, get_icon, keypath.get_jump) if root else None
+        self._scrolled = None
+        self._jumped = None
+        self._visible = (0, 0)
 
     def get_selected(self) -> tuple:
         if len(self._history) == 0:
@@ -208,76 +82,95 @@ class JsonTree:
             self._history_pos += 1
             logger.debug(f'{self._history_pos}/{len(self._history)}')
 
-    def _traverse(self, node: Union[list, dict, Any], *keys: Union[str, int]):
-        flag = 0  # const.ImGuiTreeNodeFlags_.SpanFullWidth
-        match node:
-            case list():
-                value = f'({len(node)})'
-            case dict():
-                value = node.get('name', '')
-            case _:
-                flag |= ImGui.ImGuiTreeNodeFlags_.Leaf
-                flag |= ImGui.ImGuiTreeNodeFlags_.Bullet
-                # flag |= ImGui.TREE_NODE_NO_TREE_PUSH_ON_OPEN
-                value = f'{node}'
-        selected = self.get_selected()
-        if tuple_status_with(keys, selected):
-            if len(keys) < len(selected):
-                ImGui.SetNextItemOpen(True, ImGui.ImGuiCond_.Once)
-        ImGui.TableNextRow()
+    def _draw_row(self, row: JsonRow, selected: tuple) -> Optional[bool]:
+        '''
+        return new open state if toggled
+        '''
+        flag = ImGui.ImGuiTreeNodeFlags_.NoTreePushOnOpen  # const.ImGuiTreeNodeFlags_.SpanFullWidth
+        if row.is_leaf:
+            flag |= ImGui.ImGuiTreeNodeFlags_.Leaf
+            flag |= ImGui.ImGuiTreeNodeFlags_.Bullet
+        assert self.rows
+        is_open = self.rows.is_open(row.keys)
         # col 0
         ImGui.TableNextColumn()
-        open = ImGui.TreeNodeEx(f'{get_icon(keys)} {keys[-1]}', flag)
+        indent = row.depth * ImGui.GetTreeNodeToLabelSpacing()
+        if indent:
+            ImGui.Indent(indent)
+        ImGui.SetNextItemOpen(is_open)
+        open = ImGui.TreeNodeEx(row.label, flag)
         ImGui.SetItemAllowOverlap()
+        if indent:
+            ImGui.Unindent(indent)
         # col 1
         ImGui.TableNextColumn()
-        selected = ImGui.Selectable(
-            f'{value}##{keys}', keys == self.get_selected(), ImGui.ImGuiSelectableFlags_.SpanAllColumns)
+        ImGui.Selectable(
+            row.value, row.keys == selected, ImGui.ImGuiSelectableFlags_.SpanAllColumns)
         if ImGui.IsMouseDoubleClicked(0) and ImGui.IsItemClicked():
             # update selectable
-            dst = can_jump(keys, node)
-            if dst:
+            if row.jump:
                 logger.debug('double clicked')
-                self.push(dst)
+                self.push(row.jump)
+                self._jumped = row.jump
         elif ImGui.IsItemClicked():
             # update selectable
             logger.debug('clicked')
-            self.push(keys)
-        # elif selected:
-        #     # update selectable
-        #     logger.debug('selected')
-        #     self.push(keys)
+            self.push(row.keys)
+            # the clicked row is visible. no scroll
+            self._scrolled = row.keys
 
-        if open:
-            match node:
-                case list():
-                    for i, v in enumerate(node):
-                        self._traverse(v, *keys, i)
-                case dict():
-                    for k, v in node.items():
-                        self._traverse(v, *keys, k)
-            ImGui.TreePop()
+        if not row.is_leaf and open != is_open:
+            return open
+        return None
 
     def draw(self, p_open: ctypes.Array):
-        if ImGui.Begin('json', p_open):
-            if not self.root:
-                return
+        if ImGui.Begin('json', p_open) and self.rows:
+            rows = self.rows
+            selected = self.get_selected()
+            scroll_to = None
+            if selected != self._scrolled:
+                # open the selected
+                self._scrolled = selected
+                index = rows.expand_to(selected)
+                begin, end = self._visible
+                # None if the target does not exist. a broken jump
+                # scroll if changed from outside. prop, picking or history
+                if index is not None and (selected != self._jumped or not (begin <= index < end)):
+                    scroll_to = index
+                self._jumped = None
+
             flags = (
                 ImGui.ImGuiTableFlags_.BordersV
                 | ImGui.ImGuiTableFlags_.BordersOuterH
                 | ImGui.ImGuiTableFlags_.Resizable
                 | ImGui.ImGuiTableFlags_.RowBg
                 | ImGui.ImGuiTableFlags_.NoBordersInBody
+                | ImGui.ImGuiTableFlags_.ScrollY
             )
             if ImGui.BeginTable("jsontree_table", 2, flags):
                 # header
+                ImGui.TableSetupScrollFreeze(0, 1)
                 ImGui.TableSetupColumn("key")
                 ImGui.TableSetupColumn("value")
                 ImGui.TableHeadersRow()
 
-                # body
-                for k, v in self.root.items():
-                    self._traverse(v, k)
+                if scroll_to is not None:
+                    ImGui.SetScrollY(
+                        scroll_to * ImGui.GetTextLineHeightWithSpacing())
+
+                # body. only visible rows
+                toggled = None
+                for i in table_rows(len(rows)):
+                    row = rows.rows[i]
+                    is_open = self._draw_row(row, selected)
+                    if is_open is not None:
+                        toggled = (row.keys, is_open)
+                # without the margin rows of the clipper
+                self._visible = clip(len(rows), ImGui.GetTextLineHeightWithSpacing(),
+                                     ImGui.GetScrollY(), ImGui.GetWindowHeight(), margin=0)
 
                 ImGui.EndTable()
+
+                if toggled:
+                    rows.set_open(*toggled)
         ImGui.End()
@@ -1,46 +1,35 @@
 import ctypes
 import logging
-from typing import Optional, List, NamedTuple, Union
+from typing import Optional, List, NamedTuple, Union, Tuple
 import dataclasses
 import json
-import io
+from collections import OrderedDict
 import pydear.imgui as ImGui
 from gltfio.parser import GltfData
 from ..gltf_loader import GltfLoader
-from ..jsonutil import get_value, to_pretty
+from ..jsonutil import get_value, PrettyLines
+from ..accessor_stats import StatsCache
+from ..refindex import RefIndex
 from .accessor_table import AccessorTable, get_accessor
+from .clipper import table_rows
 
 
 logger = logging.getLogger(__name__)
 
+# built contents to keep for the history navigation
+CACHE_SIZE = 64
+# json table height
+VISIBLE_LINES = 40
+# reference buttons shown at once
+REF_PAGE = 64
+
 
 def node_debug(data: GltfData, node_index, loader: GltfLoader) -> str:
     node = data.nodes[node_index]
 
     if node.mesh and node.skin:
-        used_joints = set()
-        for i, prim in enumerate(node.mesh.primitives):
-            if not prim.weights:
-                raise RuntimeError()
-            if not prim.joints:
-                raise RuntimeError()
-            for w4, j4 in zip(prim.weights, prim.joints):
-                for k in range(4):
-                    if w4[k] > 0:
-                        used_joints.add(j4[k])
-
-        w = io.StringIO()
-        if node.skin.inverse_bind_matrices:
-            for i, m in enumerate(node.skin.inverse_bind_matrices):
-                if i in used_joints:
-                    w.write(f'[{i}]{data.nodes[i].name}: ')
-                    w.write(f'({m[12]:.3f}, {m[13]:.3f}. {m[14]:.3f})')
-                    scene_node = loader.nodes[node.skin.joints[i].index]
-                    wm = scene_node.world_matrix
-                    w.write(f', ({wm._41:.3f}, {wm._42:.3f}. {wm._43:.3f})')
-                    w.write('\n')
-
-        return w.getvalue()
+        from .. import skin_debug
+        return skin_debug.get_node_debug_info(data, node_index, loader)
 
     else:
         return json.dumps(node, indent=2)
@@ -53,18 +42,53 @@ class TextContent(NamedTuple):
         ImGui.TextUnformatted(self.content)
 
 
-class JumpContent(NamedTuple):
-    keys: tuple
+class PrettyContent(NamedTuple):
+    lines: PrettyLines
+
+    def draw(self):
+        # only the visible lines of the formatted pages
+        row_height = ImGui.GetTextLineHeightWithSpacing()
+        height = row_height * (min(len(self.lines), VISIBLE_LINES) + 1)
+        if ImGui.BeginTable('json_lines', 1, ImGui.ImGuiTableFlags_.ScrollY, (0, height)):
+            for i in table_rows(len(self.lines)):
+                ImGui.TableNextColumn()
+                ImGui.TextUnformatted(self.lines.lines[i])
+            ImGui.EndTable()
+        if self.lines.has_more:
+            ImGui.TextUnformatted(self.lines.more_label)
+            ImGui.SameLine()
+            if ImGui.Button('next page'):
+                self.lines.next_page()
+
+
+class JumpListContent:
+    '''
+    buttons of the first REF_PAGE references. more by the button
+    '''
+
+    def __init__(self, keys_list: List[tuple]) -> None:
+        self.keys_list = keys_list
+        self.count = min(len(keys_list), REF_PAGE)
 
     def draw(self):
-        if ImGui.Button(str(self.keys)):
-            return self.keys
+        selected = None
+        for i, keys in enumerate(self.keys_list[:self.count]):
+            # the same label in the list. the id by index
+            if ImGui.Button(f'{keys}##{i}'):
+                selected = keys
+        rest = len(self.keys_list) - self.count
+        if rest > 0:
+            ImGui.TextUnformatted(f'... {rest} more')
+            ImGui.SameLine()
+            if ImGui.Button('more##refs'):
+                self.count = min(len(self.keys_list), self.count + REF_PAGE)
+        return selected
 
 
 @dataclasses.dataclass
 class Item:
     name: str
-    content: Union[TextContent, JumpContent, AccessorTable]
+    content: Union[TextContent, PrettyContent, JumpListContent, AccessorTable]
     visible: Optional[ctypes.Array] = None
 
     def draw(self):
@@ -73,57 +97,101 @@ class Item:
             return self.content.draw()
 
 
+class CacheEntry(NamedTuple):
+    contents: List[Item]
+    # node_debug and skin_debug depend on the animation time
+    is_pose: bool
+    time: Optional[float]
+
+
 class Prop:
     def __init__(self) -> None:
         self.data: Optional[GltfData] = None
         self.key = ()
         self.contents: List[Item] = []
         self.selected = None
+        # accessor statistics of the current data
+        self.stats = StatsCache()
+        # reverse references of the current data
+        self.refs: Optional[RefIndex] = None
+        # built contents of the current data. least recently used first
+        self._cache: OrderedDict[tuple, CacheEntry] = OrderedDict()
 
     def set(self, data: Optional[GltfData], key: tuple, loader: Optional[GltfLoader]):
         if self.data == data and self.key == key:
             return
 
+        if self.data != data:
+            self.stats.clear()
+            self.refs = RefIndex(data.gltf) if data else None
+            self._cache.clear()
         self.data = data
         self.key = key
-        self.contents.clear()
-
-        if self.data and loader:
-            value = get_value(self.data.gltf, self.key)
-            self.contents.append(Item('json', TextContent(
-                to_pretty(value))))
-
-            match self.key:
-                case ('nodes', node_index):
-                    node = self.data.nodes[node_index]
-                    if node.mesh:
-                        self.contents.append(
-                            Item('ref to', JumpContent(('meshes', node.mesh.index))))
-                    if node.skin:
-                        self.contents.append(
-                            Item('ref to', JumpContent(('skins', node.skin.index))))
-
-                case ('nodes', node_index, 'skin'):
-                    self.contents.append(Item('node_debug', TextContent(node_debug(
-                        self.data, node_index, loader))))
-
-                case ('skins', skin_index):
-                    # ref from
-                    for node in self.data.nodes:
-                        if node.skin and node.skin.index == skin_index:
-                            self.contents.append(
-                                Item('ref from', JumpContent(('nodes', node.index))))
-
-                    from .. import skin_debug
-                    self.contents.append(Item('skin_debug', TextContent(skin_debug.get_debug_info(
-                        self.data, skin_index, loader))))
-
-            match get_accessor(self.data, key):
-                case int() as accessor_index:
-                    accessor = self.data.buffer_reader.read_accessor(
-                        accessor_index)
-                    self.contents.append(
-                        Item('accessor', AccessorTable(key, accessor)))
+
+        if not self.data or not loader:
+            self.contents = []
+            return
+
+        cached = self._cache.get(key)
+        if cached and (not cached.is_pose or cached.time == loader.time):
+            self._cache.move_to_end(key)
+            self.contents = cached.contents
+            return
+
+        contents, is_pose = self._build(self.data, key, loader)
+        self.contents = contents
+        self._cache[key] = CacheEntry(contents, is_pose, loader.time)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _build(self, data: GltfData, key: tuple, loader: GltfLoader) -> Tuple[List[Item], bool]:
+        '''
+        return contents and is pose dependent
+        '''
+        contents: List[Item] = []
+        is_pose = False
+        value = get_value(data.gltf, key)
+        contents.append(Item('json', PrettyContent(PrettyLines(value))))
+
+        if self.refs and len(key) == 2:
+            ref_to = self.refs.ref_to(key)
+            if ref_to:
+                contents.append(
+                    Item('ref to', JumpListContent(ref_to)))
+            ref_from = self.refs.ref_from(key)
+            if ref_from:
+                contents.append(
+                    Item('ref from', JumpListContent(ref_from)))
+
+        match key:
+            case ('nodes', node_index, 'skin'):
+                contents.append(Item('node_debug', TextContent(node_debug(
+                    data, node_index, loader))))
+                is_pose = True
+
+            case ('images', image_index):
+                # decode if lazy
+                image = loader.get_image(image_index)
+                contents.append(Item('image', TextContent(
+                    f'{image.width} x {image.height}')))
+
+            case ('skins', skin_index):
+                from .. import skin_debug
+                contents.append(Item('skin_debug', TextContent(skin_debug.get_debug_info(
+                    data, skin_index, loader))))
+                is_pose = True
+
+        match get_accessor(data, key):
+            case int() as accessor_index:
+                accessor = data.buffer_reader.read_accessor(
+                    accessor_index)
+                is_weights = str(key[-1]).startswith('WEIGHTS_')
+                stats = self.stats.get(
+                    accessor_index, accessor, is_weights)
+                contents.append(
+                    Item('accessor', AccessorTable(key, accessor, stats)))
+
+        return contents, is_pose
 
     def draw(self, p_open: ctypes.Array):
         '''
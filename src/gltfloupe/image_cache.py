@@ -0,0 +1,63 @@
+'''
+decode images on demand.
+
+LazyTexture holds only the image index. the image is decoded
+when the texture is first drawn (or inspected) and kept in ImageCache.
+decoded pixels are under a memory budget. least recently used are dropped
+and decoded again on the next access.
+'''
+from typing import List
+import threading
+from collections import OrderedDict
+from glglue.scene.texture import Image32, Texture
+
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+class ImageCache:
+    def __init__(self, sources: List[bytes], budget: int = DEFAULT_BUDGET) -> None:
+        # encoded bytes
+        self.sources = sources
+        self.budget = budget
+        self.lock = threading.Lock()
+        # least recently used first
+        self.decoded: OrderedDict[int, Image32] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    @property
+    def nbytes(self) -> int:
+        with self.lock:
+            return sum(len(item.data) for item in self.decoded.values())
+
+    def get(self, index: int) -> Image32:
+        with self.lock:
+            image = self.decoded.get(index)
+            if image:
+                self.decoded.move_to_end(index)
+                return image
+
+            image = Image32.load(self.sources[index])
+            self.decoded[index] = image
+            total = sum(len(item.data) for item in self.decoded.values())
+            # keep the last one even if over budget
+            while total > self.budget and len(self.decoded) > 1:
+                _, evicted = self.decoded.popitem(last=False)
+                total -= len(evicted.data)
+            return image
+
+
+class LazyTexture(Texture):
+    '''
+    image is decoded on the first access
+    '''
+
+    def __init__(self, name: str, cache: ImageCache, index: int) -> None:
+        self.name = name
+        self.cache = cache
+        self.index = index
+
+    @property
+    def image(self) -> Image32:  # type: ignore
+        return self.cache.get(self.index)
@@ -0,0 +1,96 @@
+'''
+draw a mesh referenced by many nodes with one instanced draw call.
+
+the world matrices of the nodes are gathered into a (K, 4, 4) float32 array
+and uploaded as a per instance vertex attribute (aInstance in gltf.vs).
+the grouping and the matrix array are numpy only.
+'''
+from typing import Dict, Optional, Sequence
+import ctypes
+import numpy as np
+from OpenGL import GL
+import glglue.gl3.vbo
+
+# nodes that reference a mesh to draw it instanced
+INSTANCE_MIN = 4
+# aInstance. mat4 uses 4 locations
+INSTANCE_LOCATION = 4
+MACRO = '#define INSTANCED 1'
+
+
+def group_instances(node_meshes: Sequence[Optional[int]], min_count: int = INSTANCE_MIN) -> Dict[int, np.ndarray]:
+    '''
+    node_meshes: mesh index of each node. None if no mesh
+
+    return node indices by mesh index. meshes under min_count are excluded
+    '''
+    groups: Dict[int, list] = {}
+    for node_index, mesh_index in enumerate(node_meshes):
+        if mesh_index is not None:
+            groups.setdefault(mesh_index, []).append(node_index)
+    return {mesh_index: np.array(nodes, dtype=np.int64)
+            for mesh_index, nodes in groups.items() if len(nodes) >= min_count}
+
+
+class InstanceGroup:
+    def __init__(self, mesh_index: int, nodes: np.ndarray) -> None:
+        self.mesh_index = mesh_index
+        self.nodes = nodes
+        # row vector world matrix of each instance
+        self.matrices = np.zeros((len(nodes), 4, 4), dtype=np.float32)
+        # not uploaded
+        self.updated = True
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def update(self, world: np.ndarray):
+        '''
+        world: (N, 4, 4) world matrices of nodes
+        '''
+        np.take(world, self.nodes, axis=0, out=self.matrices)
+        self.updated = True
+
+
+class InstancedDrawable:
+    '''
+    Drawable with the instance matrix buffer. call in the GL context
+    '''
+
+    def __init__(self, drawable: glglue.gl3.vbo.Drawable, matrices: np.ndarray) -> None:
+        self.drawable = drawable
+        self.instance_count = len(matrices)
+        self.vbo = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vbo)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, matrices.nbytes,
+                        matrices, GL.GL_DYNAMIC_DRAW)
+        vao = drawable.vao
+        vao.bind()
+        stride = 16 * 4
+        for i in range(4):
+            location = INSTANCE_LOCATION + i
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribPointer(location, 4, GL.GL_FLOAT, GL.GL_FALSE,
+                                     stride, ctypes.c_void_p(16 * i))
+            GL.glVertexAttribDivisor(location, 1)
+        vao.unbind()
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def __del__(self) -> None:
+        GL.glDeleteBuffers(1, [self.vbo])
+
+    def update(self, matrices: np.ndarray):
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vbo)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, matrices.nbytes, matrices)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def draw(self, topology, offset: int, draw_count: int):
+        vao = self.drawable.vao
+        vao.bind()
+        if vao.index_format:
+            GL.glDrawElementsInstanced(topology, draw_count, vao.index_format,
+                                       ctypes.c_void_p(offset), self.instance_count)
+        else:
+            GL.glDrawArraysInstanced(
+                topology, offset, draw_count, self.instance_count)
+        vao.unbind()
@@ -0,0 +1,128 @@
+'''
+keyframe interpolation for glTF animation samplers.
+
+all functions take batches. row i of each array is one channel.
+
+* low, high: (n, m) values of the segment keys
+* ratio: (n,) position in the segment. 0 to 1
+* duration: (n,) seconds of the segment. for CUBICSPLINE tangent scale
+* out_tangent: (n, m) out-tangent of low. CUBICSPLINE only
+* in_tangent: (n, m) in-tangent of high. CUBICSPLINE only
+
+https://registry.khronos.org/glTF/specs/2.0/glTF-2.0.html#interpolation
+'''
+from typing import List, Optional, NamedTuple
+import numpy as np
+from gltfio.types import GltfAnimationInterpolation
+
+# slerp fallback to nlerp under this sin(theta)
+SLERP_EPSILON = 1e-6
+
+
+def normalize(q: np.ndarray) -> np.ndarray:
+    q /= np.sqrt(np.einsum('ij,ij->i', q, q))[:, None]
+    return q
+
+
+def step(low: np.ndarray, high: np.ndarray, ratio: np.ndarray) -> np.ndarray:
+    # ratio is 1 after the last key
+    return np.where(ratio[:, None] >= 1, high, low)
+
+
+def lerp(low: np.ndarray, high: np.ndarray, ratio: np.ndarray) -> np.ndarray:
+    return low + (high - low) * ratio[:, None]
+
+
+def slerp(low: np.ndarray, high: np.ndarray, ratio: np.ndarray) -> np.ndarray:
+    d = np.einsum('ij,ij->i', low, high)
+    # shortest path
+    high = np.where(d[:, None] < 0, -high, high)
+    d = np.abs(d)
+    theta = np.arccos(np.minimum(d, 1))
+    s = np.sin(theta)
+    near = s < SLERP_EPSILON
+    w0 = np.divide(np.sin((1 - ratio) * theta), s,
+                   out=1 - ratio, where=~near)
+    w1 = np.divide(np.sin(ratio * theta), s,
+                   out=ratio.copy(), where=~near)
+    return normalize(low * w0[:, None] + high * w1[:, None])
+
+
+def hermite(low: np.ndarray, high: np.ndarray, ratio: np.ndarray, duration: np.ndarray,
+            out_tangent: np.ndarray, in_tangent: np.ndarray) -> np.ndarray:
+    t = ratio[:, None]
+    t2 = t * t
+    t3 = t2 * t
+    dt = duration[:, None]
+    return ((2 * t3 - 3 * t2 + 1) * low
+            + (t3 - 2 * t2 + t) * dt * out_tangent
+            + (-2 * t3 + 3 * t2) * high
+            + (t3 - t2) * dt * in_tangent)
+
+
+def interpolate(mode: GltfAnimationInterpolation, is_rotation: bool,
+                low: np.ndarray, high: np.ndarray, ratio: np.ndarray, duration: np.ndarray,
+                out_tangent: Optional[np.ndarray] = None, in_tangent: Optional[np.ndarray] = None) -> np.ndarray:
+    match mode:
+        case GltfAnimationInterpolation.Step:
+            return step(low, high, ratio)
+        case GltfAnimationInterpolation.Linear:
+            if is_rotation:
+                return slerp(low, high, ratio)
+            return lerp(low, high, ratio)
+        case GltfAnimationInterpolation.Cubicspline:
+            assert out_tangent is not None and in_tangent is not None
+            values = hermite(low, high, ratio, duration,
+                             out_tangent, in_tangent)
+            if is_rotation:
+                normalize(values)
+            return values
+        case _:
+            raise NotImplementedError()
+
+
+class KernelGroup(NamedTuple):
+    mode: GltfAnimationInterpolation
+    is_rotation: bool
+    indices: np.ndarray
+
+
+class Kernel:
+    '''
+    interpolation of many channels with mixed modes.
+
+    channels are grouped by (mode, rotation) once on construction,
+    so each evaluation runs one batched interpolate per group.
+    '''
+
+    def __init__(self, modes: List[GltfAnimationInterpolation], rotations: List[bool]) -> None:
+        assert len(modes) == len(rotations)
+        self.groups: List[KernelGroup] = []
+        keys = sorted(set(zip(modes, rotations)),
+                      key=lambda key: (key[0].value, key[1]))
+        for mode, is_rotation in keys:
+            indices = np.array([i for i, key in enumerate(zip(modes, rotations))
+                                if key == (mode, is_rotation)], dtype=np.int64)
+            self.groups.append(KernelGroup(mode, is_rotation, indices))
+        self.has_cubic = any(
+            mode == GltfAnimationInterpolation.Cubicspline for mode in modes)
+
+    def __call__(self, out: np.ndarray, low: np.ndarray, high: np.ndarray, ratio: np.ndarray, duration: np.ndarray,
+                 out_tangent: Optional[np.ndarray] = None, in_tangent: Optional[np.ndarray] = None) -> np.ndarray:
+        if len(self.groups) == 1:
+            # single group. no gather
+            group = self.groups[0]
+            out[:] = interpolate(group.mode, group.is_rotation, low, high, ratio, duration,
+                                 out_tangent, in_tangent)
+            return out
+
+        for group in self.groups:
+            i = group.indices
+            if group.mode == GltfAnimationInterpolation.Cubicspline:
+                assert out_tangent is not None and in_tangent is not None
+                out[i] = interpolate(group.mode, group.is_rotation, low[i], high[i], ratio[i], duration[i],
+                                     out_tangent[i], in_tangent[i])
+            else:
+                out[i] = interpolate(group.mode, group.is_rotation,
+                                     low[i], high[i], ratio[i], duration[i])
+        return out
@@ -0,0 +1,107 @@
+'''
+json tree flattened to the rows of the expanded nodes.
+
+rows are rebuilt only when a node is expanded or collapsed.
+labels, icons and jump targets are computed once per key path and cached.
+'''
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import dataclasses
+
+
+@dataclasses.dataclass
+class JsonRow:
+    keys: tuple
+    depth: int
+    # tree label. '{icon} {key}##{keys}'
+    label: str
+    # value label. '{value}##{keys}'
+    value: str
+    is_leaf: bool
+    # double click target
+    jump: Optional[tuple] = None
+
+
+def get_children(node: Any) -> Iterable[Tuple[Any, Any]]:
+    match node:
+        case list():
+            return enumerate(node)
+        case dict():
+            return node.items()
+        case _:
+            return ()
+
+
+def get_value_label(node: Any) -> str:
+    match node:
+        case list():
+            return f'({len(node)})'
+        case dict():
+            return node.get('name', '')
+        case _:
+            return f'{node}'
+
+
+class JsonRows:
+    def __init__(self, root: dict,
+                 get_icon: Callable[[tuple], str] = lambda keys: '',
+                 can_jump: Callable[[tuple, Any], Any] = lambda keys, value: None) -> None:
+        self.root = root
+        self.get_icon = get_icon
+        self.can_jump = can_jump
+        self.expanded: Set[tuple] = set()
+        self.rows: List[JsonRow] = []
+        # keys to row position
+        self.positions: Dict[tuple, int] = {}
+        self._cache: Dict[tuple, JsonRow] = {}
+        self.update()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _get_row(self, keys: tuple, node: Any) -> JsonRow:
+        row = self._cache.get(keys)
+        if not row:
+            is_leaf = not isinstance(node, (list, dict))
+            row = JsonRow(keys, len(keys) - 1,
+                          f'{self.get_icon(keys)} {keys[-1]}##{keys}',
+                          f'{get_value_label(node)}##{keys}',
+                          is_leaf,
+                          self.can_jump(keys, node) or None)
+            self._cache[keys] = row
+        return row
+
+    def update(self):
+        '''
+        rebuild rows. depth first without recursion
+        '''
+        self.rows.clear()
+        self.positions.clear()
+        stack = [((key,), value)
+                 for key, value in reversed(list(get_children(self.root)))]
+        while stack:
+            keys, node = stack.pop()
+            self.positions[keys] = len(self.rows)
+            self.rows.append(self._get_row(keys, node))
+            if keys in self.expanded:
+                stack.extend((keys + (key,), value)
+                             for key, value in reversed(list(get_children(node))))
+
+    def is_open(self, keys: tuple) -> bool:
+        return keys in self.expanded
+
+    def set_open(self, keys: tuple, is_open: bool):
+        if is_open:
+            self.expanded.add(keys)
+        else:
+            self.expanded.discard(keys)
+        self.update()
+
+    def expand_to(self, keys: tuple) -> Optional[int]:
+        '''
+        open ancestors of keys and return the row position
+        '''
+        ancestors = {keys[:i] for i in range(1, len(keys))}
+        if not ancestors <= self.expanded:
+            self.expanded |= ancestors
+            self.update()
+        return self.positions.get(keys)
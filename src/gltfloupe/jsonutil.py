@@ -1,5 +1,8 @@
-import io
-from typing import Union
+from typing import Iterator, List, Optional, Union
+
+# default page of PrettyLines
+PAGE_LINES = 1000
+PAGE_BYTES = 64 * 1024
 
 
 def _num(value: Union[int, float]) -> str:
@@ -12,54 +15,165 @@ def _num(value: Union[int, float]) -> str:
             raise RuntimeError()
 
 
-def _to_string(w: io.IOBase, value, level=0, is_value=False):
+def _iter_string(value, level=0, is_value=False) -> Iterator[str]:
+    '''
+    fragments of the pretty text
+    '''
     indent = '  ' * level
     if not is_value:
-        w.write(indent)
+        yield indent
     match value:
         case list():
             if all(isinstance(x, int) or isinstance(x, float) for x in value):
-                w.write('[' + ', '.join(_num(x) for x in value) + ']')
+                yield '[' + ', '.join(_num(x) for x in value) + ']'
             else:
-                w.write('[\n')
+                yield '[\n'
                 for i, v in enumerate(value):
-                    _to_string(w, v, level+1)
+                    yield from _iter_string(v, level+1)
                     if (i+1) < len(value):
-                        w.write(',')
-                    w.write('\n')
-                w.write(f'{indent}]')
+                        yield ','
+                    yield '\n'
+                yield f'{indent}]'
         case dict():
-            w.write('{\n')
+            yield '{\n'
             for i, (k, v) in enumerate(value.items()):
-                _to_string(w, k, level+1)
-                w.write(': ')
-                _to_string(w, v, level+1, is_value=True)
+                yield from _iter_string(k, level+1)
+                yield ': '
+                yield from _iter_string(v, level+1, is_value=True)
                 if (i+1) < len(value):
-                    w.write(',')
-                w.write('\n')
-            w.write(f'{indent}}}')
+                    yield ','
+                yield '\n'
+            yield f'{indent}}}'
         case str():
             # quote
             if len(value) > 100:
-                w.write(f'"{value[:8]}..."')
+                yield f'"{value[:8]}..."'
             else:
-                w.write(f'"{value}"')
+                yield f'"{value}"'
         case True:
-            w.write('true')
+            yield 'true'
         case False:
-            w.write('false')
+            yield 'false'
         case None:
-            w.write('null')
+            yield 'null'
         case float() | int():
-            w.write(_num(value))
+            yield _num(value)
         case _:
             raise RuntimeError()
 
 
-def to_pretty(value):
-    w = io.StringIO()
-    _to_string(w, value)
-    return w.getvalue()
+def iter_pretty(value) -> Iterator[str]:
+    '''
+    lines of the pretty text without the line break
+    '''
+    line: List[str] = []
+    for fragment in _iter_string(value):
+        while True:
+            pos = fragment.find('\n')
+            if pos < 0:
+                break
+            line.append(fragment[:pos])
+            yield ''.join(line)
+            line.clear()
+            fragment = fragment[pos+1:]
+        line.append(fragment)
+    yield ''.join(line)
+
+
+def count_lines(value) -> int:
+    '''
+    line count of the pretty text without formatting
+    '''
+    match value:
+        case list():
+            if all(isinstance(x, int) or isinstance(x, float) for x in value):
+                return 1
+            return 2 + sum(count_lines(v) for v in value)
+        case dict():
+            return 2 + sum(count_lines(v) for v in value.values())
+        case str() if len(value) <= 100:
+            return value.count('\n') + 1
+        case _:
+            return 1
+
+
+def _more(count: int) -> str:
+    return f'… {count} more lines'
+
+
+def to_pretty(value, max_lines: Optional[int] = None, max_bytes: Optional[int] = None):
+    '''
+    the text over the budget is replaced by a line of the remaining count
+    '''
+    if max_lines is None and max_bytes is None:
+        return ''.join(_iter_string(value))
+    lines: List[str] = []
+    size = 0
+    for line in iter_pretty(value):
+        size += len(line) + 1
+        if (max_lines is not None and len(lines) >= max_lines) or (max_bytes is not None and size > max_bytes):
+            lines.append(_more(count_lines(value) - len(lines)))
+            break
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+class PrettyLines:
+    '''
+    pretty text formatted by the page
+    '''
+
+    def __init__(self, value, page_lines: int = PAGE_LINES, page_bytes: int = PAGE_BYTES) -> None:
+        self.value = value
+        self.page_lines = page_lines
+        self.page_bytes = page_bytes
+        self.lines: List[str] = []
+        self._iter: Optional[Iterator[str]] = iter_pretty(value)
+        self._count: Optional[int] = None
+        self.next_page()
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    @property
+    def has_more(self) -> bool:
+        if self._iter is not None and self.total <= len(self.lines):
+            # ended on the page boundary
+            self._iter = None
+        return self._iter is not None
+
+    @property
+    def total(self) -> int:
+        if self._count is None:
+            self._count = len(self.lines) if self._iter is None else count_lines(
+                self.value)
+        return self._count
+
+    @property
+    def more_label(self) -> str:
+        return _more(self.total - len(self.lines))
+
+    def next_page(self):
+        if not self._iter:
+            return
+        size = 0
+        for _ in range(self.page_lines):
+            line = next(self._iter, None)
+            if line is None:
+                self._iter = None
+                return
+            self.lines.append(line)
+            size += len(line) + 1
+            if size >= self.page_bytes:
+                break
+
+    def get_window(self, begin: int, end: int) -> List[str]:
+        '''
+        lines in [begin, end). formats the next pages if required
+        '''
+        while end > len(self.lines) and self._iter:
+            self.next_page()
+        return self.lines[begin:end]
 
 
 def get_value(json, key):
@@ -0,0 +1,139 @@
+'''
+classify a key path of the glTF json.
+
+key path is a tuple of keys from the root. ('nodes', 0, 'children', 1)
+
+patterns are compiled into a trie keyed on the names.
+INDEX matches any array index and ANY matches any name.
+the result is memoized by the pattern of the path, not by the path itself.
+'''
+from typing import Any, Dict, NamedTuple, Optional
+import functools
+
+
+class KeyPathInfo(NamedTuple):
+    # scene, node, mesh, skin, material, buffer, animation
+    category: Optional[str] = None
+    # the value is an index of this collection
+    jump: Optional[str] = None
+    # 'value': the value is an accessor index.
+    # 'key': keys[1] is an accessor index
+    accessor: Optional[str] = None
+
+
+INDEX = '#'
+ANY = '*'
+
+PATTERNS = [
+    # scene
+    (('scene',), KeyPathInfo('scene')),
+    (('scenes',), KeyPathInfo('scene')),
+    (('scenes', INDEX), KeyPathInfo('scene')),
+    # node
+    (('nodes',), KeyPathInfo('node')),
+    (('nodes', INDEX), KeyPathInfo('node')),
+    (('nodes', INDEX, 'children'), KeyPathInfo('node')),
+    (('nodes', INDEX, 'children', INDEX), KeyPathInfo('node', 'nodes')),
+    (('scenes', INDEX, 'nodes'), KeyPathInfo('node')),
+    (('scenes', INDEX, 'nodes', INDEX), KeyPathInfo('node', 'nodes')),
+    (('skins', INDEX, 'skeleton'), KeyPathInfo('node', 'nodes')),
+    (('skins', INDEX, 'joints'), KeyPathInfo('node')),
+    (('skins', INDEX, 'joints', INDEX), KeyPathInfo('node', 'nodes')),
+    # mesh
+    (('meshes',), KeyPathInfo('mesh')),
+    (('meshes', INDEX), KeyPathInfo('mesh')),
+    (('meshes', INDEX, 'primitives'), KeyPathInfo('mesh')),
+    (('meshes', INDEX, 'primitives', INDEX), KeyPathInfo('mesh')),
+    (('nodes', INDEX, 'mesh'), KeyPathInfo('mesh')),
+    # skin
+    (('skins',), KeyPathInfo('skin')),
+    (('skins', INDEX), KeyPathInfo('skin')),
+    (('nodes', INDEX, 'skin'), KeyPathInfo('skin')),
+    # material
+    (('materials',), KeyPathInfo('material')),
+    (('materials', INDEX), KeyPathInfo('material')),
+    (('textures',), KeyPathInfo('material')),
+    (('textures', INDEX), KeyPathInfo('material')),
+    (('images',), KeyPathInfo('material')),
+    (('images', INDEX), KeyPathInfo('material')),
+    (('samplers',), KeyPathInfo('material')),
+    (('samplers', INDEX), KeyPathInfo('material')),
+    (('meshes', INDEX, 'primitives', INDEX, 'material'), KeyPathInfo('material')),
+    # buffer
+    (('buffers',), KeyPathInfo('buffer')),
+    (('buffers', INDEX), KeyPathInfo('buffer')),
+    (('bufferViews',), KeyPathInfo('buffer')),
+    (('bufferViews', INDEX), KeyPathInfo('buffer')),
+    (('bufferViews', INDEX, 'buffer'), KeyPathInfo('buffer')),
+    (('accessors',), KeyPathInfo('buffer')),
+    (('accessors', INDEX), KeyPathInfo('buffer', accessor='key')),
+    (('accessors', INDEX, 'bufferView'), KeyPathInfo('buffer')),
+    (('meshes', INDEX, 'primitives', INDEX, 'indices'),
+     KeyPathInfo('buffer', accessor='value')),
+    (('meshes', INDEX, 'primitives', INDEX, 'attributes', ANY),
+     KeyPathInfo('buffer', accessor='value')),
+    (('skins', INDEX, 'inverseBindMatrices'),
+     KeyPathInfo('buffer', accessor='value')),
+    # animation
+    (('animations',), KeyPathInfo('animation')),
+    (('animations', INDEX), KeyPathInfo('animation')),
+]
+
+NONE = KeyPathInfo()
+
+
+class TrieNode:
+    def __init__(self) -> None:
+        self.children: Dict[str, 'TrieNode'] = {}
+        self.info: Optional[KeyPathInfo] = None
+
+    def add(self, pattern: tuple, info: KeyPathInfo):
+        node = self
+        for key in pattern:
+            child = node.children.get(key)
+            if not child:
+                child = TrieNode()
+                node.children[key] = child
+            node = child
+        # the first pattern wins
+        if not node.info:
+            node.info = info
+
+    def find(self, pattern: tuple) -> KeyPathInfo:
+        node = self
+        for key in pattern:
+            child = node.children.get(key)
+            if not child:
+                child = node.children.get(ANY)
+                if not child:
+                    return NONE
+            node = child
+        return node.info or NONE
+
+
+ROOT = TrieNode()
+for pattern, info in PATTERNS:
+    ROOT.add(pattern, info)
+
+
+def to_pattern(keys: tuple) -> tuple:
+    return tuple(INDEX if isinstance(key, int) else key for key in keys)
+
+
+@functools.lru_cache(maxsize=4096)
+def _classify_pattern(pattern: tuple) -> KeyPathInfo:
+    return ROOT.find(pattern)
+
+
+def classify(keys: tuple) -> KeyPathInfo:
+    return _classify_pattern(to_pattern(keys))
+
+
+def get_jump(keys: tuple, value: Any) -> Optional[tuple]:
+    '''
+    key path of the value reference
+    '''
+    info = classify(keys)
+    if info.jump and isinstance(value, int):
+        return (info.jump, value)
+    return None
@@ -0,0 +1,19 @@
+'''
+visible rows of a scrolling list.
+
+pydear does not wrap ImGuiListClipper.
+lists with a fixed row height are clipped with the scroll position instead.
+'''
+from typing import Tuple
+import math
+
+
+def clip(count: int, row_height: float, scroll_y: float, view_height: float, margin: int = 1) -> Tuple[int, int]:
+    '''
+    [begin, end) rows in the view. margin rows are added to both sides
+    '''
+    if count <= 0 or row_height <= 0:
+        return 0, 0
+    begin = int(scroll_y // row_height) - margin
+    end = math.ceil((scroll_y + view_height) / row_height) + margin
+    return max(begin, 0), max(min(end, count), 0)
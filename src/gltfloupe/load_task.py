@@ -0,0 +1,111 @@
+'''
+open a glTF file in a worker thread.
+
+parse, buffer read, decode and GltfLoader.load run in the worker.
+the render thread polls the task and only swaps the finished scene in.
+'''
+from typing import Optional, NamedTuple
+import pathlib
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from glglue import ctypesmath
+from glglue.scene.node import Node
+from gltfio.parser import GltfData
+from .gltf_loader import GltfLoader
+
+logger = logging.getLogger(__name__)
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LoadResult(NamedTuple):
+    path: pathlib.Path
+    data: GltfData
+    loader: GltfLoader
+    scene: Node
+    aabb: ctypesmath.AABB
+
+
+class LoadTask:
+    def __init__(self, path: pathlib.Path, *, lazy_images: bool = True, instancing: bool = True, batch: bool = False,
+                 culling: bool = True, picking: bool = True) -> None:
+        self.path = path
+        self.lazy_images = lazy_images
+        # draw meshes referenced by many nodes instanced
+        self.instancing = instancing
+        # merge static meshes by material
+        self.batch = batch
+        # the scene draws only the nodes in the view frustum
+        self.culling = culling
+        # node boxes for the ray picking
+        self.picking = picking
+        self.phase = 'wait'
+        self.cancelled = threading.Event()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='load')
+        self.future: Future[LoadResult] = self.executor.submit(self._run)
+        self.executor.shutdown(wait=False)
+
+    def __str__(self) -> str:
+        return f'{self.path.name}: {self.phase}'
+
+    def _progress(self, phase: str):
+        if self.cancelled.is_set():
+            raise LoadCancelled(self.path)
+        self.phase = phase
+        logger.info(f'{self}')
+
+    def _run(self) -> LoadResult:
+        self._progress('parse')
+        import gltfio
+        data = gltfio.parse_path(self.path)
+
+        loader = GltfLoader(data)
+        scene = loader.load(lazy_images=self.lazy_images,
+                            progress=self._progress)
+        if self.instancing:
+            self._progress('instance')
+            loader.instance()
+        if self.batch:
+            self._progress('batch')
+            loader.batch()
+        if self.culling:
+            self._progress('bvh')
+            scene = loader.enable_culling()
+        else:
+            # world matrices of the graph without the hierarchy traversal
+            scene = loader.flatten()
+        if self.picking:
+            self._progress('pick')
+            loader.enable_picking()
+        self._progress('aabb')
+        aabb = loader.get_aabb()
+        self._progress('done')
+        return LoadResult(self.path, data, loader, scene, aabb)
+
+    def cancel(self):
+        '''
+        the worker stops at the next phase
+        '''
+        self.cancelled.set()
+        self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> Optional[LoadResult]:
+        '''
+        None if cancelled or failed
+        '''
+        if self.cancelled.is_set() or self.future.cancelled():
+            return None
+        try:
+            return self.future.result()
+        except LoadCancelled:
+            return None
+        except Exception as e:
+            logger.exception(e)
+            return None
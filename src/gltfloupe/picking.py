@@ -0,0 +1,245 @@
+'''
+CPU ray picking of the mesh nodes. numpy only, no GL.
+
+* NodeHit: the nearest triangle of the mesh nodes
+* TriangleBVH: bvh.BVH over the triangle boxes of a primitive.
+  built lazily in a background thread and shared by the nodes of the mesh.
+* Picker: the node boxes in the world space. the ray is transformed
+  to the local space of each hit node by the inverse world matrix.
+
+skinned meshes are picked in the bind pose.
+'''
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+import numpy as np
+from gltfio.parser import GltfData
+from gltfio.types import GltfPrimitive
+from . import bvh
+from .animation import as_float_array
+from .skinning import UNSIGNED
+
+logger = logging.getLogger(__name__)
+
+# triangles in a leaf
+TRIANGLE_LEAF_SIZE = 16
+# triangles tested at once. the rest is skipped if a nearer hit is found
+TRIANGLE_CHUNK = 256
+EPSILON = 1e-12
+
+
+class NodeHit(NamedTuple):
+    node: int
+    # distance in the unit of the ray direction
+    t: float
+    primitive: int
+    triangle: int
+
+
+def get_triangles(src: GltfPrimitive):
+    '''
+    (V, 3) positions and (T, 3) vertex indices
+    '''
+    positions = as_float_array(src.position)
+    if src.indices:
+        view = src.indices.scalar_view
+        indices = np.frombuffer(
+            view.cast('B'), dtype=UNSIGNED[view.format]).astype(np.int64)
+    else:
+        indices = np.arange(len(positions), dtype=np.int64)
+    count = len(indices) // 3
+    return positions, indices[:count * 3].reshape(-1, 3)
+
+
+def intersect_triangles(origin: np.ndarray, direction: np.ndarray,
+                        v0: np.ndarray, e1: np.ndarray, e2: np.ndarray) -> np.ndarray:
+    '''
+    (T,) distance of the ray to each triangle. inf if not hit. both sides
+
+    Moller-Trumbore. e1 = v1 - v0, e2 = v2 - v0
+    '''
+    p = np.cross(direction, e2)
+    det = np.einsum('ij,ij->i', e1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1 / det
+        s = origin - v0
+        u = np.einsum('ij,ij->i', s, p) * inverse
+        q = np.cross(s, e1)
+        v = q @ direction * inverse
+        t = np.einsum('ij,ij->i', e2, q) * inverse
+    hit = (np.abs(det) > EPSILON) & (u >= 0) & (
+        v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+class TriangleBVH:
+    def __init__(self, positions: np.ndarray, triangles: np.ndarray, leaf_size: int = TRIANGLE_LEAF_SIZE) -> None:
+        positions = np.asarray(positions, dtype=np.float32)
+        self.v0 = positions[triangles[:, 0]]
+        self.e1 = positions[triangles[:, 1]] - self.v0
+        self.e2 = positions[triangles[:, 2]] - self.v0
+        corners = positions[triangles]
+        self.bvh = bvh.BVH(corners.min(axis=1),
+                           corners.max(axis=1), leaf_size)
+
+    def __len__(self) -> int:
+        return len(self.v0)
+
+    def raycast(self, origin: np.ndarray, direction: np.ndarray):
+        '''
+        (t, triangle) of the nearest hit or None
+        '''
+        items, distances = self.bvh.intersect_ray(origin, direction)
+        best_t = np.inf
+        best = -1
+        for start in range(0, len(items), TRIANGLE_CHUNK):
+            if distances[start] > best_t:
+                # the boxes are sorted by the entry distance
+                break
+            chunk = items[start:start+TRIANGLE_CHUNK]
+            t = intersect_triangles(
+                origin, direction, self.v0[chunk], self.e1[chunk], self.e2[chunk])
+            i = int(np.argmin(t))
+            if t[i] < best_t:
+                best_t = float(t[i])
+                best = int(chunk[i])
+        if best < 0:
+            return None
+        return best_t, best
+
+
+def get_local_bounds(prims: Sequence[GltfPrimitive]):
+    '''
+    (3,) min and max of the primitives. the accessor min and max if exists
+    '''
+    mins = []
+    maxs = []
+    for prim in prims:
+        p0 = np.array(prim.position_min, dtype=np.float32)
+        p1 = np.array(prim.position_max, dtype=np.float32)
+        if not (np.isfinite(p0).all() and np.isfinite(p1).all()):
+            positions = as_float_array(prim.position)
+            p0 = positions.min(axis=0)
+            p1 = positions.max(axis=0)
+        mins.append(p0)
+        maxs.append(p1)
+    return np.min(mins, axis=0), np.max(maxs, axis=0)
+
+
+class Picker:
+    '''
+    pick returns None for the meshes while their BVHs are built.
+    call again while pending.
+    '''
+
+    def __init__(self, gltf: GltfData, world: np.ndarray, nodes: np.ndarray) -> None:
+        '''
+        world: (N, 4, 4) world matrices of all nodes
+        nodes: node indices to pick. with a mesh
+        '''
+        self.gltf = gltf
+        self.world = world
+        self.nodes = nodes
+        self.mesh_indices = np.array(
+            [gltf.nodes[i].mesh.index for i in nodes], dtype=np.int64)
+        # the skinned vertices are not moved by the node
+        self.skinned = np.array(
+            [gltf.nodes[i].skin is not None for i in nodes], dtype=bool)
+        bounds = {}
+        for mesh_index in set(self.mesh_indices.tolist()):
+            bounds[mesh_index] = get_local_bounds(
+                gltf.meshes[mesh_index].primitives)
+        self.local_mins = np.array(
+            [bounds[i][0] for i in self.mesh_indices], dtype=np.float32).reshape(-1, 3)
+        self.local_maxs = np.array(
+            [bounds[i][1] for i in self.mesh_indices], dtype=np.float32).reshape(-1, 3)
+        self.bvh = bvh.BVH(*bvh.transform_aabbs(
+            self.local_mins, self.local_maxs, self._get_matrices(np.arange(len(nodes)))))
+
+        self.lock = threading.Lock()
+        # triangle BVH of each primitive by mesh index
+        self.meshes: Dict[int, List[Optional[TriangleBVH]]] = {}
+        self.pending: Dict[int, Future] = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='pick')
+
+    def _get_matrices(self, items: np.ndarray) -> np.ndarray:
+        matrices = self.world[self.nodes[items]]
+        matrices[self.skinned[items]] = np.identity(4, dtype=np.float32)
+        return matrices
+
+    def refit(self, dynamic: np.ndarray):
+        '''
+        dynamic: bool of each picked node. the world matrix is changed
+        '''
+        items = np.flatnonzero(dynamic & ~self.skinned)
+        if not len(items):
+            return
+        mins = self.bvh.item_mins.copy()
+        maxs = self.bvh.item_maxs.copy()
+        mins[items], maxs[items] = bvh.transform_aabbs(
+            self.local_mins[items], self.local_maxs[items], self._get_matrices(items))
+        self.bvh.refit(mins, maxs)
+
+    def is_pending(self) -> bool:
+        with self.lock:
+            return bool(self.pending)
+
+    def request(self, mesh_index: int) -> Optional[List[Optional[TriangleBVH]]]:
+        '''
+        the triangle BVHs of the mesh. None while building
+        '''
+        with self.lock:
+            built = self.meshes.get(mesh_index)
+            if built is not None:
+                return built
+            if mesh_index not in self.pending:
+                self.pending[mesh_index] = self.executor.submit(
+                    self._build, mesh_index)
+            return None
+
+    def _build(self, mesh_index: int) -> List[Optional[TriangleBVH]]:
+        built: List[Optional[TriangleBVH]] = []
+        for prim in self.gltf.meshes[mesh_index].primitives:
+            try:
+                built.append(TriangleBVH(*get_triangles(prim)))
+            except Exception as e:
+                # not picked
+                logger.exception(e)
+                built.append(None)
+        with self.lock:
+            self.pending.pop(mesh_index, None)
+            self.meshes[mesh_index] = built
+        return built
+
+    def pick(self, origin, direction) -> Optional[NodeHit]:
+        '''
+        the nearest hit of the world space ray
+        '''
+        origin = np.array(origin, dtype=np.float64)
+        direction = np.array(direction, dtype=np.float64)
+        items, distances = self.bvh.intersect_ray(origin, direction)
+        hit: Optional[NodeHit] = None
+        for item, distance in zip(items.tolist(), distances.tolist()):
+            if hit and distance > hit.t:
+                break
+            prims = self.request(int(self.mesh_indices[item]))
+            if prims is None:
+                continue
+            # the ray in the local space. t is not changed by the affine transform
+            inverse = np.linalg.inv(
+                self._get_matrices(np.array([item]))[0].astype(np.float64))
+            local_origin = origin @ inverse[:3, :3] + inverse[3, :3]
+            local_direction = direction @ inverse[:3, :3]
+            for prim_index, triangles in enumerate(prims):
+                if not triangles:
+                    continue
+                result = triangles.raycast(local_origin, local_direction)
+                if result and (not hit or result[0] < hit.t):
+                    hit = NodeHit(int(self.nodes[item]),
+                                  result[0], prim_index, result[1])
+        return hit
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,43 @@
+'''
+local TRS of all nodes in one contiguous float32 array.
+
+row: [tx, ty, tz, rx, ry, rz, rw, sx, sy, sz]
+
+the TRS of each glglue Node is a ctypes view of its row,
+so animation can write all nodes at once with numpy.
+'''
+import numpy as np
+from glglue import ctypesmath
+
+STRIDE = 10
+TRANSLATION = 0
+ROTATION = 3
+SCALE = 7
+
+
+def new_pose(count: int) -> np.ndarray:
+    '''
+    identity TRS x count
+    '''
+    pose = np.zeros((count, STRIDE), dtype=np.float32)
+    pose[:, ROTATION+3] = 1
+    pose[:, SCALE:SCALE+3] = 1
+    return pose
+
+
+def bind_trs(pose: np.ndarray, index: int, src: ctypesmath.TRS) -> ctypesmath.TRS:
+    '''
+    copy src to pose[index] and return the TRS that is a view of pose[index]
+    '''
+    pose[index, TRANSLATION:TRANSLATION+3] = tuple(src.trnslation)
+    pose[index, ROTATION:ROTATION+4] = (
+        src.rotation.x, src.rotation.y, src.rotation.z, src.rotation.w)
+    pose[index, SCALE:SCALE+3] = tuple(src.scale)
+
+    offset = pose.strides[0] * index
+    itemsize = pose.itemsize
+    return ctypesmath.TRS(
+        ctypesmath.Float3.from_buffer(
+            pose, offset + TRANSLATION * itemsize),
+        ctypesmath.Quaternion.from_buffer(pose, offset + ROTATION * itemsize),
+        ctypesmath.Float3.from_buffer(pose, offset + SCALE * itemsize))
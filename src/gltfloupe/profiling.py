@@ -0,0 +1,64 @@
+'''
+timings of the load phases as records.
+
+PhaseTimer can be passed as the progress callback of GltfLoader.load.
+'''
+from typing import List, NamedTuple, Optional, TextIO, Iterable
+import time
+import json
+import csv
+import contextlib
+
+
+class Timing(NamedTuple):
+    file: str
+    phase: str
+    # total of count
+    seconds: float
+    count: int = 1
+
+
+class PhaseTimer:
+    def __init__(self, file: str = '') -> None:
+        self.file = file
+        self.records: List[Timing] = []
+        self._phase: Optional[str] = None
+        self._start = 0.0
+
+    def __call__(self, phase: str):
+        '''
+        end the current phase and start the next
+        '''
+        self.stop()
+        self._phase = phase
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self._phase:
+            self.records.append(Timing(self.file, self._phase,
+                                       time.perf_counter() - self._start))
+            self._phase = None
+
+    @contextlib.contextmanager
+    def measure(self, phase: str, count: int = 1):
+        '''
+        with timer.measure('set_time', len(frames)):
+            ...
+        '''
+        self.stop()
+        start = time.perf_counter()
+        yield
+        self.records.append(Timing(self.file, phase,
+                                   time.perf_counter() - start, count))
+
+
+def write_json(records: Iterable[Timing], w: TextIO):
+    json.dump([record._asdict() for record in records], w, indent=2)
+    w.write('\n')
+
+
+def write_csv(records: Iterable[Timing], w: TextIO):
+    writer = csv.writer(w, lineterminator='\n')
+    writer.writerow(Timing._fields)
+    for record in records:
+        writer.writerow(record)
@@ -0,0 +1,106 @@
+'''
+reverse reference index of the glTF json.
+
+every index typed field is listed in REFERENCES as a key path pattern.
+the json is walked once per pattern and the references are kept in both directions.
+
+ref from: ('meshes', 0) => [('nodes', 3, 'mesh'), ...]
+ref to: ('nodes', 3) => [('meshes', 0), ...]
+'''
+from typing import Any, Dict, Iterator, List, Tuple
+from collections import defaultdict
+from .keypath import INDEX, ANY
+
+
+REFERENCES: List[Tuple[tuple, str]] = [
+    (('scene',), 'scenes'),
+    (('scenes', INDEX, 'nodes', INDEX), 'nodes'),
+    (('nodes', INDEX, 'children', INDEX), 'nodes'),
+    (('nodes', INDEX, 'mesh'), 'meshes'),
+    (('nodes', INDEX, 'skin'), 'skins'),
+    (('nodes', INDEX, 'camera'), 'cameras'),
+    (('meshes', INDEX, 'primitives', INDEX, 'material'), 'materials'),
+    (('meshes', INDEX, 'primitives', INDEX, 'indices'), 'accessors'),
+    (('meshes', INDEX, 'primitives', INDEX, 'attributes', ANY), 'accessors'),
+    (('meshes', INDEX, 'primitives', INDEX, 'targets', INDEX, ANY), 'accessors'),
+    (('skins', INDEX, 'skeleton'), 'nodes'),
+    (('skins', INDEX, 'joints', INDEX), 'nodes'),
+    (('skins', INDEX, 'inverseBindMatrices'), 'accessors'),
+    (('accessors', INDEX, 'bufferView'), 'bufferViews'),
+    (('accessors', INDEX, 'sparse', 'indices', 'bufferView'), 'bufferViews'),
+    (('accessors', INDEX, 'sparse', 'values', 'bufferView'), 'bufferViews'),
+    (('bufferViews', INDEX, 'buffer'), 'buffers'),
+    (('images', INDEX, 'bufferView'), 'bufferViews'),
+    (('textures', INDEX, 'source'), 'images'),
+    (('textures', INDEX, 'sampler'), 'samplers'),
+    # EXT_texture_webp, KHR_texture_basisu
+    (('textures', INDEX, 'extensions', ANY, 'source'), 'images'),
+    (('materials', INDEX, 'pbrMetallicRoughness', ANY, 'index'), 'textures'),
+    (('materials', INDEX, 'normalTexture', 'index'), 'textures'),
+    (('materials', INDEX, 'occlusionTexture', 'index'), 'textures'),
+    (('materials', INDEX, 'emissiveTexture', 'index'), 'textures'),
+    # KHR_materials_*
+    (('materials', INDEX, 'extensions', ANY, ANY, 'index'), 'textures'),
+    (('animations', INDEX, 'channels', INDEX, 'target', 'node'), 'nodes'),
+    (('animations', INDEX, 'samplers', INDEX, 'input'), 'accessors'),
+    (('animations', INDEX, 'samplers', INDEX, 'output'), 'accessors'),
+]
+
+
+def iter_pattern(json: Any, pattern: tuple) -> Iterator[Tuple[tuple, Any]]:
+    '''
+    key paths and values that match the pattern. without recursion
+    '''
+    stack = [((), json, 0)]
+    while stack:
+        keys, current, depth = stack.pop()
+        if depth == len(pattern):
+            yield keys, current
+            continue
+        key = pattern[depth]
+        if key == INDEX:
+            if isinstance(current, list):
+                for i in reversed(range(len(current))):
+                    stack.append((keys + (i,), current[i], depth + 1))
+        elif key == ANY:
+            if isinstance(current, dict):
+                for k, v in reversed(list(current.items())):
+                    stack.append((keys + (k,), v, depth + 1))
+        elif isinstance(current, dict) and key in current:
+            stack.append((keys + (key,), current[key], depth + 1))
+
+
+def get_owner(keys: tuple) -> tuple:
+    '''
+    the top level object that has the field. ('nodes', 3, 'mesh') => ('nodes', 3)
+    '''
+    return keys[:2]
+
+
+class RefIndex:
+    def __init__(self, gltf: dict) -> None:
+        # (collection, index) => field key paths
+        self._from: Dict[tuple, List[tuple]] = defaultdict(list)
+        # owner => (collection, index)
+        self._to: Dict[tuple, List[tuple]] = defaultdict(list)
+        for pattern, collection in REFERENCES:
+            for keys, value in iter_pattern(gltf, pattern):
+                if isinstance(value, int) and not isinstance(value, bool):
+                    target = (collection, value)
+                    self._from[target].append(keys)
+                    self._to[get_owner(keys)].append(target)
+
+    def __len__(self) -> int:
+        return sum(len(fields) for fields in self._from.values())
+
+    def ref_from(self, keys: tuple) -> List[tuple]:
+        '''
+        field key paths that refer the object. keys is (collection, index)
+        '''
+        return self._from.get(keys, [])
+
+    def ref_to(self, keys: tuple) -> List[tuple]:
+        '''
+        (collection, index) that the object refers
+        '''
+        return self._to.get(keys, [])
@@ -0,0 +1,154 @@
+'''
+node hierarchy flattened to arrays.
+
+indexed by the glTF node index.
+
+* parents: (N,) parent node index. -1 is a root
+* local, world: (N, 4, 4) float32. row vector layout same as glglue Mat4
+
+world is calculated level by level from the roots with one batched matmul
+per level. no recursion, so the depth of the hierarchy is not limited.
+'''
+from typing import List, Sequence, Iterable, Optional
+import numpy as np
+from .pose import TRANSLATION, ROTATION, SCALE
+
+
+def get_parents(children: Sequence[Sequence[int]]) -> List[int]:
+    '''
+    children of each node to parent of each node
+    '''
+    parents = [-1] * len(children)
+    for i, node_children in enumerate(children):
+        for child in node_children:
+            parents[child] = i
+    return parents
+
+
+def trs_to_matrix(pose: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    '''
+    pose rows (M, 10) to (M, 4, 4) matrices. S * R * T
+    '''
+    if out is None:
+        out = np.empty((len(pose), 4, 4), dtype=np.float32)
+    x = pose[:, ROTATION]
+    y = pose[:, ROTATION+1]
+    z = pose[:, ROTATION+2]
+    w = pose[:, ROTATION+3]
+    xx = x * x
+    yy = y * y
+    zz = z * z
+    ww = w * w
+    xy = x * y
+    yz = y * z
+    zx = z * x
+    wx = w * x
+    wy = w * y
+    wz = w * z
+    sx = pose[:, SCALE, None]
+    sy = pose[:, SCALE+1, None]
+    sz = pose[:, SCALE+2, None]
+    out[:, 0, :3] = np.stack(
+        [xx-yy-zz+ww, 2*xy+2*wz, 2*zx-2*wy], axis=1) * sx
+    out[:, 1, :3] = np.stack(
+        [2*xy-2*wz, -xx+yy-zz+ww, 2*yz+2*wx], axis=1) * sy
+    out[:, 2, :3] = np.stack(
+        [2*zx+2*wy, 2*yz-2*wx, -xx-yy+zz+ww], axis=1) * sz
+    out[:, :3, 3] = 0
+    out[:, 3, :3] = pose[:, TRANSLATION:TRANSLATION+3]
+    out[:, 3, 3] = 1
+    return out
+
+
+class SceneGraph:
+    def __init__(self, parents: Sequence[int]) -> None:
+        self.parents = np.array(parents, dtype=np.int64).reshape(-1)
+        count = len(self.parents)
+
+        # children of each node. sorted by parent
+        children = np.argsort(self.parents, kind='stable')
+        child_counts = np.bincount(
+            self.parents[self.parents >= 0], minlength=count)
+        child_offsets = np.zeros(count, dtype=np.int64)
+        child_offsets[1:] = np.cumsum(child_counts)[:-1]
+        # skip roots in the sorted children
+        child_offsets += np.count_nonzero(self.parents < 0)
+
+        # breadth first. nodes in a cycle are not reached
+        self.levels: List[np.ndarray] = []
+        level = np.flatnonzero(self.parents < 0)
+        while len(level):
+            self.levels.append(level)
+            counts = child_counts[level]
+            total = int(counts.sum())
+            if total == 0:
+                break
+            # concatenate children ranges of the level
+            starts = np.repeat(child_offsets[level], counts)
+            steps = np.arange(total) - \
+                np.repeat(np.cumsum(counts) - counts, counts)
+            level = children[starts + steps]
+        self.order = np.concatenate(self.levels) if self.levels else np.zeros(
+            0, dtype=np.int64)
+
+        self.local = np.zeros((count, 4, 4), dtype=np.float32)
+        self.local[:] = np.eye(4, dtype=np.float32)
+        self.world = self.local.copy()
+        # local is from the pose
+        self.is_trs = np.zeros(count, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    @property
+    def depth(self) -> int:
+        return len(self.levels)
+
+    def set_matrix(self, index: int, matrix: Sequence[float]):
+        self.local[index] = np.array(
+            matrix, dtype=np.float32).reshape(4, 4)
+        self.is_trs[index] = False
+
+    def set_trs(self, index: int):
+        self.is_trs[index] = True
+
+    def update_local(self, pose: np.ndarray, indices: Optional[np.ndarray] = None):
+        '''
+        local matrices of TRS nodes from the pose
+        '''
+        if indices is None:
+            indices = np.flatnonzero(self.is_trs)
+        else:
+            indices = indices[self.is_trs[indices]]
+        if len(indices):
+            self.local[indices] = trs_to_matrix(pose[indices])
+
+    def get_subtree_levels(self, roots: Iterable[int]) -> List[np.ndarray]:
+        '''
+        levels restricted to the roots and their descendants
+        '''
+        mask = np.zeros(len(self), dtype=bool)
+        mask[list(roots)] = True
+        levels = []
+        for i, level in enumerate(self.levels):
+            if i > 0:
+                mask[level] |= mask[self.parents[level]]
+            selected = level[mask[level]]
+            if len(selected):
+                levels.append(selected)
+        return levels
+
+    def calc_world(self, levels: Optional[List[np.ndarray]] = None):
+        '''
+        world = local * parent world, from roots to leaves
+        '''
+        if levels is None:
+            levels = self.levels
+        for level in levels:
+            parents = self.parents[level]
+            if parents[0] < 0:
+                # the first level of the graph is roots only
+                self.world[level] = self.local[level]
+            else:
+                self.world[level] = np.matmul(
+                    self.local[level], self.world[parents])
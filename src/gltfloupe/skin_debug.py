@@ -1,40 +1,57 @@
-import math
-from typing import Tuple
-from gltfio.types import GltfNode
 from gltfio.parser import GltfData
 from .gltf_loader import GltfLoader
+from . import skin_validation
 
 
 def tuple_3f(x, y, z):
     return f'({x:.3f}, {y:.3f}, {z:.3f})'
 
 
+def format_weights(anomalies: skin_validation.WeightAnomalies) -> str:
+    return (f'meshes[{anomalies.mesh}].primitives[{anomalies.primitive}]: {anomalies.vertex_count} vertices'
+            f', sum != 1: {len(anomalies.bad_sum)}'
+            f', negative: {len(anomalies.negative)}'
+            f', NaN/Inf: {len(anomalies.non_finite)}'
+            f', out of range: {len(anomalies.out_of_range)}')
+
+
+def format_joint(data: GltfData, result: skin_validation.SkinValidation, i: int, loader: GltfLoader) -> str:
+    '''
+    the current world position of the joint.
+    the bind error is of the rest pose
+    '''
+    joint = int(result.joints[i])
+    name = data.nodes[joint].name
+    error = result.bind_error[i]
+    validation = '' if error <= skin_validation.MATRIX_THRESHOLD else f' IBM x world != I ({error:.3f})'
+    used = '' if result.used[i] else ' (not used)'
+    return f'[{joint}:{name}] {tuple_3f(*loader.graph.world[joint, 3, :3])}{validation}{used}'
+
+
 def get_debug_info(data: GltfData, skin_index: int, loader: GltfLoader):
-    skin = data.gltf['skins'][skin_index]
-    joints = skin['joints']
-
-    matrices_index = skin['inverseBindMatrices']
-    matrices = data.buffer_reader.read_accessor(matrices_index)
-    if matrices.get_count() != len(joints):
-        raise Exception()
-
-    text = ''
-    for i, joint in enumerate(joints):
-        matrix = matrices.get_item(i)
-
-        node = loader.nodes[joint]
-        world = node.world_matrix
-        mp = (matrix[12], matrix[13], matrix[14])
-        wp = (world._41, world._42, world._43)
-
-        validation = ''
-        EPS = 1e-5
-        if math.fabs(mp[0] + wp[0]) > EPS:
-            validation += 'X'
-        if math.fabs(mp[1] + wp[1]) > EPS:
-            validation += 'Y'
-        if math.fabs(mp[2] + wp[2]) > EPS:
-            validation += 'Z'
-
-        text += f'[{joint}:{node.name}] {tuple_3f(*mp)}, {tuple_3f(*wp)}{validation}\n'
-    return text
+    # the rest pose. the animated world is not the bind pose
+    result = skin_validation.validate_skin(data, skin_index)
+    lines = [format_joint(data, result, i, loader)
+             for i in range(len(result.joints))]
+    for anomalies in result.weights:
+        lines.append(format_weights(anomalies))
+    return '\n'.join(lines) + '\n'
+
+
+def get_node_debug_info(data: GltfData, node_index: int, loader: GltfLoader):
+    '''
+    the joints used by the mesh of the skinned node
+    '''
+    node = data.nodes[node_index]
+    assert node.mesh and node.skin
+    result = skin_validation.validate_skin(data, node.skin.index)
+    used = set()
+    for prim in node.mesh.primitives:
+        used.update(skin_validation.primitive_used_joints(prim).tolist())
+    # out of range joint indices are in the weight anomalies
+    lines = [format_joint(data, result, i, loader)
+             for i in sorted(used) if i < len(result.joints)]
+    for anomalies in result.weights:
+        if anomalies.mesh == node.mesh.index:
+            lines.append(format_weights(anomalies))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,151 @@
+'''
+skin validation with numpy.
+
+* inverseBindMatrix x joint world is the identity in the rest pose
+* the joints used by the vertices (weight > 0)
+* weight anomalies. sum is not 1, negative, NaN, joint index out of range
+
+matrices are the row vector layout same as skinning.py.
+'''
+from typing import List, NamedTuple, Optional
+import numpy as np
+from gltfio.parser import GltfData
+from gltfio.types import GltfPrimitive
+from .animation import as_float_array
+from .accessor_stats import THRESHOLD
+from .skinning import as_joint_array, as_weight_array
+from .scene_graph import SceneGraph, get_parents
+from . import pose
+
+# max abs deviation of IBM x world from the identity
+MATRIX_THRESHOLD = 1e-3
+
+
+class WeightAnomalies(NamedTuple):
+    mesh: int
+    primitive: int
+    vertex_count: int
+    # vertex indices
+    bad_sum: np.ndarray
+    negative: np.ndarray
+    non_finite: np.ndarray
+    # weight > 0 and joint index >= joint count
+    out_of_range: np.ndarray
+
+    @property
+    def is_valid(self) -> bool:
+        return not (len(self.bad_sum) or len(self.negative) or len(self.non_finite) or len(self.out_of_range))
+
+
+class SkinValidation(NamedTuple):
+    skin: int
+    # node index of each joint
+    joints: np.ndarray
+    # (J, 4, 4) IBM x world
+    bind: np.ndarray
+    # (J,) max abs deviation of bind from the identity
+    bind_error: np.ndarray
+    # (J,) joint is used by a vertex
+    used: np.ndarray
+    weights: List[WeightAnomalies]
+
+    @property
+    def bad_joints(self) -> np.ndarray:
+        '''
+        joint indices that IBM is not the inverse of the world
+        '''
+        return np.flatnonzero(~(self.bind_error <= MATRIX_THRESHOLD))
+
+    @property
+    def is_valid(self) -> bool:
+        return len(self.bad_joints) == 0 and all(w.is_valid for w in self.weights)
+
+
+def get_rest_world(data: GltfData) -> np.ndarray:
+    '''
+    (N, 4, 4) world matrices of the nodes without animation
+    '''
+    graph = SceneGraph(get_parents(
+        [[child.index for child in node.children] for node in data.nodes]))
+    rest = pose.new_pose(len(data.nodes))
+    for node in data.nodes:
+        if node.matrix:
+            graph.set_matrix(node.index, node.matrix)
+            continue
+        graph.set_trs(node.index)
+        if node.translation:
+            rest[node.index, pose.TRANSLATION:pose.TRANSLATION+3] = node.translation
+        if node.rotation:
+            rest[node.index, pose.ROTATION:pose.ROTATION+4] = node.rotation
+        if node.scale:
+            rest[node.index, pose.SCALE:pose.SCALE+3] = node.scale
+    graph.update_local(rest)
+    graph.calc_world()
+    return graph.world
+
+
+def used_joints(joints: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    '''
+    sorted joint indices that have weight > 0
+    '''
+    return np.unique(joints[weights > 0])
+
+
+def check_weights(mesh: int, primitive: int, joints: np.ndarray, weights: np.ndarray, joint_count: int) -> WeightAnomalies:
+    finite = np.isfinite(weights)
+    non_finite = np.flatnonzero(~finite.all(axis=1))
+    sums = np.where(finite, weights, 0).sum(axis=1, dtype=np.float64)
+    bad_sum = np.flatnonzero(~(np.abs(sums - 1) <= THRESHOLD))
+    negative = np.flatnonzero((weights < 0).any(axis=1))
+    out_of_range = np.flatnonzero(
+        ((weights > 0) & (joints >= joint_count)).any(axis=1))
+    return WeightAnomalies(mesh, primitive, len(weights), bad_sum, negative, non_finite, out_of_range)
+
+
+def _skinned_primitives(data: GltfData, skin_index: int):
+    meshes = set()
+    for node in data.nodes:
+        if node.mesh and node.skin and node.skin.index == skin_index and node.mesh.index not in meshes:
+            meshes.add(node.mesh.index)
+            for i, prim in enumerate(node.mesh.primitives):
+                if prim.joints and prim.weights:
+                    yield node.mesh.index, i, prim
+
+
+def validate_skin(data: GltfData, skin_index: int, world: Optional[np.ndarray] = None) -> SkinValidation:
+    '''
+    world: (N, 4, 4) world matrices of the nodes. the rest pose if None
+    '''
+    if world is None:
+        world = get_rest_world(data)
+    skin = data.skins[skin_index]
+    joints = np.array([joint.index for joint in skin.joints], dtype=np.int64)
+    count = len(joints)
+    identity = np.eye(4, dtype=np.float32)
+    if skin.inverse_bind_matrices:
+        ibm = as_float_array(skin.inverse_bind_matrices).reshape(count, 4, 4)
+    else:
+        ibm = np.broadcast_to(identity, (count, 4, 4))
+    bind = ibm @ world[joints]
+    bind_error = np.abs(bind - identity).max(axis=(1, 2)) if count else np.zeros(0)
+
+    used = np.zeros(count, dtype=bool)
+    anomalies: List[WeightAnomalies] = []
+    for mesh_index, prim_index, prim in _skinned_primitives(data, skin_index):
+        assert prim.joints and prim.weights
+        j = as_joint_array(prim.joints)
+        w = as_weight_array(prim.weights)
+        indices = used_joints(j, w)
+        used[indices[indices < count]] = True
+        anomalies.append(check_weights(mesh_index, prim_index, j, w, count))
+
+    return SkinValidation(skin_index, joints, bind, bind_error, used, anomalies)
+
+
+def primitive_used_joints(prim: GltfPrimitive) -> np.ndarray:
+    '''
+    joint indices of the primitive that have weight > 0
+    '''
+    if not prim.joints or not prim.weights:
+        return np.zeros(0, dtype=np.int64)
+    return used_joints(as_joint_array(prim.joints), as_weight_array(prim.weights))
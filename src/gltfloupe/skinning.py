@@ -0,0 +1,106 @@
+'''
+CPU skinning with numpy.
+
+matrices are the row vector layout same as scene_graph.py.
+so the glTF column major matrix is read as is.
+
+joint matrix = inverseBindMatrix * joint world * inverse(mesh node world)
+
+https://registry.khronos.org/glTF/specs/2.0/glTF-2.0.html#skins
+'''
+from typing import Optional, Sequence
+import numpy as np
+from gltfio.types import GltfAccessorSlice
+from .animation import as_float_array
+
+# gltfio reads UNSIGNED_BYTE as 'b'
+UNSIGNED = {
+    'b': np.uint8,
+    'B': np.uint8,
+    'H': np.uint16,
+    'I': np.uint32,
+}
+
+
+def as_joint_array(src: GltfAccessorSlice) -> np.ndarray:
+    '''
+    (count, 4) joint index array of JOINTS_0
+    '''
+    view = src.scalar_view
+    values = np.frombuffer(view.cast('B'), dtype=UNSIGNED[view.format])
+    return values.reshape(-1, src.element_count)
+
+
+def as_weight_array(src: GltfAccessorSlice) -> np.ndarray:
+    '''
+    (count, 4) float32 array of WEIGHTS_0
+    '''
+    view = src.scalar_view
+    if view.format == 'b':
+        values = np.frombuffer(view.cast('B'), dtype=np.uint8).astype(
+            np.float32) / 255.0
+        return values.reshape(-1, src.element_count)
+    return as_float_array(src)
+
+
+class SkinJoints:
+    '''
+    joint matrices of a skin
+    '''
+
+    def __init__(self, joints: Sequence[int], inverse_bind_matrices: Optional[np.ndarray] = None) -> None:
+        self.joints = np.array(joints, dtype=np.int64)
+        count = len(self.joints)
+        if inverse_bind_matrices is None:
+            self.inverse_bind_matrices = np.zeros(
+                (count, 4, 4), dtype=np.float32)
+            self.inverse_bind_matrices[:] = np.eye(4, dtype=np.float32)
+        else:
+            self.inverse_bind_matrices = inverse_bind_matrices.reshape(
+                count, 4, 4)
+        # update buffers
+        self._world = np.zeros((count, 4, 4), dtype=np.float32)
+        self._matrices = np.zeros((count, 4, 4), dtype=np.float32)
+        # without the last column. (0, 0, 0, 1)
+        self.matrices = np.zeros((count, 4, 3), dtype=np.float32)
+
+    def update(self, world: np.ndarray, mesh_world: np.ndarray) -> np.ndarray:
+        '''
+        world: (N, 4, 4) world matrices of nodes
+        mesh_world: (4, 4) world matrix of the skinned mesh node
+        '''
+        np.take(world, self.joints, axis=0, out=self._world)
+        np.matmul(self.inverse_bind_matrices, self._world, out=self._matrices)
+        np.matmul(self._matrices, np.linalg.inv(mesh_world),
+                  out=self._matrices)
+        self.matrices[:] = self._matrices[:, :, :3]
+        return self.matrices
+
+
+class SkinnedPrimitive:
+    '''
+    skinned positions of a primitive. positions is the vertex buffer source
+    '''
+
+    def __init__(self, positions: np.ndarray, joints: np.ndarray, weights: np.ndarray) -> None:
+        count = len(positions)
+        assert joints.shape == (count, 4)
+        assert weights.shape == (count, 4)
+        self.joints = joints.astype(np.intp)
+        # homogeneous bind pose x weight of each influence. (V, 4, 4)
+        bind_positions = np.ones((count, 4), dtype=np.float32)
+        bind_positions[:, :3] = positions
+        self.weighted = weights.astype(np.float32)[
+            :, :, None] * bind_positions[:, None, :]
+        # update buffers
+        self._gather = np.zeros((count, 4, 4, 3), dtype=np.float32)
+        self.positions = np.array(positions, dtype=np.float32)
+
+    def update(self, matrices: np.ndarray) -> np.ndarray:
+        '''
+        matrices: (J, 4, 3) of SkinJoints
+        '''
+        np.take(matrices, self.joints, axis=0, out=self._gather)
+        np.einsum('vki,vkij->vj', self.weighted,
+                  self._gather, out=self.positions)
+        return self.positions
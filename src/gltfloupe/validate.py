@@ -0,0 +1,225 @@
+'''
+validate many files without a window.
+
+python -m gltfloupe validate [--jobs N] [--timeout seconds] [--max-memory MB] [--output path] files or folders...
+
+files are validated in a process pool and the results are written as json lines
+in the order of completion.
+
+* skins. IBM x joint world in the rest pose, weight anomalies (skin_validation)
+* POSITION bounds. accessor values vs min/max
+'''
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import sys
+import json
+import time
+import signal
+import pathlib
+import argparse
+import logging
+import multiprocessing
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.gltf', '.glb', '.vrm')
+# worker process is replaced after this count to release the memory
+TASKS_PER_CHILD = 16
+# POSITION min/max tolerance
+BOUNDS_THRESHOLD = 1e-4
+# vertex indices in the result
+SAMPLE_COUNT = 8
+
+
+class FileTimeout(Exception):
+    pass
+
+
+def iter_files(paths: Iterable[pathlib.Path]) -> Iterator[pathlib.Path]:
+    for path in paths:
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                if child.suffix.lower() in EXTENSIONS:
+                    yield child
+        else:
+            yield path
+
+
+def _sample(indices: np.ndarray) -> dict:
+    return {'count': len(indices), 'first': indices[:SAMPLE_COUNT].tolist()}
+
+
+def check_skins(data) -> List[dict]:
+    from .skin_validation import validate_skin, get_rest_world
+
+    results = []
+    world = get_rest_world(data) if data.skins else None
+    for skin in data.skins:
+        result = validate_skin(data, skin.index, world)
+        bad_joints = result.bad_joints
+        results.append({
+            'skin': skin.index,
+            'valid': result.is_valid,
+            'joints': len(result.joints),
+            'unused_joints': int(np.count_nonzero(~result.used)),
+            'bad_joints': [{'joint': int(i), 'node': int(result.joints[i]), 'error': float(result.bind_error[i])}
+                           for i in bad_joints[:SAMPLE_COUNT]],
+            'bad_joint_count': len(bad_joints),
+            'weights': [{
+                'mesh': w.mesh,
+                'primitive': w.primitive,
+                'vertices': w.vertex_count,
+                'bad_sum': _sample(w.bad_sum),
+                'negative': _sample(w.negative),
+                'non_finite': _sample(w.non_finite),
+                'out_of_range': _sample(w.out_of_range),
+            } for w in result.weights if not w.is_valid],
+        })
+    return results
+
+
+def check_bounds(data) -> List[dict]:
+    '''
+    POSITION values out of the min/max of the accessor
+    '''
+    from .animation import as_float_array
+
+    results = []
+    for mesh in data.meshes:
+        for i, prim in enumerate(mesh.primitives):
+            positions = as_float_array(prim.position)
+            if not len(positions):
+                continue
+            actual_min = positions.min(axis=0)
+            actual_max = positions.max(axis=0)
+            expected_min = np.array(tuple(prim.position_min))
+            expected_max = np.array(tuple(prim.position_max))
+            if (np.abs(actual_min - expected_min) > BOUNDS_THRESHOLD).any() or (np.abs(actual_max - expected_max) > BOUNDS_THRESHOLD).any():
+                results.append({
+                    'mesh': mesh.index,
+                    'primitive': i,
+                    'min': expected_min.tolist(),
+                    'max': expected_max.tolist(),
+                    'actual_min': actual_min.tolist(),
+                    'actual_max': actual_max.tolist(),
+                })
+    return results
+
+
+def validate_file(path: pathlib.Path) -> Dict[str, Any]:
+    import gltfio
+
+    data = gltfio.parse_path(path)
+    skins = check_skins(data)
+    bounds = check_bounds(data)
+    return {
+        'valid': all(skin['valid'] for skin in skins) and not bounds,
+        'skins': skins,
+        'bounds': bounds,
+    }
+
+
+def _on_alarm(signum, frame):
+    raise FileTimeout()
+
+
+def _limit_memory(max_memory: Optional[int]) -> Optional[Tuple[int, int]]:
+    '''
+    set the soft RLIMIT_AS. return the previous limits to restore
+    '''
+    if not max_memory:
+        return None
+    try:
+        import resource
+        previous = resource.getrlimit(resource.RLIMIT_AS)
+        limit = max_memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, previous[1]))
+        return previous
+    except (ImportError, ValueError) as e:
+        logger.warning(f'max memory: {e}')
+        return None
+
+
+def _restore_memory(previous: Optional[Tuple[int, int]]):
+    if previous:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, previous)
+
+
+def _init_worker(max_memory: Optional[int]):
+    _limit_memory(max_memory)
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _worker(args) -> Dict[str, Any]:
+    path, timeout = args
+    start = time.perf_counter()
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = validate_file(path)
+    except FileTimeout:
+        result = {'valid': False, 'error': f'timeout {timeout}s'}
+    except MemoryError:
+        result = {'valid': False, 'error': 'out of memory'}
+    except Exception as e:
+        result = {'valid': False, 'error': f'{type(e).__name__}: {e}'}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return {'file': str(path), **result, 'seconds': time.perf_counter() - start}
+
+
+def validate(paths: Iterable[pathlib.Path], jobs: Optional[int] = None, timeout: Optional[float] = None,
+             max_memory: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    '''
+    result of each file in the order of completion.
+    the timeout is checked between python byte codes in the worker.
+    '''
+    tasks = [(path, timeout) for path in iter_files(paths)]
+    if jobs == 1:
+        # in this process. the memory limit and the alarm handler are restored
+        previous_limit = _limit_memory(max_memory)
+        previous_handler = signal.signal(
+            signal.SIGALRM, _on_alarm) if hasattr(signal, 'SIGALRM') else None
+        try:
+            for task in tasks:
+                yield _worker(task)
+        finally:
+            if hasattr(signal, 'SIGALRM'):
+                signal.signal(signal.SIGALRM, previous_handler)
+            _restore_memory(previous_limit)
+        return
+
+    with multiprocessing.Pool(jobs, _init_worker, (max_memory,), maxtasksperchild=TASKS_PER_CHILD) as pool:
+        yield from pool.imap_unordered(_worker, tasks)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog='gltfloupe validate')
+    parser.add_argument('files', nargs='+', type=pathlib.Path,
+                        help='files or folders')
+    parser.add_argument('--jobs', type=int,
+                        help='worker processes. cpu count if omitted')
+    parser.add_argument('--timeout', type=float,
+                        help='seconds per file')
+    parser.add_argument('--max-memory', type=int,
+                        help='MB per worker process. this process with --jobs 1')
+    parser.add_argument('--output', type=pathlib.Path)
+    args = parser.parse_args(argv)
+
+    w = args.output.open('w') if args.output else sys.stdout
+    invalid = 0
+    try:
+        for result in validate(args.files, args.jobs, args.timeout, args.max_memory):
+            if not result['valid']:
+                invalid += 1
+            w.write(json.dumps(result))
+            w.write('\n')
+            w.flush()
+    finally:
+        if args.output:
+            w.close()
+    return 1 if invalid else 0
@@ -0,0 +1,16 @@
+'''
+fixtures shared by the animation tests
+'''
+import numpy as np
+from glglue import ctypesmath
+from glglue.scene.node import Node
+
+
+def create_node() -> Node:
+    return Node('node', ctypesmath.TRS(ctypesmath.Float3(0, 0, 0),
+                                       ctypesmath.Quaternion(0, 0, 0, 1),
+                                       ctypesmath.Float3(1, 1, 1)))
+
+
+def float32(*values) -> np.ndarray:
+    return np.array(values, dtype=np.float32)
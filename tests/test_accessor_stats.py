@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from gltfio.types import GltfAccessorSlice
+from gltfloupe.accessor_stats import compute, StatsCache
+
+
+def create_slice(values: np.ndarray) -> GltfAccessorSlice:
+    return GltfAccessorSlice(memoryview(values.tobytes()).cast(values.dtype.char), values.shape[1])
+
+
+class TestAccessorStats(unittest.TestCase):
+
+    def test_min_max(self):
+        stats = compute(create_slice(np.array(
+            [[0, 1, 2], [3, np.nan, -1], [1, np.inf, 0]], dtype=np.float32)))
+        self.assertEqual(3, stats.count)
+        self.assertEqual([0, 1, -1], stats.min.tolist())
+        self.assertEqual([3, 1, 2], stats.max.tolist())
+        self.assertEqual(2, stats.non_finite)
+        self.assertIsNone(stats.bad_rows)
+
+        # UNSIGNED_SHORT indices
+        stats = compute(create_slice(
+            np.array([[0], [65535], [3]], dtype=np.uint16)))
+        self.assertEqual([0], stats.min.tolist())
+        self.assertEqual([65535], stats.max.tolist())
+
+    def test_weights(self):
+        weights = np.array([[1, 0, 0, 0], [0.5, 0.5, 0, 0], [
+                           0.5, 0.4, 0, 0], [np.nan, 0, 0, 0]], dtype=np.float32)
+        stats = compute(create_slice(weights), is_weights=True)
+        assert stats.sums is not None and stats.bad_rows is not None
+        self.assertEqual([2, 3], stats.bad_rows.tolist())
+        self.assertAlmostEqual(0.9, stats.sums[2], places=5)
+
+        # UNSIGNED_BYTE normalized. gltfio format 'b'
+        data = np.array([[255, 0, 0, 0], [128, 127, 0, 0]], dtype=np.uint8)
+        stats = compute(GltfAccessorSlice(
+            memoryview(data.tobytes()).cast('b'), 4), is_weights=True)
+        assert stats.bad_rows is not None
+        self.assertEqual([], stats.bad_rows.tolist())
+
+    def test_cache(self):
+        cache = StatsCache()
+        view = create_slice(np.zeros((4, 3), dtype=np.float32))
+        self.assertIs(cache.get(0, view), cache.get(0, view))
+
+        # the same accessor as WEIGHTS_0 after the plain view
+        weights = create_slice(np.array([[1, 0, 0, 0], [0.5, 0.4, 0, 0]], dtype=np.float32))
+        self.assertIsNone(cache.get(5, weights, False).bad_rows)
+        stats = cache.get(5, weights, True)
+        assert stats.bad_rows is not None and stats.sums is not None
+        self.assertEqual([1], stats.bad_rows.tolist())
+        self.assertIs(stats, cache.get(5, weights, True))
+
+    def test_million(self):
+        rng = np.random.default_rng(0)
+        weights = rng.random((1_000_000, 4), dtype=np.float32)
+        weights /= weights.sum(axis=1, keepdims=True)
+        weights[12345] = 0
+        stats = compute(create_slice(weights), is_weights=True)
+        assert stats.bad_rows is not None
+        self.assertEqual([12345], stats.bad_rows.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import unittest
+import math
+import json
+import base64
+import numpy as np
+from glglue.scene.node import Node
+from gltfio.types import GltfAccessorSlice, GltfAnimationInterpolation
+from gltfio.parser import parse_gltf
+from helpers import create_node, float32
+from gltfloupe.animation import TranslationCurve, RotationCurve, ChannelPack, as_float_array
+from gltfloupe import pose, interpolation
+
+
+def parse_sampler_output(output: np.ndarray, component_type: int) -> GltfAccessorSlice:
+    '''
+    normalized rotation output of an animation sampler. (count, 4)
+    '''
+    times = np.arange(len(output), dtype=np.float32)
+    bin = times.tobytes() + output.tobytes()
+    gltf = {
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{}],
+        'animations': [{
+            'channels': [{'sampler': 0, 'target': {'node': 0, 'path': 'rotation'}}],
+            'samplers': [{'input': 0, 'output': 1}]}],
+        'buffers': [{'byteLength': len(bin),
+                     'uri': 'data:application/octet-stream;base64,' + base64.b64encode(bin).decode()}],
+        'bufferViews': [{'buffer': 0, 'byteOffset': 0, 'byteLength': times.nbytes},
+                        {'buffer': 0, 'byteOffset': times.nbytes, 'byteLength': output.nbytes}],
+        'accessors': [{'bufferView': 0, 'componentType': 5126, 'count': len(times), 'type': 'SCALAR'},
+                      {'bufferView': 1, 'componentType': component_type, 'normalized': True,
+                       'count': len(output), 'type': 'VEC4'}],
+    }
+    data = parse_gltf(json.dumps(gltf).encode())
+    return data.animations[0].samplers[0].output
+
+
+class TestCurve(unittest.TestCase):
+
+    def test_find_segment(self):
+        curve = TranslationCurve(0, create_node(), float32(
+            0, 1, 2, 2, 4), np.zeros((5, 3), dtype=np.float32))
+
+        self.assertEqual(0, curve.find_segment(0.5))
+        self.assertEqual(1, curve.find_segment(1.5))
+        # skip zero length segment
+        self.assertEqual(3, curve.find_segment(2))
+        self.assertEqual(3, curve.find_segment(3.5))
+        # backward
+        self.assertEqual(0, curve.find_segment(0.1))
+
+    def test_set_time(self):
+        node = create_node()
+        curve = TranslationCurve(0, node, float32(0, 1, 2), float32(
+            (0, 0, 0), (10, 0, 0), (20, 0, 0)))
+
+        curve.set_time(0.5)
+        self.assertAlmostEqual(5, node.local_transform.trnslation.x)
+        curve.set_time(1.75)
+        self.assertAlmostEqual(17.5, node.local_transform.trnslation.x)
+        curve.set_time(3)
+        self.assertAlmostEqual(20, node.local_transform.trnslation.x)
+
+    def test_as_float_array(self):
+        data = bytearray(float32(0, 1, 2, 3, 4, 5).tobytes())
+        values = as_float_array(GltfAccessorSlice(
+            memoryview(data).cast('f'), 3))
+        self.assertEqual((2, 3), values.shape)
+        # view of the buffer
+        data[0:4] = float32(9).tobytes()
+        self.assertEqual(9, values[0, 0])
+
+        # normalized
+        values = as_float_array(GltfAccessorSlice(
+            memoryview(np.array([0, 32767, -32768], dtype=np.int16).tobytes()).cast('h'), 1))
+        self.assertEqual([0, 1, -1], values.reshape(-1).tolist())
+
+    def test_normalized_sampler_output(self):
+        # BYTE. -128 is clamped to -1
+        values = as_float_array(parse_sampler_output(
+            np.array([[0, 127, -128, 64], [0, 0, 0, 127]], dtype=np.int8), 5120))
+        self.assertEqual((2, 4), values.shape)
+        np.testing.assert_allclose([0, 1, -1, 64 / 127], values[0])
+        # UNSIGNED_BYTE
+        values = as_float_array(parse_sampler_output(
+            np.array([[0, 128, 255, 64], [0, 0, 0, 255]], dtype=np.uint8), 5121))
+        np.testing.assert_allclose([0, 128 / 255, 1, 64 / 255], values[0])
+        np.testing.assert_allclose([0, 0, 0, 1], values[1])
+        # SHORT
+        values = as_float_array(parse_sampler_output(
+            np.array([[0, 32767, -32768, 16384], [0, 0, 0, 32767]], dtype=np.int16), 5122))
+        np.testing.assert_allclose([0, 1, -1, 16384 / 32767], values[0])
+        # UNSIGNED_SHORT
+        values = as_float_array(parse_sampler_output(
+            np.array([[0, 65535, 0, 0], [0, 0, 0, 65535]], dtype=np.uint16), 5123))
+        np.testing.assert_allclose([0, 1, 0, 0], values[0])
+
+
+class TestChannelPack(unittest.TestCase):
+
+    def test_apply(self):
+        trs = pose.new_pose(2)
+        nodes = [Node(f'{i}', pose.bind_trs(trs, i, create_node().local_transform))
+                 for i in range(2)]
+
+        t = TranslationCurve(0, nodes[0], float32(0, 1, 3), float32(
+            (0, 0, 0), (1, 2, 0), (3, 6, 0)))
+        s = math.sqrt(0.5)
+        r = RotationCurve(1, nodes[1], float32(0, 2), float32(
+            (0, 0, 0, 1), (0, s, 0, s)))
+
+        pack = ChannelPack([t, r])
+        for time in [-1, 0, 0.5, 1, 2, 2.5, 4, 0.25]:
+            pack.apply(trs, time)
+            expected = min(max(time, 0), 3)
+            self.assertAlmostEqual(
+                expected, nodes[0].local_transform.trnslation.x, places=5)
+            self.assertAlmostEqual(
+                expected * 2, nodes[0].local_transform.trnslation.y, places=5)
+            q = trs[1, pose.ROTATION:pose.ROTATION+4]
+            self.assertAlmostEqual(1, float(np.linalg.norm(q)), places=5)
+
+    def test_modes(self):
+        '''
+        packed evaluation matches the per curve evaluation
+        '''
+        rng = np.random.default_rng(0)
+        trs = pose.new_pose(6)
+        nodes = [Node(f'{i}', pose.bind_trs(trs, i, create_node().local_transform))
+                 for i in range(6)]
+        reference = [create_node() for _ in range(6)]
+        curves = []
+        references = []
+        for i, mode in enumerate(GltfAnimationInterpolation):
+            times = np.sort(rng.random(8, dtype=np.float32)) * 4
+            for j, klass in enumerate((TranslationCurve, RotationCurve)):
+                n = 4 if klass == RotationCurve else 3
+                values = rng.random((8, n), dtype=np.float32) - 0.5
+                tangents = rng.random((2, 8, n), dtype=np.float32)
+                if n == 4:
+                    values /= np.linalg.norm(values, axis=1, keepdims=True)
+                index = i * 2 + j
+                curves.append(klass(index, nodes[index], times, values,
+                              mode, tangents[0], tangents[1]))
+                references.append(klass(index, reference[index], times, values,
+                                  mode, tangents[0], tangents[1]))
+
+        pack = ChannelPack(curves)
+        for time in np.linspace(-1, 5, 50):
+            pack.apply(trs, time)
+            for curve, node in zip(references, reference):
+                curve.set_time(time)
+                t = node.local_transform.trnslation
+                r = node.local_transform.rotation
+                actual = trs[curve.node_index]
+                if curve.is_rotation:
+                    self.assertTrue(np.allclose(
+                        (r.x, r.y, r.z, r.w), actual[3:7], atol=1e-5), f'{curve.interpolation} {time}')
+                else:
+                    self.assertTrue(np.allclose(
+                        (t.x, t.y, t.z), actual[0:3], atol=1e-5), f'{curve.interpolation} {time}')
+
+
+class TestInterpolation(unittest.TestCase):
+
+    def test_step(self):
+        low = float32((0, 0, 0))
+        high = float32((1, 1, 1))
+        self.assertEqual(
+            0, interpolation.step(low, high, float32(0.9))[0, 0])
+        self.assertEqual(1, interpolation.step(low, high, float32(1))[0, 0])
+
+    def test_slerp(self):
+        s = math.sqrt(0.5)
+        q = interpolation.slerp(float32((0, 0, 0, 1)),
+                                float32((0, s, 0, s)), float32(0.5))
+        # 45 degree around y
+        self.assertTrue(np.allclose(
+            (0, math.sin(math.pi/8), 0, math.cos(math.pi/8)), q[0]))
+        # shortest path
+        q = interpolation.slerp(float32((0, 0, 0, 1)),
+                                float32((0, -s, 0, -s)), float32(0.5))
+        self.assertTrue(np.allclose(
+            (0, math.sin(math.pi/8), 0, math.cos(math.pi/8)), q[0]))
+        # same rotation
+        q = interpolation.slerp(float32((0, 0, 0, 1)),
+                                float32((0, 0, 0, 1)), float32(0.5))
+        self.assertTrue(np.allclose((0, 0, 0, 1), q[0]))
+
+    def test_hermite(self):
+        zero = float32((0, 0, 0))
+        low = float32((0, 0, 0))
+        high = float32((2, 0, 0))
+        v = interpolation.hermite(low, high, float32(
+            0.5), float32(1), zero, zero)
+        self.assertAlmostEqual(1, v[0, 0])
+        # out tangent scaled by duration: (t^3 - 2t^2 + t) * 2
+        one = float32((1, 0, 0))
+        v = interpolation.hermite(
+            low, low, float32(0.5), float32(2), one, zero)
+        self.assertAlmostEqual(0.25, v[0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
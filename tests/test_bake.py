@@ -0,0 +1,110 @@
+import unittest
+import math
+import numpy as np
+from gltfio.types import GltfAnimationInterpolation
+from helpers import create_node, float32
+from gltfloupe.animation import Animation, TranslationCurve, RotationCurve, ChannelPack
+from gltfloupe.bake import BakedAnimation, BakeCache
+from gltfloupe import pose
+
+
+def create_animation(name: str, last_time: float) -> Animation:
+    node = create_node()
+    animation = Animation(name)
+    animation.add_curve(TranslationCurve(0, node, float32(0, last_time), float32(
+        (0, 0, 0), (last_time, 0, 0))))
+    s = math.sqrt(0.5)
+    animation.add_curve(RotationCurve(1, node, float32(0, last_time), float32(
+        (0, 0, 0, 1), (0, s, 0, s))))
+    return animation
+
+
+class TestBake(unittest.TestCase):
+
+    def test_sample(self):
+        animation = create_animation('a', 2)
+        baked = BakedAnimation(animation, 30)
+        self.assertEqual(61, baked.frame_count)
+
+        trs = pose.new_pose(2)
+        expected = pose.new_pose(2)
+        pack = ChannelPack(animation.curves)
+        for time in [-1, 0, 1 / 30, 0.5, 0.51, 1.99, 2, 3]:
+            baked.set_time(time, trs)
+            pack.apply(expected, time)
+            self.assertTrue(np.allclose(expected, trs, atol=1e-3), f'{time}')
+            q = trs[1, pose.ROTATION:pose.ROTATION+4]
+            self.assertAlmostEqual(1, float(np.linalg.norm(q)), places=5)
+
+    def test_last_frame_off_grid(self):
+        # 1.01 * 30 is not an integer. the last row is at 1.01, not 31 / 30
+        node = create_node()
+        animation = Animation('a')
+        animation.add_curve(TranslationCurve(0, node, float32(0, 1.01), float32(
+            (0, 0, 0), (1.01, 0, 0))))
+        baked = BakedAnimation(animation, 30)
+        self.assertEqual(32, baked.frame_count)
+        for time in (1.0, 1.005, 1.01):
+            self.assertAlmostEqual(time, float(baked.sample(time)[0]), 5)
+
+    def test_step(self):
+        node = create_node()
+        animation = Animation('step')
+        animation.add_curve(TranslationCurve(0, node, float32(0, 0.5, 1), float32(
+            (0, 0, 0), (1, 0, 0), (2, 0, 0)), GltfAnimationInterpolation.Step))
+        baked = BakedAnimation(animation, 4)
+        trs = pose.new_pose(1)
+        baked.set_time(0.4, trs)
+        self.assertEqual(0, trs[0, 0])
+        baked.set_time(0.6, trs)
+        self.assertEqual(1, trs[0, 0])
+
+    def test_cache(self):
+        a = create_animation('a', 10)
+        b = create_animation('b', 10)
+        size = BakedAnimation(a, 30).nbytes
+        cache = BakeCache(30, size * 3 // 2)
+        try:
+            self.assertIsNone(cache.get(a))
+            cache.request(a).result()  # type: ignore
+            self.assertIsNotNone(cache.get(a))
+
+            # over budget. a is least recently used
+            cache.request(b).result()  # type: ignore
+            self.assertEqual(size, cache.nbytes)
+            self.assertNotIn(a, cache.baked)
+            self.assertIsNotNone(cache.get(b))
+        finally:
+            cache.shutdown()
+
+    def test_over_budget_every_frame(self):
+        # set_time gets all animations each frame. only one table fits
+        a = create_animation('a', 10)
+        b = create_animation('b', 10)
+        size = BakedAnimation(a, 30).nbytes
+        cache = BakeCache(30, size * 3 // 2)
+        try:
+            for _ in range(2):
+                cache.get(a)
+                cache.get(b)
+                for future in list(cache.pending.values()):
+                    future.result()
+            self.assertEqual({a}, cache.evicted)
+            self.assertIsNotNone(cache.get(b))
+
+            # the evicted table is not baked again by get
+            for _ in range(10):
+                self.assertIsNone(cache.get(a))
+                self.assertIsNotNone(cache.get(b))
+                self.assertEqual({}, cache.pending)
+
+            # until requested
+            cache.request(a).result()  # type: ignore
+            self.assertIsNotNone(cache.get(a))
+            self.assertEqual({b}, cache.evicted)
+        finally:
+            cache.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from gltfloupe import batching
+
+
+class TestBatching(unittest.TestCase):
+
+    def test_interleave(self):
+        positions = np.arange(9, dtype=np.float32).reshape(3, 3)
+        uv = np.arange(6, dtype=np.float32).reshape(3, 2) + 100
+        vertices, offsets = batching.interleave([positions, uv])
+        self.assertEqual((3, 5), vertices.shape)
+        self.assertEqual([0, 12], offsets)
+        self.assertEqual([3, 4, 5, 102, 103], vertices[1].tolist())
+
+    def test_transform(self):
+        matrix = np.eye(4, dtype=np.float32)
+        matrix[3, :3] = (1, 2, 3)
+        # 90 degrees around z. row vector
+        matrix[:2, :2] = [[0, 1], [-1, 0]]
+        self.assertEqual([[1, 3, 3]], batching.transform_points(
+            np.array([[1, 0, 0]], np.float32), matrix).tolist())
+
+    def test_merge(self):
+        a = batching.BatchItem(0, np.zeros((3, 3), np.float32),
+                               np.array([0, 1, 2], np.uint16))
+        b = batching.BatchItem(1, np.ones((4, 3), np.float32),
+                               np.array([0, 1, 2, 0, 2, 3], np.uint8))
+        # not indexed
+        c = batching.BatchItem(0, np.ones((3, 3), np.float32), None)
+        vertices, indices, index_offsets = batching.merge([a, b, c])
+        self.assertEqual((10, 3), vertices.shape)
+        self.assertEqual(np.uint16, indices.dtype)
+        self.assertEqual([0, 1, 2, 3, 4, 5, 3, 5, 6, 7, 8, 9],
+                         indices.tolist())
+        self.assertEqual([0, 3, 9], index_offsets.tolist())
+
+    def test_uint32(self):
+        big = batching.BatchItem(
+            0, np.zeros((batching.UINT16_LIMIT, 3), np.float32), None)
+        small = batching.BatchItem(0, np.zeros((3, 3), np.float32), None)
+        _, indices, _ = batching.merge([big, small])
+        self.assertEqual(np.uint32, indices.dtype)
+        self.assertEqual(batching.UINT16_LIMIT + 2, indices[-1])
+
+    def test_group(self):
+        items = [batching.BatchItem(key, np.zeros((3, 3), np.float32), None)
+                 for key in ['a', 'b', 'a', 'a']]
+        batches = batching.group(items)
+        self.assertEqual(1, len(batches))
+        self.assertEqual('a', batches[0].key)
+        self.assertEqual([0, 2, 3], batches[0].items)
+        self.assertEqual(9, len(batches[0].indices))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import math
+import numpy as np
+from gltfloupe import bvh
+
+
+def perspective(fov_y: float, aspect: float, near: float, far: float) -> np.ndarray:
+    '''
+    row vector OpenGL projection
+    '''
+    f = 1 / math.tan(fov_y / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), -1],
+        [0, 0, 2 * far * near / (near - far), 0],
+    ], np.float32)
+
+
+def look(yaw: float, x: float, z: float) -> np.ndarray:
+    '''
+    row vector view matrix of a camera at (x, 0, z) rotated around y
+    '''
+    c, s = math.cos(yaw), math.sin(yaw)
+    world = np.array([
+        [c, 0, -s, 0],
+        [0, 1, 0, 0],
+        [s, 0, c, 0],
+        [x, 0, z, 1],
+    ], np.float32)
+    return np.linalg.inv(world)
+
+
+def random_boxes(rng, count: int):
+    centers = rng.uniform(-100, 100, (count, 3)).astype(np.float32)
+    extents = rng.uniform(0.1, 3, (count, 3)).astype(np.float32)
+    return centers - extents, centers + extents
+
+
+class TestBVH(unittest.TestCase):
+
+    def test_transform_aabbs(self):
+        mins = np.array([[-1, -2, -3]], np.float32)
+        maxs = np.array([[1, 2, 3]], np.float32)
+        m = np.eye(4, dtype=np.float32)[None].copy()
+        # 90 degrees around z and translate
+        m[0, :2, :2] = [[0, 1], [-1, 0]]
+        m[0, 3, :3] = (10, 0, 0)
+        world_min, world_max = bvh.transform_aabbs(mins, maxs, m)
+        self.assertEqual([8, -1, -3], world_min[0].tolist())
+        self.assertEqual([12, 1, 3], world_max[0].tolist())
+
+    def test_frustum(self):
+        planes = bvh.frustum_planes(perspective(math.pi / 2, 1, 0.1, 100))
+        mins = np.array([[-1, -1, -11], [-1, -1, 9], [
+                        50, -1, -11], [-1, -1, -200]], np.float32)
+        maxs = mins + 2
+        # in front, behind, right, too far
+        self.assertEqual([True, False, False, False],
+                         bvh.intersects_frustum(mins, maxs, planes).tolist())
+
+    def test_cull_brute_force(self):
+        rng = np.random.default_rng(0)
+        mins, maxs = random_boxes(rng, 1000)
+        tree = bvh.BVH(mins, maxs)
+        self.assertEqual(1000, len(tree))
+        root_min = tree.node_mins[0]
+        root_max = tree.node_maxs[0]
+        self.assertEqual(mins.min(axis=0).tolist(), root_min.tolist())
+        self.assertEqual(maxs.max(axis=0).tolist(), root_max.tolist())
+
+        projection = perspective(math.pi / 3, 1.5, 0.1, 80)
+        for yaw in np.linspace(0, 2 * math.pi, 8):
+            planes = bvh.frustum_planes(
+                look(yaw, 10, 20) @ projection)
+            expected = np.flatnonzero(
+                bvh.intersects_frustum(mins, maxs, planes))
+            self.assertEqual(expected.tolist(), tree.cull(planes).tolist())
+            # not everything
+            self.assertLess(len(expected), 1000)
+
+        # refit after moving
+        mins += 50
+        maxs += 50
+        tree.refit(mins, maxs)
+        planes = bvh.frustum_planes(look(0, 0, 0) @ projection)
+        expected = np.flatnonzero(bvh.intersects_frustum(mins, maxs, planes))
+        self.assertEqual(expected.tolist(), tree.cull(planes).tolist())
+
+    def test_empty(self):
+        tree = bvh.BVH(np.zeros((0, 3), np.float32),
+                       np.zeros((0, 3), np.float32))
+        planes = bvh.frustum_planes(perspective(1, 1, 0.1, 10))
+        self.assertEqual([], tree.cull(planes).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
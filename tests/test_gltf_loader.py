@@ -0,0 +1,310 @@
+import unittest
+import io
+import json
+import base64
+import numpy as np
+from PIL import Image
+from gltfio.parser import parse_gltf
+from gltfloupe.gltf_loader import GltfLoader, PLACEHOLDER
+
+
+def create_gltf(nodes: list, scene: list, keys: int = 5):
+    '''
+    nodes[1] has a translation animation (t, 2t, 0) and a triangle.
+    '''
+    bin = bytearray()
+    views = []
+    accessors = []
+
+    def add(array: np.ndarray, type: str, component_type: int, **kw):
+        views.append({'buffer': 0, 'byteOffset': len(bin),
+                     'byteLength': array.nbytes})
+        bin.extend(array.tobytes())
+        while len(bin) % 4:
+            bin.append(0)
+        accessors.append({'bufferView': len(views) - 1, 'componentType': component_type,
+                          'count': len(array), 'type': type, **kw})
+        return len(accessors) - 1
+
+    times = np.arange(keys, dtype=np.float32)
+    translation = np.stack(
+        [times, times * 2, times * 0], axis=1).astype(np.float32)
+    add(times, 'SCALAR', 5126)
+    add(translation, 'VEC3', 5126)
+    add(np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], np.float32), 'VEC3', 5126,
+        min=[0, 0, 0], max=[1, 1, 0])
+    add(np.array([0, 1, 2], np.uint16), 'SCALAR', 5123)
+    gltf = {
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': scene}],
+        'nodes': nodes,
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 2}, 'indices': 3, 'material': 0}]}],
+        'materials': [{}],
+        'animations': [{
+            'channels': [{'sampler': 0, 'target': {'node': 1, 'path': 'translation'}}],
+            'samplers': [{'input': 0, 'output': 1}]}],
+        'buffers': [{'byteLength': len(bin),
+                     'uri': 'data:application/octet-stream;base64,' + base64.b64encode(bytes(bin)).decode()}],
+        'bufferViews': views,
+        'accessors': accessors,
+    }
+    return parse_gltf(json.dumps(gltf).encode())
+
+
+class TestGltfLoader(unittest.TestCase):
+
+    def test_set_time(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 3]},
+            {'name': 'animated', 'mesh': 0, 'children': [2]},
+            {'name': 'leaf', 'translation': [0, 1, 0]},
+            {'name': 'static', 'translation': [5, 0, 0]},
+        ], [0]))
+        loader.load()
+        self.assertEqual([-1, 0, 1, 0], loader.graph.parents.tolist())
+        self.assertEqual([[1], [2]], [level.tolist()
+                         for level in loader._get_dirty_levels()])
+
+        loader.set_time(1.5)
+        self.assertEqual(1.5, loader.time)
+        leaf = loader.nodes[2].world_matrix
+        self.assertAlmostEqual(1.5, leaf._41)
+        self.assertAlmostEqual(4.0, leaf._42)
+        self.assertAlmostEqual(5, loader.nodes[3].world_matrix._41)
+
+        # same time is skipped
+        loader.pose[1, 0] = 100
+        loader.set_time(1.5)
+        self.assertAlmostEqual(1.5, leaf._41)
+        loader.set_time(2)
+        self.assertAlmostEqual(2.0, leaf._41)
+        self.assertAlmostEqual(5.0, leaf._42)
+
+        # not animated subtree is not updated
+        loader.pose[3, 0] = 100
+        loader.set_time(3)
+        self.assertAlmostEqual(5, loader.nodes[3].world_matrix._41)
+
+    def test_aabb(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'translation': [0, 0, 1], 'children': [1]},
+            {'name': 'animated', 'mesh': 0},
+        ], [0]))
+        loader.load()
+        aabb = loader.get_aabb()
+        self.assertEqual((0, 0, 1), tuple(aabb.min))
+        self.assertEqual((1, 1, 1), tuple(aabb.max))
+
+    def test_aabb_off_scene(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'mesh': 0},
+            {'name': 'animated'},
+            {'name': 'off0', 'mesh': 0, 'translation': [100, 0, 0]},
+            {'name': 'off1', 'mesh': 0, 'translation': [103, 0, 0]},
+        ], [0]))
+        loader.load()
+        aabb = loader.get_aabb()
+        self.assertEqual((0, 0, 0), tuple(aabb.min))
+        self.assertEqual((1, 1, 0), tuple(aabb.max))
+
+    def test_flatten(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'translation': [0, 0, 1], 'children': [1]},
+            {'name': 'animated', 'mesh': 0, 'children': [2]},
+            {'name': 'leaf', 'mesh': 0, 'translation': [0, 1, 0]},
+            {'name': 'off', 'mesh': 0},
+        ], [0]))
+        loader.load()
+        scene = loader.flatten()
+        self.assertEqual(['animated', 'leaf'], [
+                         node.name for node in scene.children])
+        # the proxy has the world matrix of the graph
+        leaf = scene.children[1]
+        self.assertEqual(1, leaf.get_local_matrix()._42)
+        self.assertEqual(1, leaf.get_local_matrix()._43)
+        self.assertEqual([], leaf.children)
+        loader.set_time(2)
+        self.assertEqual(2, leaf.get_local_matrix()._41)
+        self.assertEqual(5, leaf.get_local_matrix()._42)
+
+    def test_batch(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 2, 3]},
+            {'name': 'animated', 'mesh': 0},
+            {'name': 'static0', 'mesh': 0, 'translation': [10, 0, 0]},
+            {'name': 'static1', 'mesh': 0, 'translation': [0, 10, 0]},
+        ], [0]))
+        root = loader.load()
+        batches = loader.batch()
+        self.assertEqual(1, len(batches))
+        self.assertEqual(batches, root.meshes)
+        self.assertEqual(1, len(loader.nodes[1].meshes))
+        self.assertEqual([], loader.nodes[2].meshes)
+        self.assertEqual([], loader.nodes[3].meshes)
+        mesh = batches[0]
+        self.assertEqual(6, mesh.vertices.count())
+        self.assertEqual(6, mesh.submeshes[0].draw_count)
+        aabb = loader.get_aabb()
+        self.assertEqual((0, 0, 0), tuple(aabb.min))
+        self.assertEqual((11, 11, 0), tuple(aabb.max))
+
+    def test_batch_off_scene(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 2]},
+            {'name': 'animated'},
+            {'name': 'static', 'mesh': 0},
+            {'name': 'off0', 'mesh': 0, 'translation': [10, 0, 0]},
+            {'name': 'off1', 'mesh': 0, 'translation': [0, 10, 0]},
+        ], [0]))
+        loader.load()
+        self.assertEqual([], loader.batch())
+        self.assertEqual(1, len(loader.nodes[2].meshes))
+        self.assertEqual(1, len(loader.nodes[3].meshes))
+
+    def test_instance(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 2, 3, 4]},
+            {'name': 'animated', 'mesh': 0},
+            {'name': 'static0', 'mesh': 0, 'translation': [10, 0, 0]},
+            {'name': 'static1', 'mesh': 0, 'translation': [0, 10, 0]},
+            {'name': 'static2', 'mesh': 0, 'translation': [0, 0, 10]},
+        ], [0]))
+        root = loader.load()
+        instances = loader.instance(min_count=4)
+        self.assertEqual(1, len(instances))
+        instanced = instances[0]
+        self.assertEqual([1, 2, 3, 4], instanced.group.nodes.tolist())
+        self.assertTrue(instanced.dynamic)
+        self.assertEqual(instanced.meshes, root.meshes)
+        self.assertIn('#define INSTANCED 1',
+                      instanced.meshes[0].submeshes[0].macro)
+        self.assertTrue(all(not node.meshes for node in loader.nodes))
+        self.assertEqual([0, 10, 0, 0], instanced.group.matrices[:, 3, 0].tolist())
+        aabb = loader.get_aabb()
+        self.assertEqual((11, 11, 10), tuple(aabb.max))
+
+        # animated instance
+        loader.set_time(2)
+        self.assertEqual([2, 4, 0], instanced.group.matrices[0, 3, :3].tolist())
+
+    def test_instance_off_scene(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'mesh': 0},
+            {'name': 'animated'},
+            {'name': 'off0', 'mesh': 0},
+            {'name': 'off1', 'mesh': 0},
+            {'name': 'off2', 'mesh': 0},
+            {'name': 'off3', 'mesh': 0},
+        ], [0]))
+        root = loader.load()
+        self.assertEqual([], loader.instance(min_count=4))
+        self.assertEqual([], root.meshes)
+        self.assertEqual(1, len(loader.nodes[0].meshes))
+
+    def test_culling(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 2, 3]},
+            {'name': 'animated', 'mesh': 0},
+            {'name': 'near', 'mesh': 0, 'translation': [0, 0, -5]},
+            {'name': 'far_right', 'mesh': 0, 'translation': [100, 0, -5]},
+        ], [0]))
+        loader.load()
+        self.assertIsNone(loader.cull(np.eye(4, dtype=np.float32)))
+        culled = loader.enable_culling()
+        self.assertEqual([1, 2, 3], culled.indices.tolist())
+        self.assertEqual([False, False, True],
+                         (culled.bvh.item_mins[:, 0] > 50).tolist())
+
+        # camera at (0, 0, 10) looks -z. tan(fov / 2) = 0.5
+        view = np.eye(4, dtype=np.float32)
+        view[3, 2] = -10
+        near, far = 0.1, 100
+        projection = np.array([
+            [2, 0, 0, 0],
+            [0, 2, 0, 0],
+            [0, 0, (far + near) / (near - far), -1],
+            [0, 0, 2 * far * near / (near - far), 0],
+        ], np.float32)
+        self.assertEqual(2, loader.cull(view @ projection))
+        self.assertEqual(['animated', 'near'], [
+                         node.name for node in culled.children])
+
+        # animated node moves out of the view. (t, 2t, 0)
+        loader.set_time(4)
+        self.assertEqual(8, culled.bvh.item_mins[0, 1])
+        self.assertEqual(1, loader.cull(view @ projection))
+        self.assertEqual(['near'], [node.name for node in culled.children])
+
+    def test_pick(self):
+        loader = GltfLoader(create_gltf([
+            {'name': 'root', 'children': [1, 2, 3]},
+            {'name': 'animated', 'mesh': 0},
+            {'name': 'behind', 'mesh': 0, 'translation': [0, 0, -5]},
+            {'name': 'right', 'mesh': 0, 'translation': [10, 0, 0]},
+        ], [0]))
+        loader.load()
+        self.assertIsNone(loader.pick((0, 0, 10), (0, 0, -1)))
+        picker = loader.enable_picking()
+        self.assertEqual([1, 2, 3], picker.nodes.tolist())
+
+        # the triangle (0, 0, 0), (1, 0, 0), (0, 1, 0) of each node
+        def pick(x: float, y: float):
+            node = loader.pick((x, y, 10), (0, 0, -1))
+            if picker.pending:
+                # the first pick requests the triangle BVH
+                for future in list(picker.pending.values()):
+                    future.result()
+                node = loader.pick((x, y, 10), (0, 0, -1))
+            return node
+
+        self.assertEqual(1, pick(0.25, 0.25))
+        self.assertEqual(1, len(picker.meshes))
+        self.assertFalse(picker.is_pending())
+        self.assertEqual(3, pick(10.25, 0.25))
+        self.assertIsNone(pick(0.75, 0.75))
+
+        # the animated node moves away. (t, 2t, 0)
+        loader.set_time(4)
+        self.assertEqual(2, pick(0.25, 0.25))
+        self.assertEqual(1, pick(4.25, 8.25))
+        picker.shutdown()
+
+    def test_images(self):
+        images = []
+        for i in range(4):
+            f = io.BytesIO()
+            Image.new('RGBA', (i + 1, 2), (i, 0, 0, 255)).save(f, 'PNG')
+            images.append({'uri': 'data:image/png;base64,' +
+                          base64.b64encode(f.getvalue()).decode()})
+        data = parse_gltf(json.dumps({
+            'asset': {'version': '2.0'},
+            'scene': 0,
+            'scenes': [{'nodes': []}],
+            'images': images,
+            # texture 0 and 2 share an image
+            'textures': [{'source': 3}, {'source': 1}, {'source': 3}],
+            'materials': [{'pbrMetallicRoughness': {'baseColorTexture': {'index': i}}} for i in range(3)],
+        }).encode())
+        loader = GltfLoader(data)
+        loader.load(image_workers=2)
+        self.assertEqual([1, 2, 3, 4], [
+                         image.width for image in loader.images])
+        self.assertNotIn(PLACEHOLDER, loader.images)
+        self.assertEqual([4, 2, 4], [
+                         material.color_texture.image.width for material in loader.materials])
+
+        # lazy
+        loader = GltfLoader(data)
+        loader.load(lazy_images=True, image_budget=(4 + 2) * 2 * 4)
+        assert loader.image_cache
+        self.assertEqual(0, len(loader.image_cache.decoded))
+        self.assertEqual(4, loader.materials[0].color_texture.image.width)
+        self.assertEqual(2, loader.get_image(1).width)
+        self.assertEqual([3, 1], list(loader.image_cache.decoded.keys()))
+        # over budget. 3 is least recently used
+        self.assertEqual(3, loader.get_image(2).width)
+        self.assertEqual([1, 2], list(loader.image_cache.decoded.keys()))
+
+if __name__ == '__main__':
+    unittest.main()
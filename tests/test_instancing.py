@@ -0,0 +1,29 @@
+import unittest
+import numpy as np
+from gltfloupe import instancing
+
+
+class TestInstancing(unittest.TestCase):
+
+    def test_group(self):
+        groups = instancing.group_instances(
+            [0, None, 1, 0, 0, 1, 2], min_count=2)
+        self.assertEqual([0, 1], sorted(groups.keys()))
+        self.assertEqual([0, 3, 4], groups[0].tolist())
+        self.assertEqual([2, 5], groups[1].tolist())
+
+    def test_matrices(self):
+        world = np.zeros((5, 4, 4), np.float32)
+        world[:] = np.eye(4)
+        world[:, 3, 0] = np.arange(5)
+        group = instancing.InstanceGroup(0, np.array([4, 1]))
+        group.updated = False
+        buffer = group.matrices
+        group.update(world)
+        self.assertTrue(group.updated)
+        self.assertIs(buffer, group.matrices)
+        self.assertEqual([4, 1], group.matrices[:, 3, 0].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
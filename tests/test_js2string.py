@@ -1,5 +1,5 @@
 import unittest
-from gltfloupe.jsonutil import to_pretty
+from gltfloupe.jsonutil import to_pretty, iter_pretty, count_lines, PrettyLines
 
 
 class TestJsonToString(unittest.TestCase):
@@ -36,6 +36,40 @@ class TestJsonToString(unittest.TestCase):
 }'''.strip()
         self.assertEqual(abcd, to_pretty({'a': 'b', 'c': 'd'}))
 
+    def test_lines(self):
+        value = {'a': [{'b': 1}, [1, 2.0]], 'c': {}, 'd': ['x']}
+        text = to_pretty(value)
+        self.assertEqual(text.split('\n'), list(iter_pretty(value)))
+        self.assertEqual(len(text.split('\n')), count_lines(value))
+
+    def test_budget(self):
+        value = ['a', 'b', 'c']
+        self.assertEqual('[\n  "a",\n… 3 more lines', to_pretty(value, max_lines=2))
+        self.assertEqual('[\n… 4 more lines', to_pretty(value, max_bytes=4))
+        self.assertEqual(to_pretty(value), to_pretty(value, max_lines=5))
+
+    def test_page(self):
+        value = [{'name': f'{i}'} for i in range(10)]
+        lines = PrettyLines(value, page_lines=4)
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines.has_more)
+        self.assertEqual('… 28 more lines', lines.more_label)
+        self.assertEqual(['    "name": "3"'], lines.get_window(11, 12))
+        self.assertEqual(12, len(lines))
+        self.assertEqual(to_pretty(value).split('\n'),
+                         lines.get_window(0, 100))
+        self.assertFalse(lines.has_more)
+
+    def test_page_boundary(self):
+        # 32 lines. 2 full pages
+        value = [{'name': f'{i}'} for i in range(10)]
+        lines = PrettyLines(value, page_lines=16)
+        self.assertTrue(lines.has_more)
+        self.assertEqual('… 16 more lines', lines.more_label)
+        lines.next_page()
+        self.assertEqual(32, len(lines))
+        self.assertFalse(lines.has_more)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from gltfloupe.json_rows import JsonRows
+
+
+def can_jump(keys: tuple, value):
+    match keys:
+        case ('nodes', node_index, 'children', child_index):
+            return ('nodes', value)
+    return False
+
+
+GLTF = {
+    'asset': {'version': '2.0'},
+    'nodes': [
+        {'name': 'root', 'children': [1]},
+        {'name': 'child'},
+    ],
+}
+
+
+class TestJsonRows(unittest.TestCase):
+
+    def test_expand(self):
+        rows = JsonRows(GLTF, can_jump=can_jump)
+        self.assertEqual([('asset',), ('nodes',)], [
+                         row.keys for row in rows.rows])
+        self.assertEqual('(2)##(\'nodes\',)', rows.rows[1].value)
+
+        rows.set_open(('nodes',), True)
+        rows.set_open(('nodes', 0), True)
+        self.assertEqual([('asset',), ('nodes',), ('nodes', 0), ('nodes', 0, 'name'), ('nodes', 0, 'children'), ('nodes', 1)],
+                         [row.keys for row in rows.rows])
+        self.assertEqual(2, rows.rows[3].depth)
+        self.assertTrue(rows.rows[3].is_leaf)
+
+        # collapse keeps the state of descendants
+        rows.set_open(('nodes',), False)
+        self.assertEqual(2, len(rows))
+        rows.set_open(('nodes',), True)
+        self.assertEqual(6, len(rows))
+
+    def test_expand_to(self):
+        rows = JsonRows(GLTF, can_jump=can_jump)
+        position = rows.expand_to(('nodes', 0, 'children', 0))
+        self.assertEqual(5, position)
+        row = rows.rows[5]
+        self.assertEqual(('nodes', 1), row.jump)
+        # cached
+        rows.set_open(('nodes',), False)
+        rows.set_open(('nodes',), True)
+        self.assertIs(row, rows.rows[5])
+
+    def test_large(self):
+        rows = JsonRows({'accessors': [{'count': i}
+                        for i in range(100_000)]})
+        rows.set_open(('accessors',), True)
+        self.assertEqual(100_001, len(rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from gltfloupe import keypath
+
+
+class TestKeyPath(unittest.TestCase):
+
+    def test_category(self):
+        self.assertEqual('scene', keypath.classify(('scene',)).category)
+        self.assertEqual('node', keypath.classify(('nodes', 3)).category)
+        self.assertEqual('mesh', keypath.classify(
+            ('nodes', 3, 'mesh')).category)
+        self.assertEqual('material', keypath.classify(
+            ('meshes', 0, 'primitives', 1, 'material')).category)
+        self.assertEqual('animation', keypath.classify(
+            ('animations', 0)).category)
+        self.assertIsNone(keypath.classify(('nodes', 3, 'name')).category)
+        self.assertIsNone(keypath.classify(('asset', 'version')).category)
+        self.assertEqual(keypath.KeyPathInfo(), keypath.classify(()))
+
+    def test_jump(self):
+        self.assertEqual(('nodes', 5), keypath.get_jump(
+            ('nodes', 0, 'children', 1), 5))
+        self.assertEqual(('nodes', 2), keypath.get_jump(
+            ('skins', 0, 'skeleton'), 2))
+        self.assertIsNone(keypath.get_jump(('nodes', 0, 'children'), [5]))
+        self.assertIsNone(keypath.get_jump(('nodes', 0, 'mesh'), 0))
+
+    def test_accessor(self):
+        self.assertEqual('value', keypath.classify(
+            ('meshes', 0, 'primitives', 0, 'attributes', 'TEXCOORD_0')).accessor)
+        self.assertEqual('value', keypath.classify(
+            ('skins', 1, 'inverseBindMatrices')).accessor)
+        self.assertEqual('key', keypath.classify(('accessors', 7)).accessor)
+        self.assertIsNone(keypath.classify(('accessors', 7, 'count')).accessor)
+        # name is not an index
+        self.assertIsNone(keypath.classify(('accessors', 'x')).accessor)
+
+
+if __name__ == '__main__':
+    unittest.main()
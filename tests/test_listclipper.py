@@ -0,0 +1,22 @@
+import unittest
+from gltfloupe.listclipper import clip
+
+
+class TestListClipper(unittest.TestCase):
+
+    def test_clip(self):
+        # 10 rows in the view
+        self.assertEqual((0, 11), clip(1000, 10, 0, 100))
+        self.assertEqual((49, 61), clip(1000, 10, 500, 100))
+        self.assertEqual((989, 1000), clip(1000, 10, 9900, 100))
+        # fewer rows than the view
+        self.assertEqual((0, 3), clip(3, 10, 0, 100))
+        self.assertEqual((0, 0), clip(0, 10, 0, 100))
+
+    def test_independent_of_count(self):
+        begin, end = clip(10_000_000, 10, 5_000_000, 100)
+        self.assertLessEqual(end - begin, 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import json
+import pathlib
+import tempfile
+import threading
+from gltfloupe.load_task import LoadTask, LoadCancelled
+
+
+def write_gltf(dir: str) -> pathlib.Path:
+    path = pathlib.Path(dir) / 'nodes.gltf'
+    path.write_text(json.dumps({
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'name': 'root', 'children': [1]}, {'name': 'child', 'translation': [1, 2, 3]}],
+    }))
+    return path
+
+
+class TestLoadTask(unittest.TestCase):
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as dir:
+            task = LoadTask(write_gltf(dir))
+            task.future.result()
+            self.assertTrue(task.done())
+            result = task.result()
+            assert result
+            self.assertEqual('done', task.phase)
+            self.assertEqual(2, len(result.loader.nodes))
+            self.assertEqual(3, result.loader.nodes[1].world_matrix._43)
+
+    def test_cancel(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = write_gltf(dir)
+            entered = threading.Event()
+            resume = threading.Event()
+
+            class BlockedTask(LoadTask):
+                def _progress(self, phase: str):
+                    if phase == 'nodes':
+                        entered.set()
+                        resume.wait()
+                    super()._progress(phase)
+
+            task = BlockedTask(path)
+            entered.wait()
+            task.cancel()
+            resume.set()
+            with self.assertRaises(LoadCancelled):
+                task.future.result()
+            self.assertIsNone(task.result())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from gltfloupe import bvh
+from gltfloupe import picking
+
+
+def grid(count: int):
+    '''
+    count x count quads on the z = 0 plane. (V, 3) and (T, 3)
+    '''
+    xs, ys = np.meshgrid(np.arange(count + 1), np.arange(count + 1))
+    positions = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)],
+                         axis=1).astype(np.float32)
+    i = np.arange(count * count)
+    v = i // count * (count + 1) + i % count
+    triangles = np.concatenate([
+        np.stack([v, v + 1, v + count + 1], axis=1),
+        np.stack([v + 1, v + count + 2, v + count + 1], axis=1)])
+    return positions, triangles
+
+
+class TestPicking(unittest.TestCase):
+
+    def test_intersect_ray(self):
+        mins = np.array([[-1, -1, -1], [5, -1, -1], [-1, -1, -10]], np.float32)
+        maxs = mins + 2
+        # from +z to -z. miss the second. the origin is in the third
+        origin = np.array([0, 0, -9.0])
+        direction = np.array([0, 0, -1.0])
+        self.assertEqual([np.inf, np.inf, 0],
+                         bvh.intersect_ray(origin, direction, mins, maxs).tolist())
+        origin = np.array([0, 0, 10.0])
+        self.assertEqual([9, np.inf, 18],
+                         bvh.intersect_ray(origin, direction, mins, maxs).tolist())
+
+    def test_intersect_triangles(self):
+        v0 = np.array([[0, 0, 0], [0, 0, -5]], np.float64)
+        e1 = np.array([[1, 0, 0], [1, 0, 0]], np.float64)
+        e2 = np.array([[0, 1, 0], [0, 1, 0]], np.float64)
+        t = picking.intersect_triangles(
+            np.array([0.25, 0.25, 10]), np.array([0, 0, -2.0]), v0, e1, e2)
+        # in the unit of the direction
+        self.assertEqual([5, 7.5], t.tolist())
+        t = picking.intersect_triangles(
+            np.array([0.75, 0.75, 10]), np.array([0, 0, -1.0]), v0, e1, e2)
+        self.assertEqual([np.inf, np.inf], t.tolist())
+
+    def test_triangle_bvh_brute_force(self):
+        positions, triangles = grid(32)
+        rng = np.random.default_rng(0)
+        # bumpy
+        positions[:, 2] = rng.uniform(-0.5, 0.5, len(positions))
+        tree = picking.TriangleBVH(positions, triangles)
+        self.assertEqual(len(triangles), len(tree))
+        for _ in range(50):
+            origin = np.array([*rng.uniform(-4, 36, 2), 10])
+            direction = np.array([*rng.uniform(-0.2, 0.2, 2), -1])
+            t = picking.intersect_triangles(
+                origin, direction, tree.v0, tree.e1, tree.e2)
+            hit = tree.raycast(origin, direction)
+            if np.isinf(t.min()):
+                self.assertIsNone(hit)
+            else:
+                assert hit
+                self.assertAlmostEqual(t.min(), hit[0])
+                self.assertEqual(t[hit[1]], hit[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import io
+import json
+import tempfile
+import pathlib
+from gltfloupe.profiling import PhaseTimer, Timing, write_csv, write_json
+from gltfloupe.bench import bench_file
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_timer(self):
+        timer = PhaseTimer('a.glb')
+        timer('parse')
+        timer('nodes')
+        timer.stop()
+        with timer.measure('set_time', 10):
+            pass
+        self.assertEqual(['parse', 'nodes', 'set_time'], [
+                         record.phase for record in timer.records])
+        self.assertEqual(10, timer.records[-1].count)
+
+    def test_write(self):
+        records = [Timing('a.glb', 'parse', 0.5)]
+        w = io.StringIO()
+        write_csv(records, w)
+        self.assertEqual('file,phase,seconds,count\na.glb,parse,0.5,1\n',
+                         w.getvalue())
+        w = io.StringIO()
+        write_json(records, w)
+        self.assertEqual([{'file': 'a.glb', 'phase': 'parse', 'seconds': 0.5, 'count': 1}],
+                         json.loads(w.getvalue()))
+
+    def test_bench_file(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = pathlib.Path(dir) / 'nodes.gltf'
+            path.write_text(json.dumps({
+                'asset': {'version': '2.0'},
+                'scene': 0,
+                'scenes': [{'nodes': [0]}],
+                'nodes': [{'name': 'root'}],
+            }))
+            records = bench_file(path, 10)
+        self.assertEqual(['parse', 'textures', 'materials', 'meshes', 'skins', 'nodes', 'animations', 'images', 'hierarchy'],
+                         [record.phase for record in records])
+
+
+if __name__ == '__main__':
+    unittest.main()
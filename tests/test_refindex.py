@@ -0,0 +1,63 @@
+import unittest
+from gltfloupe.refindex import RefIndex, iter_pattern
+from gltfloupe.keypath import INDEX, ANY
+
+
+GLTF = {
+    'scene': 0,
+    'scenes': [{'nodes': [0]}],
+    'nodes': [
+        {'children': [1, 2]},
+        {'mesh': 0, 'skin': 0},
+        {'mesh': 0},
+    ],
+    'meshes': [{'primitives': [
+        {'attributes': {'POSITION': 0, 'NORMAL': 1}, 'indices': 2, 'material': 0},
+        {'attributes': {'POSITION': 0}, 'material': 0},
+    ]}],
+    'materials': [{'pbrMetallicRoughness': {'baseColorTexture': {'index': 0}},
+                   'extensions': {'KHR_materials_clearcoat': {'clearcoatTexture': {'index': 1}}}}],
+    'textures': [{'source': 0}, {'source': 0}],
+    'skins': [{'joints': [1, 2], 'inverseBindMatrices': 3}],
+    'accessors': [{'bufferView': 0}, {'bufferView': 0}, {'bufferView': 1}, {}],
+    'bufferViews': [{'buffer': 0}, {'buffer': 0}],
+}
+
+
+class TestRefIndex(unittest.TestCase):
+
+    def test_iter_pattern(self):
+        self.assertEqual([(('nodes', 0, 'children', 0), 1), (('nodes', 0, 'children', 1), 2)],
+                         list(iter_pattern(GLTF, ('nodes', INDEX, 'children', INDEX))))
+        self.assertEqual(['POSITION', 'NORMAL', 'POSITION'],
+                         [keys[-1] for keys, _ in iter_pattern(GLTF, ('meshes', INDEX, 'primitives', INDEX, 'attributes', ANY))])
+        self.assertEqual([], list(iter_pattern(GLTF, ('animations', INDEX))))
+
+    def test_ref_from(self):
+        refs = RefIndex(GLTF)
+        self.assertEqual([('nodes', 1, 'mesh'), ('nodes', 2, 'mesh')],
+                         refs.ref_from(('meshes', 0)))
+        self.assertEqual([('nodes', 1, 'skin')], refs.ref_from(('skins', 0)))
+        self.assertEqual([('meshes', 0, 'primitives', 0, 'material'), ('meshes', 0, 'primitives', 1, 'material')],
+                         refs.ref_from(('materials', 0)))
+        self.assertEqual(2, len(refs.ref_from(('accessors', 0))))
+        self.assertEqual([('accessors', 0, 'bufferView'), ('accessors', 1, 'bufferView')],
+                         refs.ref_from(('bufferViews', 0)))
+        self.assertEqual([('nodes', 0, 'children', 0), ('skins', 0, 'joints', 0)],
+                         refs.ref_from(('nodes', 1)))
+        self.assertEqual([('materials', 0, 'extensions', 'KHR_materials_clearcoat', 'clearcoatTexture', 'index')],
+                         refs.ref_from(('textures', 1)))
+        self.assertEqual([('scenes', 0, 'nodes', 0)], refs.ref_from(('nodes', 0)))
+        self.assertEqual([], refs.ref_from(('nodes', 9)))
+
+    def test_ref_to(self):
+        refs = RefIndex(GLTF)
+        self.assertEqual([('meshes', 0), ('skins', 0)],
+                         refs.ref_to(('nodes', 1)))
+        self.assertEqual([('nodes', 1), ('nodes', 2), ('accessors', 3)],
+                         refs.ref_to(('skins', 0)))
+        self.assertEqual([('scenes', 0)], refs.ref_to(('scene',)))
+
+
+if __name__ == '__main__':
+    unittest.main()
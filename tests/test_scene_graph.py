@@ -0,0 +1,82 @@
+import unittest
+import sys
+import numpy as np
+from glglue import ctypesmath
+from glglue.scene.node import Node
+from gltfloupe.scene_graph import SceneGraph, get_parents, trs_to_matrix
+from gltfloupe import pose
+
+
+def as_array(m: ctypesmath.Mat4) -> np.ndarray:
+    return np.frombuffer(m, dtype=np.float32).reshape(4, 4)
+
+
+class TestSceneGraph(unittest.TestCase):
+
+    def test_levels(self):
+        #   0     4
+        #  1 2
+        #    3
+        graph = SceneGraph(get_parents([[1, 2], [], [3], [], []]))
+        self.assertEqual([-1, 0, 0, 2, -1], graph.parents.tolist())
+        self.assertEqual([[0, 4], [1, 2], [3]], [level.tolist()
+                         for level in graph.levels])
+        self.assertEqual([[2], [3]], [level.tolist()
+                         for level in graph.get_subtree_levels([2])])
+
+    def test_trs_to_matrix(self):
+        rng = np.random.default_rng(0)
+        trs = pose.new_pose(8)
+        trs[:] = rng.random(trs.shape, dtype=np.float32)
+        q = trs[:, pose.ROTATION:pose.ROTATION+4]
+        q /= np.linalg.norm(q, axis=1, keepdims=True)
+        matrices = trs_to_matrix(trs)
+        for row, m in zip(trs, matrices):
+            expected = ctypesmath.TRS(ctypesmath.Float3(*row[0:3]), ctypesmath.Quaternion(
+                *row[3:7]), ctypesmath.Float3(*row[7:10])).to_matrix()
+            self.assertTrue(np.allclose(as_array(expected), m, atol=1e-5))
+
+    def test_calc_world(self):
+        '''
+        same as glglue Node.calc_world
+        '''
+        rng = np.random.default_rng(1)
+        count = 20
+        parents = [-1] + [int(rng.integers(0, i)) for i in range(1, count)]
+        trs = pose.new_pose(count)
+        nodes = [Node(f'{i}', pose.bind_trs(trs, i, ctypesmath.TRS(
+            ctypesmath.Float3(0, 0, 0), ctypesmath.Quaternion(0, 0, 0, 1), ctypesmath.Float3(1, 1, 1))))
+            for i in range(count)]
+        for i, parent in enumerate(parents):
+            if parent >= 0:
+                nodes[parent].children.append(nodes[i])
+        trs[:, pose.TRANSLATION:pose.TRANSLATION+3] = rng.random((count, 3))
+        q = rng.random((count, 4), dtype=np.float32)
+        trs[:, pose.ROTATION:pose.ROTATION+4] = q / \
+            np.linalg.norm(q, axis=1, keepdims=True)
+        nodes[0].calc_world()
+
+        graph = SceneGraph(parents)
+        for i in range(count):
+            graph.set_trs(i)
+        graph.update_local(trs)
+        graph.calc_world()
+        for i, node in enumerate(nodes):
+            self.assertTrue(np.allclose(
+                as_array(node.world_matrix), graph.world[i], atol=1e-5))
+
+    def test_deep(self):
+        count = sys.getrecursionlimit() * 2
+        graph = SceneGraph([-1] + list(range(count - 1)))
+        self.assertEqual(count, graph.depth)
+        trs = pose.new_pose(count)
+        trs[:, pose.TRANSLATION] = 1
+        for i in range(count):
+            graph.set_trs(i)
+        graph.update_local(trs)
+        graph.calc_world()
+        self.assertEqual(count, graph.world[-1, 3, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+import json
+import base64
+import numpy as np
+from gltfio.parser import parse_gltf
+from gltfloupe.gltf_loader import GltfLoader
+from gltfloupe.skinning import SkinJoints, SkinnedPrimitive
+from gltfloupe import skin_validation, skin_debug
+
+
+def reference_skinning(positions, joints, weights, world, inverse_bind_matrices, joint_nodes, mesh_world):
+    '''
+    per vertex with the column vector matrices of the glTF spec
+    '''
+    inverse_mesh = np.linalg.inv(mesh_world.T)
+    joint_matrices = [inverse_mesh @ world[node].T @ ibm.T
+                      for node, ibm in zip(joint_nodes, inverse_bind_matrices)]
+    result = []
+    for p, j, w in zip(positions, joints, weights):
+        m = sum(w[k] * joint_matrices[j[k]] for k in range(4))
+        result.append((m @ np.array([*p, 1]))[:3])
+    return np.array(result)
+
+
+def create_skinned_gltf():
+    '''
+    joint0 (root) - joint1 (translation animation x)
+    vertex 0, 1 -> joint0, vertex 2 -> joint1, vertex 3 -> half and half
+    '''
+    bin = bytearray()
+    views = []
+    accessors = []
+
+    def add(array: np.ndarray, type: str, component_type: int, **kw):
+        views.append({'buffer': 0, 'byteOffset': len(bin),
+                     'byteLength': array.nbytes})
+        bin.extend(array.tobytes())
+        while len(bin) % 4:
+            bin.append(0)
+        accessors.append({'bufferView': len(views) - 1, 'componentType': component_type,
+                          'count': len(array), 'type': type, **kw})
+        return len(accessors) - 1
+
+    add(np.array([0, 1], np.float32), 'SCALAR', 5126)
+    add(np.array([[0, 1, 0], [2, 1, 0]], np.float32), 'VEC3', 5126)
+    add(np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], np.float32), 'VEC3', 5126,
+        min=[0, 0, 0], max=[1, 1, 0])
+    add(np.array([[0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0],
+        [0, 1, 0, 0]], np.uint8), 'VEC4', 5121)
+    add(np.array([[1, 0, 0, 0], [1, 0, 0, 0], [1, 0, 0, 0],
+        [0.5, 0.5, 0, 0]], np.float32), 'VEC4', 5126)
+    # joint1 at (0, 1, 0)
+    ibm = np.stack([np.eye(4), np.eye(4)]).astype(np.float32)
+    ibm[1, 3, 1] = -1
+    add(ibm.reshape(2, 16), 'MAT4', 5126)
+    add(np.array([0, 1, 2, 0, 2, 3], np.uint16), 'SCALAR', 5123)
+    gltf = {
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': [0, 2]}],
+        'nodes': [
+            {'name': 'joint0', 'children': [1]},
+            {'name': 'joint1', 'translation': [0, 1, 0]},
+            {'name': 'mesh', 'mesh': 0, 'skin': 0, 'translation': [5, 0, 0]},
+        ],
+        'skins': [{'joints': [0, 1], 'inverseBindMatrices': 5}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 2, 'JOINTS_0': 3, 'WEIGHTS_0': 4},
+                                    'indices': 6, 'material': 0}]}],
+        'materials': [{}],
+        'animations': [{
+            'channels': [{'sampler': 0, 'target': {'node': 1, 'path': 'translation'}}],
+            'samplers': [{'input': 0, 'output': 1}]}],
+        'buffers': [{'byteLength': len(bin),
+                     'uri': 'data:application/octet-stream;base64,' + base64.b64encode(bytes(bin)).decode()}],
+        'bufferViews': views,
+        'accessors': accessors,
+    }
+    return parse_gltf(json.dumps(gltf).encode())
+
+
+class TestSkinning(unittest.TestCase):
+
+    def test_random(self):
+        rng = np.random.default_rng(0)
+        node_count = 10
+        joint_nodes = [1, 3, 4, 7, 8]
+        world = rng.random((node_count, 4, 4), dtype=np.float32)
+        world[:, :, 3] = (0, 0, 0, 1)
+        ibm = rng.random((len(joint_nodes), 4, 4), dtype=np.float32)
+        ibm[:, :, 3] = (0, 0, 0, 1)
+        mesh_world = np.eye(4, dtype=np.float32)
+        mesh_world[3, :3] = (1, 2, 3)
+
+        vertex_count = 50
+        positions = rng.random((vertex_count, 3), dtype=np.float32)
+        joints = rng.integers(0, len(joint_nodes), (vertex_count, 4))
+        weights = rng.random((vertex_count, 4), dtype=np.float32)
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        skin = SkinJoints(joint_nodes, ibm)
+        primitive = SkinnedPrimitive(positions, joints, weights)
+        buffer = primitive.positions
+        actual = primitive.update(skin.update(world, mesh_world))
+        # reuse the buffer
+        self.assertIs(buffer, actual)
+        expected = reference_skinning(
+            positions, joints, weights, world, ibm, joint_nodes, mesh_world)
+        self.assertTrue(np.allclose(expected, actual, atol=1e-4))
+
+    def test_loader(self):
+        loader = GltfLoader(create_skinned_gltf())
+        loader.load()
+        self.assertEqual(1, len(loader.skinned))
+        positions = loader.skinned[0].primitive.positions
+
+        loader.set_time(0.5)
+        self.assertTrue(loader.skinning_updated)
+        # joint1 moved 1 to x.
+        # in the mesh node space. the renderer applies the node world (5, 0, 0)
+        self.assertTrue(np.allclose(
+            [[-5, 0, 0], [-4, 0, 0], [-4, 1, 0], [-3.5, 1, 0]], positions))
+
+    def test_validate(self):
+        data = create_skinned_gltf()
+        result = skin_validation.validate_skin(data, 0)
+        self.assertEqual([0, 1], result.joints.tolist())
+        self.assertTrue(np.allclose(np.eye(4), result.bind))
+        self.assertEqual([True, True], result.used.tolist())
+        self.assertEqual(1, len(result.weights))
+        self.assertEqual(4, result.weights[0].vertex_count)
+        self.assertTrue(result.is_valid)
+
+        # joint1 is moved from the rest pose
+        loader = GltfLoader(data)
+        loader.load()
+        loader.set_time(1)
+        result = skin_validation.validate_skin(data, 0, loader.graph.world)
+        self.assertEqual([1], result.bad_joints.tolist())
+        self.assertAlmostEqual(2, result.bind_error[1])
+        self.assertFalse(result.is_valid)
+
+    def test_debug_info(self):
+        data = create_skinned_gltf()
+        loader = GltfLoader(data)
+        loader.load()
+        # the bind pose is validated in the rest pose, not the animated frame
+        loader.set_time(1)
+        lines = skin_debug.get_debug_info(data, 0, loader).splitlines()
+        self.assertEqual('[0:joint0] (0.000, 0.000, 0.000)', lines[0])
+        self.assertEqual('[1:joint1] (2.000, 1.000, 0.000)', lines[1])
+        self.assertNotIn('IBM', ''.join(lines))
+
+        lines = skin_debug.get_node_debug_info(data, 2, loader).splitlines()
+        self.assertEqual(['[0:joint0] (0.000, 0.000, 0.000)', '[1:joint1] (2.000, 1.000, 0.000)'],
+                         lines[:2])
+        self.assertTrue(lines[2].startswith('meshes[0].primitives[0]: 4 vertices'))
+
+    def test_check_weights(self):
+        joints = np.array([[0, 1, 0, 0], [2, 0, 0, 0],
+                          [0, 1, 0, 0], [0, 0, 0, 0]])
+        weights = np.array([[0.5, 0.5, 0, 0], [1, 0, 0, 0],
+                           [1.5, -0.5, 0, 0], [np.nan, 0, 0, 0]], np.float32)
+        self.assertEqual([0, 1, 2], skin_validation.used_joints(
+            joints, weights).tolist())
+        anomalies = skin_validation.check_weights(0, 0, joints, weights, 2)
+        self.assertEqual([3], anomalies.bad_sum.tolist())
+        self.assertEqual([2], anomalies.negative.tolist())
+        self.assertEqual([3], anomalies.non_finite.tolist())
+        self.assertEqual([1], anomalies.out_of_range.tolist())
+        self.assertFalse(anomalies.is_valid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import signal
+import base64
+import pathlib
+import tempfile
+import numpy as np
+from gltfloupe import validate
+
+
+def write_gltf(path: pathlib.Path, max: list):
+    positions = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], np.float32)
+    bin = positions.tobytes()
+    path.write_text(json.dumps({
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 0}}]}],
+        'buffers': [{'byteLength': len(bin),
+                     'uri': 'data:application/octet-stream;base64,' + base64.b64encode(bin).decode()}],
+        'bufferViews': [{'buffer': 0, 'byteLength': len(bin)}],
+        'accessors': [{'bufferView': 0, 'componentType': 5126, 'count': 3, 'type': 'VEC3',
+                       'min': [0, 0, 0], 'max': max}],
+    }))
+
+
+class TestValidate(unittest.TestCase):
+
+    def test_validate(self):
+        with tempfile.TemporaryDirectory() as dir:
+            root = pathlib.Path(dir)
+            write_gltf(root / 'ok.gltf', [1, 1, 0])
+            write_gltf(root / 'bounds.gltf', [1, 2, 0])
+            (root / 'broken.gltf').write_text('{')
+            (root / 'readme.txt').write_text('')
+
+            for jobs in (1, 2):
+                results = {pathlib.Path(result['file']).name: result
+                           for result in validate.validate([root], jobs=jobs, timeout=10)}
+                self.assertEqual(
+                    {'ok.gltf', 'bounds.gltf', 'broken.gltf'}, set(results.keys()))
+                self.assertTrue(results['ok.gltf']['valid'])
+                self.assertFalse(results['bounds.gltf']['valid'])
+                self.assertEqual(
+                    [1, 1, 0], results['bounds.gltf']['bounds'][0]['actual_max'])
+                self.assertIn('error', results['broken.gltf'])
+                # json lines
+                json.dumps(results)
+
+    def test_single_job_restores(self):
+        import resource
+        with tempfile.TemporaryDirectory() as dir:
+            root = pathlib.Path(dir)
+            write_gltf(root / 'ok.gltf', [1, 1, 0])
+
+            def handler(signum, frame):
+                pass
+            previous = signal.signal(signal.SIGALRM, handler)
+            limits = resource.getrlimit(resource.RLIMIT_AS)
+            try:
+                applied = []
+                for result in validate.validate([root], jobs=1, timeout=10, max_memory=4096):
+                    applied.append(resource.getrlimit(resource.RLIMIT_AS)[0])
+                    self.assertTrue(result['valid'])
+                self.assertEqual([4096 * 1024 * 1024], applied)
+                self.assertIs(handler, signal.getsignal(signal.SIGALRM))
+                self.assertEqual(limits, resource.getrlimit(resource.RLIMIT_AS))
+            finally:
+                signal.signal(signal.SIGALRM, previous)
+
+
+if __name__ == '__main__':
+    unittest.main()